@@ -21,7 +21,7 @@ from ambuda import auth as auth_manager
 from ambuda import checks, filters, queries
 from ambuda.consts import LOCALES
 from ambuda.mail import mailer
-from ambuda.utils import assets
+from ambuda.utils import assets, xml
 from ambuda.utils.json_serde import AmbudaJSONEncoder
 from ambuda.utils.url_converters import ListConverter
 from ambuda.views.about import bp as about
@@ -108,6 +108,9 @@ def create_app(config_env: str):
     # Logger
     _initialize_logger(config_spec.LOG_LEVEL)
 
+    # XML transforms
+    xml.set_backend(config_spec.XML_BACKEND)
+
     # Database
     _initialize_db_session(app, config_env)
 
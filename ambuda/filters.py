@@ -6,6 +6,8 @@ from dateutil.relativedelta import relativedelta
 from indic_transliteration import sanscript
 from markdown_it import MarkdownIt
 
+from ambuda.utils.transliteration import transliterate
+
 #: A markdown parser for user-generated text.
 #:
 #: - `js-default` is like Commonmark but it disables raw HTML.
@@ -22,17 +24,17 @@ MARKDOWN = MarkdownIt("js-default", {"typographer": True, "linkify": True}).enab
 
 def slp_to_devanagari(s: str) -> str:
     """SLP1 to Devanagari."""
-    return sanscript.transliterate(s, sanscript.SLP1, sanscript.DEVANAGARI)
+    return transliterate(s, sanscript.SLP1, sanscript.DEVANAGARI)
 
 
 def devanagari(s: str) -> str:
     """HK to Devanagari."""
-    return sanscript.transliterate(s, sanscript.HK, sanscript.DEVANAGARI)
+    return transliterate(s, sanscript.HK, sanscript.DEVANAGARI)
 
 
 def roman(s: str) -> str:
     """HK to Roman."""
-    return sanscript.transliterate(s, sanscript.HK, sanscript.IAST)
+    return transliterate(s, sanscript.HK, sanscript.IAST)
 
 
 def time_ago(dt: datetime, now=None) -> str:
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String
+from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Text as _Text
 from sqlalchemy.orm import relationship
 
 from ambuda.models.base import Base, foreign_key, pk
@@ -17,6 +18,9 @@ class Dictionary(Base):
     slug = Column(String, unique=True, nullable=False)
     #: Human-readable dictionary title.
     title = Column(String, nullable=False)
+    #: A hash of this dictionary's entries. For details, see
+    #: `ambuda.utils.content_hash`.
+    content_hash = Column(String)
 
     entries = relationship("DictionaryEntry", backref="dictionary", cascade="delete")
 
@@ -39,3 +43,32 @@ class DictionaryEntry(Base):
     key = Column(String, index=True, nullable=False)
     #: XML payload. We convert this to HTML at serving time.
     value = Column(String, nullable=False)
+
+    #: Cached HTML for this entry, if any.
+    html_cache = relationship(
+        "DictionaryEntryHtml", uselist=False, cascade="all, delete-orphan"
+    )
+
+
+class DictionaryEntryHtml(Base):
+
+    """Cached HTML for a specific `DictionaryEntry`.
+
+    Converting an entry's XML to HTML is deterministic, so we can store the
+    result and skip the conversion on later requests. For the caching logic,
+    see `ambuda.utils.dict_html`.
+    """
+
+    __tablename__ = "dictionary_entry_html"
+
+    #: Primary key.
+    id = pk()
+    #: The entry this HTML belongs to.
+    entry_id = Column(
+        Integer, ForeignKey("dictionary_entries.id"), unique=True, nullable=False
+    )
+    #: The version of the rule table that created `html`. If this doesn't
+    #: match the current version, `html` is stale.
+    version = Column(String, nullable=False)
+    #: The rendered HTML for this entry.
+    html = Column(_Text, nullable=False)
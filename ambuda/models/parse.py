@@ -1,7 +1,20 @@
 """Models for parse data."""
 
-from sqlalchemy import Column
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+)
 from sqlalchemy import Text as _Text
+from sqlalchemy.orm import deferred
 
 from ambuda.models.base import Base, foreign_key, pk
 
@@ -20,4 +33,116 @@ class BlockParse(Base):
     #: The parse data as a semi-structured text blob.
     #: As Ambuda matures, we can make this field more structured and
     #: searchable.
-    data = Column(_Text, nullable=False)
+    #: Views read `tokens` instead, so we load this field only on access.
+    data = deferred(Column(_Text, nullable=False))
+    #: `data` in a packed binary form that is much faster to read. For the
+    #: format, see `word_parses.pack_tokens`. Parses that we imported before
+    #: we added this field don't have it.
+    tokens = Column(LargeBinary)
+
+
+class BlockParseHtml(Base):
+
+    """Cached parse alignment for a specific `TextBlock`.
+
+    Aligning a block's text with its parse data is slow but deterministic, so
+    we store the result and reuse it until the block or its parse changes. For
+    the caching logic, see `ambuda.utils.parse_html`.
+    """
+
+    __tablename__ = "block_parse_html"
+
+    #: Primary key.
+    id = pk()
+    #: The block this HTML belongs to.
+    block_id = Column(
+        Integer, ForeignKey("text_blocks.id"), unique=True, nullable=False
+    )
+    #: A hash of the inputs that created `html`. If this doesn't match the hash
+    #: of the current inputs, `html` is stale.
+    key = Column(String, nullable=False)
+    #: The block's text aligned with its parse data, as HTML.
+    html = Column(_Text, nullable=False)
+    #: Whether alignment failed and `html` is a backup parse instead.
+    is_backup = Column(Boolean, nullable=False)
+
+
+class BlockAlignment(Base):
+
+    """How well a specific block aligned with its parse data.
+
+    We fill this table with a batch job that aligns every parsed block. For
+    details, see `ambuda.utils.alignment_report`.
+    """
+
+    __tablename__ = "block_alignments"
+
+    #: Primary key.
+    id = pk()
+    #: The text that contains this block.
+    text_id = foreign_key("texts.id")
+    #: The block we aligned.
+    block_id = Column(
+        Integer, ForeignKey("text_blocks.id"), unique=True, nullable=False
+    )
+    #: Whether alignment failed and we fell back to a backup parse.
+    is_backup = Column(Boolean, nullable=False)
+    #: The number of tokens in the block's parse data.
+    num_tokens = Column(Integer, nullable=False)
+    #: The number of tokens left over after alignment. If this isn't 0, the
+    #: block's text and parse data don't quite match.
+    num_unused_tokens = Column(Integer, nullable=False)
+    #: How long alignment took, in seconds.
+    seconds = Column(Float, nullable=False)
+
+
+class TextAlignmentReport(Base):
+
+    """A summary of the `BlockAlignment` rows for a specific `Text`."""
+
+    __tablename__ = "text_alignment_reports"
+
+    #: Primary key.
+    id = pk()
+    #: The text this report describes.
+    text_id = Column(Integer, ForeignKey("texts.id"), unique=True, nullable=False)
+    #: The number of blocks with parse data.
+    num_blocks = Column(Integer, nullable=False)
+    #: The number of blocks that fell back to a backup parse.
+    num_backup = Column(Integer, nullable=False)
+    #: The number of blocks that aligned but had tokens left over.
+    num_mismatched = Column(Integer, nullable=False)
+    #: The total time spent aligning, in seconds.
+    seconds = Column(Float, nullable=False)
+    #: When we created this report.
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class LemmaOccurrence(Base):
+
+    """A single occurrence of a lemma in our parse data.
+
+    `BlockParse.data` is not searchable, so we extract its tokens when we
+    import parse data and store one row per token here. For the indexing
+    logic, see `ambuda.utils.concordance`.
+    """
+
+    __tablename__ = "lemma_occurrences"
+    # Lookups filter by lemma and page by ID, so index both together. Then
+    # each page is a single range scan rather than a sort of every match.
+    __table_args__ = (Index("ix_lemma_occurrences_lemma_id", "lemma", "id"),)
+
+    #: Primary key. Within a text, occurrences are in reading order.
+    id = pk()
+    #: The lemma, in SLP1.
+    lemma = Column(String, nullable=False)
+    #: The text that contains this occurrence.
+    text_id = foreign_key("texts.id")
+    #: The block that contains this occurrence.
+    block_id = foreign_key("text_blocks.id")
+    #: The token's position within its block's parse data, starting from 0.
+    position = Column(Integer, nullable=False)
+    #: The inflected form, in SLP1.
+    form = Column(String, nullable=False)
+    #: The token's raw parse, e.g. "pos=n,g=m,c=1,n=s".
+    parse = Column(String, nullable=False)
@@ -1,8 +1,8 @@
 """Models for text content."""
 
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, ForeignKey, Integer, String
 from sqlalchemy import Text as _Text
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from ambuda.models.base import Base, foreign_key, pk
 
@@ -19,10 +19,50 @@ class Text(Base):
     slug = Column(String, unique=True, nullable=False)
     #: The title of this text.
     title = Column(String, nullable=False)
-    #: Metadata for this text, as a <teiHeader> element.
-    header = Column(_Text)
+    #: Metadata for this text, as a <teiHeader> element. This blob is large
+    #: and rarely needed, so we load it only on access. For the fields we
+    #: display, see `stats`.
+    header = deferred(Column(_Text))
+    #: A hash of this text's content, including its sections and parse data.
+    #: For details, see `ambuda.utils.content_hash`.
+    content_hash = Column(String)
     #: An ordered list of the sections contained within this text.
     sections = relationship("TextSection", backref="text", cascade="delete")
+    #: Precomputed metadata and statistics for this text, if any.
+    stats = relationship("TextStats", uselist=False, cascade="all, delete-orphan")
+
+
+class TextStats(Base):
+
+    """Precomputed metadata and statistics for a specific `Text`.
+
+    We compute these fields when we seed a text so that our views don't need
+    to parse its header or count its blocks. For the logic, see
+    `ambuda.utils.text_stats`.
+    """
+
+    __tablename__ = "text_stats"
+
+    #: Primary key.
+    id = pk()
+    #: The text these stats belong to.
+    text_id = Column(Integer, ForeignKey("texts.id"), unique=True, nullable=False)
+    #: The title in the text's TEI header.
+    title = Column(String)
+    #: The author in the text's TEI header.
+    author = Column(String)
+    #: The publisher in the text's TEI header.
+    publisher = Column(String)
+    #: The availability statement in the text's TEI header, as HTML.
+    availability = Column(_Text)
+    #: The number of sections in this text.
+    num_sections = Column(Integer, nullable=False)
+    #: The number of blocks in this text.
+    num_blocks = Column(Integer, nullable=False)
+    #: The number of blocks in this text that have parse data.
+    num_parsed_blocks = Column(Integer, nullable=False)
+    #: The size of this text's plain text, in characters.
+    num_characters = Column(Integer, nullable=False)
 
 
 class TextSection(Base):
@@ -46,10 +86,43 @@ class TextSection(Base):
     slug = Column(String, index=True, nullable=False)
     #: The title of this section.
     title = Column(String, nullable=False)
+    #: A hash of this section's content, including the parse data for its
+    #: blocks. For details, see `ambuda.utils.content_hash`.
+    content_hash = Column(String)
     #: An ordered list of the blocks contained within this section.
     blocks = relationship(
         "TextBlock", backref="section", order_by=lambda: TextBlock.n, cascade="delete"
     )
+    #: Pre-rendered HTML for this section, if any.
+    html_cache = relationship(
+        "TextSectionHtml", uselist=False, cascade="all, delete-orphan"
+    )
+
+
+class TextSectionHtml(Base):
+
+    """Pre-rendered HTML for a specific `TextSection`.
+
+    Rendering a section means transforming the XML of every block it contains,
+    so we do this work ahead of time and store the result here. For the
+    caching logic, see `ambuda.utils.section_html`.
+    """
+
+    __tablename__ = "text_section_html"
+
+    #: Primary key.
+    id = pk()
+    #: The section this HTML belongs to.
+    section_id = Column(
+        Integer, ForeignKey("text_sections.id"), unique=True, nullable=False
+    )
+    #: The version of the rule table that created `blocks`. If this doesn't
+    #: match the current version, `blocks` is stale.
+    version = Column(String, nullable=False)
+    #: The section's blocks as a JSON list of `{"slug": ..., "mula": ...}`
+    #: objects, in order. This is exactly the `blocks` field of the reader's
+    #: JSON payload.
+    blocks = Column(_Text, nullable=False)
 
 
 class TextBlock(Base):
@@ -8,8 +8,15 @@ import functools
 from typing import Optional
 
 from flask import current_app
-from sqlalchemy import create_engine
-from sqlalchemy.orm import load_only, scoped_session, selectinload, sessionmaker
+from sqlalchemy import bindparam, create_engine, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import (
+    contains_eager,
+    load_only,
+    scoped_session,
+    selectinload,
+    sessionmaker,
+)
 
 import ambuda.database as db
 
@@ -75,6 +82,7 @@ def text(slug: str) -> Optional[db.Text]:
             selectinload(db.Text.sections).load_only(
                 db.TextSection.slug,
                 db.TextSection.title,
+                db.TextSection.content_hash,
             )
         )
         .first()
@@ -93,17 +101,60 @@ def text_meta(slug: str) -> db.Text:
             load_only(
                 db.Text.id,
                 db.Text.slug,
+                db.Text.content_hash,
             )
         )
         .first()
     )
 
 
+def text_stats(text_id: int) -> Optional[db.TextStats]:
+    session = get_session()
+    return session.query(db.TextStats).filter_by(text_id=text_id).first()
+
+
+def text_header(text_id: int) -> Optional[str]:
+    session = get_session()
+    return session.query(db.Text.header).filter_by(id=text_id).scalar()
+
+
 def text_section(text_id: int, slug: str) -> Optional[db.TextSection]:
     session = get_session()
     return session.query(db.TextSection).filter_by(text_id=text_id, slug=slug).first()
 
 
+def section_with_blocks(section_id: int) -> Optional[db.TextSection]:
+    """Return a section with its text's title and its blocks' slugs and XML.
+
+    We load everything in a single query. `section.blocks` is in order, and
+    `section.text` has just its title.
+    """
+    session = get_session()
+    sections = (
+        session.query(db.TextSection)
+        .join(db.TextSection.text)
+        .outerjoin(db.TextSection.blocks)
+        .options(
+            load_only(db.TextSection.slug, db.TextSection.title),
+            contains_eager(db.TextSection.text).load_only(db.Text.title),
+            contains_eager(db.TextSection.blocks).load_only(
+                db.TextBlock.slug, db.TextBlock.xml
+            ),
+        )
+        .filter(db.TextSection.id == section_id)
+        .order_by(db.TextBlock.n)
+        .populate_existing()
+        .all()
+    )
+    # Don't use `first()`, which would limit the query to the first block.
+    return sections[0] if sections else None
+
+
+def section_html(section_id: int) -> Optional[db.TextSectionHtml]:
+    session = get_session()
+    return session.query(db.TextSectionHtml).filter_by(section_id=section_id).first()
+
+
 def block(text_id: int, slug: str) -> Optional[db.TextBlock]:
     session = get_session()
     return session.query(db.TextBlock).filter_by(text_id=text_id, slug=slug).first()
@@ -114,39 +165,161 @@ def block_parse(block_id: int) -> Optional[db.BlockParse]:
     return session.query(db.BlockParse).filter_by(block_id=block_id).first()
 
 
+def block_parse_html(block_id: int) -> Optional[db.BlockParseHtml]:
+    session = get_session()
+    return session.query(db.BlockParseHtml).filter_by(block_id=block_id).first()
+
+
+def text_alignment_reports() -> dict[int, db.TextAlignmentReport]:
+    """Map each text ID to its alignment report, if it has one."""
+    session = get_session()
+    return {r.text_id: r for r in session.query(db.TextAlignmentReport).all()}
+
+
+def text_alignment_report(text_id: int) -> Optional[db.TextAlignmentReport]:
+    session = get_session()
+    return session.query(db.TextAlignmentReport).filter_by(text_id=text_id).first()
+
+
+def misaligned_blocks(text_id: int) -> list:
+    """Return the blocks in a text that didn't align cleanly with their parse.
+
+    Each row has the block's `slug` and its `BlockAlignment` fields.
+    """
+    session = get_session()
+    return (
+        session.query(
+            db.TextBlock.slug,
+            db.BlockAlignment.is_backup,
+            db.BlockAlignment.num_tokens,
+            db.BlockAlignment.num_unused_tokens,
+        )
+        .join(db.TextBlock, db.TextBlock.id == db.BlockAlignment.block_id)
+        .filter(
+            (db.BlockAlignment.text_id == text_id)
+            & (db.BlockAlignment.is_backup | (db.BlockAlignment.num_unused_tokens > 0))
+        )
+        .order_by(db.TextBlock.id)
+        .all()
+    )
+
+
 def dictionaries() -> list[db.Dictionary]:
     session = get_session()
     return session.query(db.Dictionary).all()
 
 
-def dict_entries(
-    sources: list[str], keys: list[str]
-) -> dict[str, list[db.DictionaryEntry]]:
-    """
-    :param sources: slugs of the dictionaries to query
-    :param keys: the keys (dictionary entries) to query
+def dictionary_hashes(slugs: list[str]) -> dict[str, Optional[str]]:
+    """Map the given dictionary slugs to their content hashes.
+
+    Unlike IDs, hashes change whenever we reseed a dictionary, so we don't
+    cache them. Unknown slugs are omitted from the result.
     """
     session = get_session()
-    dicts = dictionaries()
-    source_ids = [d.id for d in dicts if d.slug in sources]
-
     rows = (
-        session.query(db.DictionaryEntry)
-        .filter(
-            (db.DictionaryEntry.dictionary_id.in_(source_ids))
-            & (db.DictionaryEntry.key.in_(keys))
-        )
+        session.query(db.Dictionary.slug, db.Dictionary.content_hash)
+        .filter(db.Dictionary.slug.in_(slugs))
         .all()
     )
+    return {r.slug: r.content_hash for r in rows}
+
+
+def _pad_in_list(values: list) -> list:
+    """Pad `values` to a power-of-two length by repeating its last item.
+
+    Expanding bind parameters render one placeholder per value, so each list
+    length produces different SQL. Padding keeps the number of distinct
+    statements small, which lets the database reuse its prepared statements.
+    Repeated values don't change the result of an `IN` clause.
+    """
+    size = 1
+    while size < len(values):
+        size *= 2
+    return values + values[-1:] * (size - len(values))
+
+
+_dictionaries = db.Dictionary.__table__
+_entries = db.DictionaryEntry.__table__
+_entry_html = db.DictionaryEntryHtml.__table__
+# Both queries below join on the dictionary's slug rather than take its ID, so
+# that each lookup is a single statement and never sees a stale ID.
+_dict_entries_query = (
+    select(
+        _entries.c.id,
+        _entries.c.dictionary_id,
+        _dictionaries.c.slug.label("dictionary_slug"),
+        _entries.c.key,
+        _entries.c.value,
+        _entry_html.c.version.label("html_version"),
+        _entry_html.c.html,
+    )
+    .join(_dictionaries, _dictionaries.c.id == _entries.c.dictionary_id)
+    .outerjoin(_entry_html, _entry_html.c.entry_id == _entries.c.id)
+    .where(
+        _dictionaries.c.slug.in_(bindparam("slugs", expanding=True))
+        & _entries.c.key.in_(bindparam("keys", expanding=True))
+    )
+    .order_by(_entries.c.id)
+)
+
+
+_dict_entry_keys_query = (
+    select(
+        _entries.c.id,
+        _entries.c.dictionary_id,
+        _dictionaries.c.slug.label("dictionary_slug"),
+        _entries.c.key,
+    )
+    .join(_dictionaries, _dictionaries.c.id == _entries.c.dictionary_id)
+    .where(
+        _dictionaries.c.slug.in_(bindparam("slugs", expanding=True))
+        & _entries.c.key.in_(bindparam("keys", expanding=True))
+    )
+    .order_by(_entries.c.id)
+)
 
-    dict_id_to_slug = {d.id: d.slug for d in dicts}
+
+def _fetch_dict_entries(query, sources: list[str], keys: list[str]):
     mapping = {s: [] for s in sources}
+    if not sources or not keys:
+        return mapping
+
+    session = get_session()
+    rows = session.execute(
+        query,
+        {
+            "slugs": _pad_in_list(sorted(set(sources))),
+            "keys": _pad_in_list(sorted(set(keys))),
+        },
+    ).all()
     for row in rows:
-        dict_slug = dict_id_to_slug[row.dictionary_id]
-        mapping[dict_slug].append(row)
+        mapping[row.dictionary_slug].append(row)
     return mapping
 
 
+def dict_entries(sources: list[str], keys: list[str]) -> dict[str, list[Row]]:
+    """Fetch entries from the given dictionaries in a single query.
+
+    Each entry is a read-only row with the fields `id`, `dictionary_id`,
+    `dictionary_slug`, `key`, `value`, `html_version`, and `html`. The last two
+    come from the entry's cached HTML and are ``None`` if the entry hasn't been
+    cached.
+
+    :param sources: slugs of the dictionaries to query
+    :param keys: the keys (dictionary entries) to query
+    """
+    return _fetch_dict_entries(_dict_entries_query, sources, keys)
+
+
+def dict_entry_keys(sources: list[str], keys: list[str]) -> dict[str, list[Row]]:
+    """Like :func:`dict_entries`, but fetch only the entry's ID, dictionary, and key.
+
+    Use this when the entries' HTML comes from elsewhere, e.g. a prerendered
+    artifact, so that we don't read each entry's XML for nothing.
+    """
+    return _fetch_dict_entries(_dict_entry_keys_query, sources, keys)
+
+
 def projects() -> list[db.Project]:
     """Return all projects in no particular order."""
     session = get_session()
@@ -0,0 +1,261 @@
+"""Match DCS phrases to the blocks of an Ambuda text.
+
+DCS splits a text into phrases, which are usually half-verses or sentences,
+and numbers them differently from our blocks. So we match each phrase to a
+line in our text by comparing normalized keys (see
+`dcs_utils.make_block_key`). A line is a verse line (`<l>`); in a block with
+no verse lines, it's a sentence (`<s>`) or, failing that, the whole block.
+
+1. We index every line in the text by its key and by its section, where a
+   block's section is its slug without the last component (e.g. "1.5" for
+   "1.5.12").
+2. For each phrase, we take the first unused line in the phrase's section
+   with the same key. Each index entry is a queue, and we skip used lines
+   lazily, so each lookup is O(1) amortized.
+3. If there's no exact match, we look for the closest unused line in the same
+   section within a small edit distance. This catches typos and small
+   differences in sandhi between DCS and our source text.
+4. If there's still no match, we take the first unused line anywhere in the
+   text with the same key. This catches phrases whose DCS section doesn't
+   line up with ours.
+
+Phrases that match neither way are misses, which we write to a separate file
+for review.
+"""
+
+import xml.etree.ElementTree as ET
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from indic_transliteration import sanscript
+from sqlalchemy import select
+
+import ambuda.database as db
+import ambuda.scripts.analysis.dcs_utils as dcs
+from ambuda.seed.utils.data_utils import create_db
+from ambuda.utils.transliteration import transliterate_many
+
+#: The largest edit distance we tolerate, as a fraction of the key's length.
+MAX_ERROR_RATE = 0.1
+#: The number of blocks to read at one time.
+BATCH_SIZE = 1000
+
+
+def section_of(slug: str) -> str:
+    """Get the section of a block or phrase slug, e.g. "1.5" for "1.5.12"."""
+    return slug.rpartition(".")[0]
+
+
+def _distance(a: str, b: str, max_distance: int) -> Optional[int]:
+    """Return the edit distance between `a` and `b` if it's at most
+    `max_distance`, or `None` otherwise."""
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    row = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        new_row = [i]
+        for j, other in enumerate(b, 1):
+            new_row.append(
+                min(new_row[j - 1] + 1, row[j] + 1, row[j - 1] + (char != other))
+            )
+        if min(new_row) > max_distance:
+            return None
+        row = new_row
+    return row[-1] if row[-1] <= max_distance else None
+
+
+class BlockMatcher:
+    """An index of the lines in a text that we can match phrases against.
+
+    Each line can be matched at most once.
+    """
+
+    def __init__(self, lines: Iterable[tuple[str, str]]):
+        """
+        :param lines: (block slug, key) pairs for each line, in text order.
+        """
+        self._slugs = []
+        self._keys = []
+        self._by_key = {}
+        self._by_section_and_key = {}
+        self._by_section = {}
+        for i, (slug, key) in enumerate(lines):
+            section = section_of(slug)
+            self._slugs.append(slug)
+            self._keys.append(key)
+            self._by_key.setdefault(key, deque()).append(i)
+            self._by_section_and_key.setdefault((section, key), deque()).append(i)
+            self._by_section.setdefault(section, []).append(i)
+        self._used = bytearray(len(self._slugs))
+
+    def __len__(self):
+        return len(self._slugs)
+
+    def _pop_unused(self, queue: Optional[deque]) -> Optional[int]:
+        while queue:
+            i = queue.popleft()
+            if not self._used[i]:
+                return i
+        return None
+
+    def _closest(self, key: str, section: str) -> Optional[tuple[int, int]]:
+        max_distance = int(len(key) * MAX_ERROR_RATE)
+        if max_distance == 0:
+            return None
+
+        best = None
+        for i in self._by_section.get(section, []):
+            if self._used[i]:
+                continue
+            distance = _distance(key, self._keys[i], max_distance)
+            if distance is not None and (best is None or distance < best[1]):
+                best = (i, distance)
+                max_distance = distance
+        return best
+
+    def match(self, key: str, section: str) -> Optional[tuple[str, int]]:
+        """Match a phrase to an unused line and mark that line as used.
+
+        :param key: the phrase's key.
+        :param section: the section to look in first.
+        :return: the matching line's block slug and its edit distance from
+            `key`, or `None` if there's no match.
+        """
+        i = self._pop_unused(self._by_section_and_key.get((section, key)))
+        distance = 0
+        if i is None:
+            i, distance = self._closest(key, section) or (None, 0)
+        if i is None:
+            i = self._pop_unused(self._by_key.get(key))
+
+        if i is None:
+            return None
+        self._used[i] = 1
+        return self._slugs[i], distance
+
+
+def _lines_of(block_xml: str) -> list[str]:
+    """Get the text of each line in a block."""
+    root = ET.fromstring(block_xml)
+    lines = list(root.iter("l")) or list(root.iter("s")) or [root]
+    return ["".join(line.itertext()) for line in lines]
+
+
+def load_lines(engine, text_slug: str) -> list[tuple[str, str]]:
+    """Load a (block slug, key) pair for each line in the given text."""
+    blocks = db.TextBlock.__table__
+    texts = db.Text.__table__
+    slugs = []
+    lines = []
+    with engine.connect() as conn:
+        text_id = conn.execute(
+            select(texts.c.id).where(texts.c.slug == text_slug)
+        ).scalar_one()
+        result = conn.execution_options(stream_results=True).execute(
+            select(blocks.c.slug, blocks.c.xml)
+            .where(blocks.c.text_id == text_id)
+            .order_by(blocks.c.section_id, blocks.c.n)
+        )
+        for rows in result.partitions(BATCH_SIZE):
+            for row in rows:
+                for line in _lines_of(row.xml):
+                    slugs.append(row.slug)
+                    lines.append(line)
+
+    # Transliterate all lines in one batch, which is much faster than
+    # transliterating them one at a time.
+    keys = [
+        dcs.make_block_key(s)
+        for s in transliterate_many(lines, sanscript.DEVANAGARI, sanscript.SLP1)
+    ]
+    return list(zip(slugs, keys))
+
+
+@dataclass
+class MatchReport:
+    #: Maps each matched block slug to the parse blobs of its phrases, in order.
+    hits: dict[str, list[str]] = field(default_factory=dict)
+    #: Maps each unmatched DCS slug to its (key, blob) pairs.
+    misses: dict[str, list[tuple[str, str]]] = field(default_factory=dict)
+    #: The number of phrases that matched a line exactly.
+    num_exact: int = 0
+    #: The number of phrases that matched a line within some edit distance.
+    num_near: int = 0
+    #: The number of phrases that matched nothing.
+    num_misses: int = 0
+
+    def __str__(self):
+        return (
+            f"{self.num_exact} exact matches, {self.num_near} near matches, "
+            f"{self.num_misses} misses"
+        )
+
+
+def match_all(
+    matcher: BlockMatcher, phrases: Iterable[tuple[str, str, str]]
+) -> MatchReport:
+    """Match each DCS phrase to a block.
+
+    :param phrases: (key, DCS slug, parse blob) triples. We look for each
+        phrase in the section of its DCS slug.
+    """
+    report = MatchReport()
+    for key, dcs_slug, blob in phrases:
+        match = matcher.match(key, section_of(dcs_slug))
+        if match is None:
+            report.num_misses += 1
+            report.misses.setdefault(dcs_slug, []).append((key, blob))
+            continue
+
+        block_slug, distance = match
+        if distance:
+            report.num_near += 1
+        else:
+            report.num_exact += 1
+        report.hits.setdefault(block_slug, []).append(blob)
+    return report
+
+
+def _slug_sort_key(kv):
+    try:
+        return tuple(int(x) for x in kv[0].split("."))
+    except ValueError:
+        return (0, 0, 0)
+
+
+def write_report(report: MatchReport, text_slug: str, xml_id_for_text: str):
+    """Write hits to `{text_slug}.txt` and misses to `{text_slug}-errors.txt`."""
+    with open(f"{text_slug}.txt", "w") as f:
+        for slug, blobs in sorted(report.hits.items(), key=_slug_sort_key):
+            f.write(f"# id = {xml_id_for_text}.{slug}\n")
+            for blob in blobs:
+                f.write(blob)
+                f.write("\n")
+            f.write("\n")
+
+    with open(f"{text_slug}-errors.txt", "w") as f:
+        for slug, keys_and_blobs in sorted(report.misses.items(), key=_slug_sort_key):
+            for key, blob in keys_and_blobs:
+                f.write(f"# dcs_id = {slug}\n")
+                f.write(f"# key = {key}\n")
+                f.write(blob)
+                f.write("\n\n")
+
+
+def map_and_write(text_slug: str, blocks_iter, xml_id_for_text: str):
+    """Match DCS phrases to the blocks of `text_slug` and write the results.
+
+    :param blocks_iter: (key, DCS slug, parse blob) triples.
+    """
+    print("Indexing source text ...")
+    matcher = BlockMatcher(load_lines(create_db(), text_slug))
+    assert len(matcher), f"{text_slug} has no lines."
+
+    print("Matching ...")
+    report = match_all(matcher, blocks_iter)
+    print(report)
+
+    print("Writing hits and misses ...")
+    write_report(report, text_slug, xml_id_for_text)
+    print("Done.")
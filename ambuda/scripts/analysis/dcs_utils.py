@@ -5,7 +5,8 @@ One term of art I use here: a "chunk" is a space-separated segment in the text.
 
 import re
 from dataclasses import dataclass
-from typing import Iterator
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
 import conllu
 from indic_transliteration import sanscript
@@ -37,6 +38,26 @@ class Section:
     phrases: list[Phrase]
 
 
+@dataclass
+class Progress:
+    """Counters for a long-running parse."""
+
+    #: The number of files we've finished reading.
+    num_files: int = 0
+    #: The number of sections we've yielded.
+    num_sections: int = 0
+    #: The number of phrases we've parsed.
+    num_phrases: int = 0
+    #: The number of tokens we've parsed.
+    num_tokens: int = 0
+
+    def __str__(self):
+        return (
+            f"{self.num_files} files, {self.num_sections} sections, "
+            f"{self.num_phrases} phrases, {self.num_tokens} tokens"
+        )
+
+
 # The DCS CONLLU fields in order.
 FIELDS = [
     "id",
@@ -275,14 +296,16 @@ def parse_phrase(sentence) -> Phrase:
     )
 
 
-def parse_sections(text: str) -> list[Section]:
+def _iter_sections(sentences: Iterable, progress: Optional[Progress]):
     phrases = []
     section_slug = None
 
-    for sentence in conllu.parse(text, fields=FIELDS):
+    for sentence in sentences:
         # Start of section -- extract metadata and continue.
         if "# chapter" in sentence.metadata:
             if phrases:
+                if progress:
+                    progress.num_sections += 1
                 yield Section(slug=section_slug, phrases=phrases)
                 phrases = []
 
@@ -294,11 +317,21 @@ def parse_sections(text: str) -> list[Section]:
         # Each "sentence" is a half-verse.
         phrase = parse_phrase(sentence)
         phrases.append(phrase)
+        if progress:
+            progress.num_phrases += 1
+            progress.num_tokens += len(phrase.tokens)
 
     if phrases:
+        if progress:
+            progress.num_sections += 1
         yield Section(slug=section_slug, phrases=phrases)
 
 
+def parse_sections(text: str) -> Iterator[Section]:
+    """Parse all sections in a CoNLL-U string."""
+    yield from _iter_sections(conllu.parse(text, fields=FIELDS), None)
+
+
 def make_block_key(raw: str) -> str:
     # Keep letters, ignoring H due to common typos in the source text.
     key = re.sub(r"([^a-zA-GI-Z])", "", raw)
@@ -309,9 +342,33 @@ def make_block_key(raw: str) -> str:
     return key
 
 
-def parse_file(path) -> Iterator[Section]:
+def _iter_sentences(lines: Iterable[str]) -> Iterator[conllu.TokenList]:
+    """Parse CoNLL-U sentences one at a time.
+
+    This is like `conllu.parse_incr`, except that we also make each line of
+    DCS metadata compatible with CoNLL-U first.
+    """
+    buf = []
+    for line in lines:
+        if line.strip():
+            buf.append(re.sub(r"# (\w+):", r"# \1 =", line))
+        elif buf:
+            yield conllu.parse_token_and_metadata("".join(buf).rstrip(), FIELDS)
+            buf = []
+    if buf:
+        yield conllu.parse_token_and_metadata("".join(buf).rstrip(), FIELDS)
+
+
+def parse_file(path: Path, progress: Optional[Progress] = None) -> Iterator[Section]:
+    """Parse the sections in a DCS file.
+
+    We read the file one line at a time and yield each section as soon as we
+    finish it, so memory use depends on the size of the largest section rather
+    than the size of the file.
+
+    :param progress: if set, update these counters as we parse.
+    """
     with open(path) as f:
-        text = f.read()
-    # Make DCS metadata compatible with CONLLU.
-    text = re.sub(r"# (\w+):", r"# \1 =", text)
-    yield from parse_sections(text)
+        yield from _iter_sections(_iter_sentences(f), progress)
+    if progress:
+        progress.num_files += 1
@@ -5,7 +5,8 @@ from pathlib import Path
 from typing import Iterator
 
 import ambuda.scripts.analysis.dcs_utils as dcs
-from ambuda.scripts.analysis.ramayana import get_kanda_and_sarga, map_and_write
+from ambuda.scripts.analysis.block_matcher import map_and_write
+from ambuda.scripts.analysis.ramayana import get_kanda_and_sarga
 
 TITLE_MAP = {
     "MBh, 1": "1",
@@ -37,9 +38,10 @@ def iter_sections():
         / "files"
         / "Mahābhārata"
     )
+    progress = dcs.Progress()
     for section_path in sorted(text_path.iterdir()):
-        for section in dcs.parse_file(section_path):
-            yield section
+        yield from dcs.parse_file(section_path, progress)
+        print(f"Parsed {section_path.name} ({progress})")
 
 
 def iter_parsed_blocks() -> Iterator[tuple[str, str, str]]:
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Benchmark converting dictionary queries to lookup keys.
+
+We compare the per-query path (one transliteration and expansion per query)
+with the batch path in `ambuda.utils.dict_utils`. Usage:
+
+    python -m ambuda.scripts.benchmarks.dict_keys --num-keys 5000
+"""
+
+import random
+import re
+import time
+
+import click
+from indic_transliteration import detect, sanscript
+
+from ambuda.utils import dict_utils
+
+#: Sample queries in several scripts, including some repeats.
+SAMPLE_QUERIES = [
+    "rAmaH",
+    "saMgacCaDvam",
+    "devaM",
+    "agni",
+    "kaMpate",
+    "rAjan",
+    "vAc",
+    "Darma",
+    "kṣetra",
+    "saṃskṛta",
+    "yogin",
+    "शान्तिः",
+    "संगच्छध्वम्",
+    "ದೇವ",
+    "dharmakSetra",
+]
+SOURCES = ["mw", "apte", "shabdakalpadruma"]
+
+
+def _standardize_key_per_query(s: str) -> str:
+    """The original `standardize_key`, which scans with `re.finditer`."""
+    buf = list(s)
+    for m in re.finditer("(M)(.)", s):
+        anusvara_index = m.span(1)[0]
+        consonant = m.group(2)
+
+        res = "M"
+        if consonant in "kKgGN":
+            res = "N"
+        if consonant in "cCjJY":
+            res = "Y"
+        if consonant in "wWqQR":
+            res = "R"
+        if consonant in "tTdDn":
+            res = "n"
+        if consonant in "pPbBm":
+            res = "m"
+        buf[anusvara_index] = res
+    return "".join(buf)
+
+
+def per_query(queries: list[str]) -> dict[str, list[str]]:
+    results = {}
+    for query in queries:
+        query = query.strip()
+        input_scheme = detect.detect(query)
+        slp1_key = sanscript.transliterate(query, input_scheme, sanscript.SLP1)
+        slp1_key = _standardize_key_per_query(slp1_key)
+        keys = [slp1_key]
+        keys.extend(dict_utils.expand_apte_keys(slp1_key))
+        keys.extend(dict_utils.expand_skd_keys(slp1_key))
+        results[query] = keys
+    return results
+
+
+def batch(queries: list[str]) -> dict[str, list[str]]:
+    base_keys = dict_utils.to_slp1_keys(queries)
+    expansions = dict_utils.expand_keys(base_keys.values(), SOURCES)
+    return {q: expansions[k] for q, k in base_keys.items()}
+
+
+def _time_per_key(fn, queries: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(queries)
+        best = min(best, time.perf_counter() - start)
+    return best / len(queries)
+
+
+@click.command()
+@click.option("--num-keys", default=5000, help="number of queries per batch")
+@click.option("--repeat", default=5, help="number of timing runs")
+@click.option("--seed", default=0, help="random seed")
+def run(num_keys, repeat, seed):
+    rng = random.Random(seed)
+    # Mix repeated queries with unique ones, as in a real text.
+    queries = [
+        rng.choice(SAMPLE_QUERIES) + ("" if rng.random() < 0.5 else f"{i % 97}")
+        for i in range(num_keys)
+    ]
+
+    before = _time_per_key(per_query, queries, repeat)
+    after = _time_per_key(batch, queries, repeat)
+    print(f"keys per batch:  {num_keys}")
+    print(f"per-query path:  {before * 1e6:.2f} us/key")
+    print(f"batch path:      {after * 1e6:.2f} us/key")
+    print(f"speedup:         {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    run()
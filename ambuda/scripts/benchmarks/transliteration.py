@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Benchmark memoized transliteration on a sarga-sized page.
+
+We approximate the transliteration work needed to read one sarga of the
+Ramayana:
+
+- the titles on the text's contents page and the section page, which go
+  through the `devanagari` filter;
+- one `align_text_with_parse` call per verse, which is what we run when a
+  reader opens the parse of each verse.
+
+We build the sarga from the opening verses of the Bala Kanda, so it doesn't
+need a seeded database. Usage:
+
+    python -m ambuda.scripts.benchmarks.transliteration --num-verses 100
+"""
+
+import time
+from xml.etree import ElementTree as ET
+
+import click
+from indic_transliteration import sanscript
+
+from ambuda import filters
+from ambuda.utils import transliteration
+from ambuda.utils.parse_alignment import align_text_with_parse
+from ambuda.utils.word_parses import extract_tokens
+
+#: Verses from Ramayana 1.1, in SLP1, split into padas.
+SAMPLE_VERSES = [
+    [
+        "tapaHsvADyAyanirataM tapasvI vAgvidAM varam",
+        "nAradaM paripapracCa vAlmIkirmunipuMgavam",
+    ],
+    [
+        "ko nvasmin sAmprataM loke guRavAn kaSca vIryavAn",
+        "DarmajYaSca kftajYaSca satyavAkyo dfQavrataH",
+    ],
+    [
+        "cAritreRa ca ko yuktaH sarvaBUtezu ko hitaH",
+        "vidvAn kaH kaH samarTaSca kaScEkapriyadarSanaH",
+    ],
+    [
+        "AtmavAn ko jitakroDo dyutimAn ko 'nasUyakaH",
+        "kasya biByati devASca jAtarozasya saMyuge",
+    ],
+    [
+        "etadicCAmyahaM SrotuM paraM kOtUhalaM hi me",
+        "maharze tvaM samarTo 'si jYAtumevaMviDaM naram",
+    ],
+    [
+        "SrutvA cEtattrilokajYo vAlmIkernArado vacaH",
+        "SrUyatAmiti cAmantrya prahfzwo vAkyamabravIt",
+    ],
+]
+#: The number of sargas in the Ramayana, whose titles are on the contents page.
+NUM_SECTIONS = 645
+
+
+def _make_block(padas: list[str]) -> tuple[str, str]:
+    """Make a block's XML and parse data from a verse in SLP1."""
+    lines = "".join(
+        "<l>"
+        + sanscript.transliterate(pada, sanscript.SLP1, sanscript.DEVANAGARI)
+        + "</l>"
+        for pada in padas
+    )
+    words = " ".join(padas).split()
+    parse = "\n".join(f"{w}\t{w}\tpos=n,g=m,c=1,n=s" for w in words)
+    return f"<lg>{lines}</lg>", parse
+
+
+def render_sarga(blocks, section_titles):
+    for title in section_titles:
+        filters.devanagari(title)
+    for _ in range(8):
+        filters.devanagari("rAmAyaNam")
+    for xml, parse in blocks:
+        align_text_with_parse(xml, extract_tokens(parse))
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@click.command()
+@click.option("--num-verses", default=100, help="number of verses in the sarga")
+@click.option("--repeat", default=5, help="number of timing runs")
+def run(num_verses, repeat):
+    blocks = [
+        _make_block(SAMPLE_VERSES[i % len(SAMPLE_VERSES)]) for i in range(num_verses)
+    ]
+    section_titles = [f"bAlakARqaH sargaH {i}" for i in range(1, NUM_SECTIONS + 1)]
+    # Check that the XML parses before we time anything.
+    for xml, _ in blocks:
+        ET.fromstring(xml)
+
+    def render_uncached():
+        transliteration.cache_clear()
+        render_sarga(blocks, section_titles)
+
+    def render_cached():
+        render_sarga(blocks, section_titles)
+
+    default_size = transliteration.CACHE_SIZE
+    transliteration.CACHE_SIZE = 0
+    uncached = _time(render_uncached, repeat)
+    transliteration.CACHE_SIZE = default_size
+
+    cold = _time(render_uncached, repeat)
+    render_cached()
+    warm = _time(render_cached, repeat)
+
+    print(f"verses:        {num_verses}")
+    print(f"no cache:      {uncached * 1e3:.1f} ms")
+    print(f"cold cache:    {cold * 1e3:.1f} ms")
+    print(f"warm cache:    {warm * 1e3:.1f} ms")
+    print(f"speedup:       {uncached / warm:.1f}x (warm vs. no cache)")
+    for (source, dest), info in transliteration.cache_info().items():
+        print(f"{source} -> {dest}: {info}")
+
+
+if __name__ == "__main__":
+    run()
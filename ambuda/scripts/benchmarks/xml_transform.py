@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Benchmark the XML to HTML transform for dictionary entries.
+
+We compare the original engine, which calls each rule on each element, with
+the compiled dispatcher in `ambuda.utils.xml`. We also compare the time and
+peak memory of each backend in that module. By default, we time entries
+from the Monier-Williams dictionary in the development database. If that
+dictionary isn't loaded, we fall back to synthetic MW-style entries. Usage:
+
+    python -m ambuda.scripts.benchmarks.xml_transform --num-entries 5000
+"""
+
+import random
+import time
+import tracemalloc
+from xml.etree import ElementTree as ET
+
+import click
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import ambuda.database as db
+from ambuda.seed.utils.data_utils import create_db
+from ambuda.utils import xml
+
+#: Fragments of MW entry bodies, in the Cologne markup.
+SAMPLE_BODIES = [
+    "<s>agni/</s> <lex>m.</lex> (<ab>cf.</ab> <s>ag</s>) fire, sacrificial fire "
+    "(of three kinds, <s>gArhapatya</s>, <s>Ahavanya</s>, and <s>dakziRa</s>)"
+    ", <ls>RV.</ls> <etc/>",
+    "<s>deva/</s> <lex>mf(<s>I/</s>)n.</lex> (<ab>fr.</ab> 3. <s>div</s>) "
+    "heavenly, divine <info lex='m:f:n'/>, <ls>RV.</ls> <ls>AV.</ls> "
+    "<ls>VS.</ls> <p>also applied to terrestrial things of high excellence</p>",
+    "<s>rAja/n</s> <lex>m.</lex> a king, sovereign, prince <sr/> <b>chief</b>"
+    " <ab>esp.</ab> of the <s>kzatriya</s> <ls>MBh.</ls>; <see/> <s>rAjan</s>"
+    " <eq/> <root/><s>rAj</s>",
+    "<s>Darma/</s> <lex>m.</lex> that which is established or firm, steadfast "
+    "decree, statute, ordinance, law <ls>RV.</ls> <ab>q.v.</ab> "
+    "<cf/> <s>Darman</s> <qv/>; <etym>Lat. firmus</etym>",
+]
+
+
+def _make_entry(rng: random.Random, i: int) -> str:
+    body = " ".join(rng.sample(SAMPLE_BODIES, rng.randint(1, 3)))
+    return (
+        f"<H1><h><key1>k{i}</key1><key2>k{i}</key2></h><body>{body}</body>"
+        f"<tail><L>{i}</L><pc>{i % 1300},{i % 3 + 1}</pc></tail></H1>"
+    )
+
+
+def _load_entries(num_entries: int, seed: int) -> list[str]:
+    engine = create_db()
+    with Session(engine) as session:
+        dictionary = session.query(db.Dictionary).filter_by(slug="mw").first()
+        if dictionary:
+            values = (
+                session.execute(
+                    select(db.DictionaryEntry.value)
+                    .where(db.DictionaryEntry.dictionary_id == dictionary.id)
+                    .order_by(db.DictionaryEntry.id)
+                    .limit(num_entries)
+                )
+                .scalars()
+                .all()
+            )
+            if values:
+                return values
+
+    print("No MW entries found. Using synthetic entries instead.")
+    rng = random.Random(seed)
+    return [_make_entry(rng, i) for i in range(num_entries)]
+
+
+def reference_transform(el: ET.Element, transforms: dict) -> str:
+    """The original `transform`, which calls each rule directly."""
+    for child in el.iter("*"):
+        if child.tag in transforms:
+            fn = transforms[child.tag]
+            if fn is None:
+                child.tag = child.text = None
+            else:
+                fn(child)
+    return ET.tostring(el, encoding="utf-8").decode("utf-8")
+
+
+def _time_per_entry(fn, entries: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for entry in entries:
+            fn(ET.fromstring(entry), xml.mw_xml)
+        best = min(best, time.perf_counter() - start)
+    return best / len(entries)
+
+
+@click.command()
+@click.option("--num-entries", default=5000, help="number of entries to transform")
+@click.option("--repeat", default=5, help="number of timing runs")
+@click.option("--seed", default=0, help="random seed for synthetic entries")
+def run(num_entries, repeat, seed):
+    entries = _load_entries(num_entries, seed)
+    for entry in entries:
+        before = reference_transform(ET.fromstring(entry), xml.mw_xml)
+        after = xml.transform(ET.fromstring(entry), xml.mw_xml)
+        assert before == after, entry
+
+    # Parsing is the same in both paths, so time it separately.
+    parse = min(_time_per_entry(lambda el, _: el, entries, 1) for _ in range(repeat))
+    before = _time_per_entry(reference_transform, entries, repeat) - parse
+    after = _time_per_entry(xml.transform, entries, repeat) - parse
+    print(f"entries:          {len(entries)}")
+    print(f"parse:            {parse * 1e6:.2f} us/entry")
+    print(f"original engine:  {before * 1e6:.2f} us/entry")
+    print(f"compiled engine:  {after * 1e6:.2f} us/entry")
+    print(f"speedup:          {before / after:.1f}x")
+
+    for name, backend in xml.BACKENDS.items():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for entry in entries:
+                backend(entry, xml.mw_xml)
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        backend(max(entries, key=len), xml.mw_xml)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{name + ' backend:':<17} {best / len(entries) * 1e6:.2f} us/entry, "
+            f"{peak / 1024:.0f} KiB peak on the largest entry"
+        )
+
+
+if __name__ == "__main__":
+    run()
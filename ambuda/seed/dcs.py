@@ -1,14 +1,26 @@
+import os
 import subprocess
+import time
 from pathlib import Path
 
-from sqlalchemy.orm import Session, load_only
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
 
 import ambuda.database as db
+from ambuda.seed.utils.cdsl_utils import batches
 from ambuda.seed.utils.data_utils import create_db
+from ambuda.utils import alignment_report, concordance, content_hash, text_stats
+from ambuda.utils.word_parses import pack_tokens
 
 REPO = "https://github.com/ambuda-org/dcs.git"
 PROJECT_DIR = Path(__file__).resolve().parents[2]
 DATA_DIR = PROJECT_DIR / "data" / "ambuda-dcs"
+#: The number of parses to pack at one time.
+BATCH_SIZE = 1000
+#: The number of parses to insert at one time.
+INSERT_BATCH_SIZE = 5000
+#: The number of worker processes to align new parse data with.
+NUM_WORKERS = os.cpu_count() or 1
 
 
 class UpdateException(Exception):
@@ -32,26 +44,6 @@ def fetch_latest_data():
     subprocess.call("git reset --hard origin/main", shell=True, cwd=DATA_DIR)
 
 
-def drop_existing_parse_data(session, text_id: int):
-    session.query(db.BlockParse).filter_by(text_id=text_id).delete()
-
-
-def get_slug_id_map(session, text_id: int) -> dict[str, int]:
-    """For each block, map its slug to its ID."""
-    blocks = (
-        session.query(db.TextBlock)
-        .filter_by(text_id=text_id)
-        .options(
-            load_only(
-                db.TextBlock.id,
-                db.TextBlock.slug,
-            )
-        )
-        .all()
-    )
-    return {b.slug: b.id for b in blocks}
-
-
 def iter_parse_data(path: Path):
     block_slug = None
     buf = []
@@ -75,24 +67,107 @@ def iter_parse_data(path: Path):
         yield block_slug, "\n".join(buf)
 
 
-def add_parse_data(text_slug: str, path: Path):
+def replace_parse_data(
+    engine, text_id: int, path: Path, batch_size: int = INSERT_BATCH_SIZE
+) -> int:
+    """Replace a text's parse data with the data in `path`.
+
+    We delete and insert in one transaction so that readers never see a
+    partly loaded text, and we insert through Core to skip the overhead of
+    the ORM.
+
+    :return: the number of parses inserted.
+    """
+    blocks = db.TextBlock.__table__
+    parses = db.BlockParse.__table__
+    num_inserted = 0
+    with engine.begin() as conn:
+        conn.execute(parses.delete().where(parses.c.text_id == text_id))
+
+        slug_id_map = dict(
+            conn.execute(
+                select(blocks.c.slug, blocks.c.id).where(blocks.c.text_id == text_id)
+            ).all()
+        )
+        for batch in batches(iter_parse_data(path), batch_size):
+            items = [
+                {
+                    "text_id": text_id,
+                    "block_id": slug_id_map[slug],
+                    "data": blob,
+                    "tokens": pack_tokens(blob),
+                }
+                for slug, blob in batch
+            ]
+            conn.execute(parses.insert(), items)
+            num_inserted += len(items)
+    return num_inserted
+
+
+def add_parse_data(
+    text_slug: str,
+    path: Path,
+    batch_size: int = INSERT_BATCH_SIZE,
+    num_workers: int = NUM_WORKERS,
+):
     engine = create_db()
     with Session(engine) as session:
         text = session.query(db.Text).filter_by(slug=text_slug).first()
         if not text:
             raise UpdateException()
+        text_id = text.id
+
+    start = time.time()
+    num_inserted = replace_parse_data(engine, text_id, path, batch_size)
+    seconds = time.time() - start
+    log(
+        f"- {text_slug}: inserted {num_inserted} parses in {seconds:.1f}s "
+        f"({num_inserted / max(seconds, 1e-6):.0f} rows/sec)."
+    )
+
+    # Parse data is part of each text's content hash and stats.
+    content_hash.hash_text(engine, text_slug)
+    text_stats.update(engine, text_slug)
+    concordance.index_text(engine, text_slug)
+
+    # Check how well the new data lines up with the text. This also fills the
+    # parse HTML cache for the text's blocks.
+    report = alignment_report.run(engine, text_slug, num_workers)[text_slug]
+    if report["num_backup"] or report["num_mismatched"]:
+        log(
+            f"- {text_slug}: {report['num_backup']} blocks failed to align and "
+            f"{report['num_mismatched']} had tokens left over."
+        )
 
-        drop_existing_parse_data(session, text.id)
 
-        slug_id_map = get_slug_id_map(session, text.id)
-        for slug, blob in iter_parse_data(path):
-            session.add(
-                db.BlockParse(text_id=text.id, block_id=slug_id_map[slug], data=blob)
+def pack_existing_parse_data(engine) -> int:
+    """Pack the parse data that we imported before `BlockParse.tokens` existed.
+
+    :return: the number of parses packed.
+    """
+    parses = db.BlockParse.__table__
+    num_packed = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(parses.c.id, parses.c.data)
+                .where(parses.c.tokens.is_(None))
+                .limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            conn.execute(
+                parses.update()
+                .where(parses.c.id == bindparam("parse_id"))
+                .values(tokens=bindparam("tokens")),
+                [{"parse_id": r.id, "tokens": pack_tokens(r.data)} for r in rows],
             )
-        session.commit()
+        num_packed += len(rows)
+        log(f"Packed {num_packed} parses.")
+    return num_packed
 
 
-def run():
+def run(num_workers: int = NUM_WORKERS):
     log("Fetching latest data ...")
     fetch_latest_data()
 
@@ -100,7 +175,7 @@ def run():
     for path in DATA_DIR.iterdir():
         if path.suffix == ".txt":
             try:
-                add_parse_data(path.stem, path)
+                add_parse_data(path.stem, path, num_workers=num_workers)
                 log(f"- Added {path.stem} parse data to the database.")
             except UpdateException:
                 log(f"- Skipped {path.stem}.")
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 
 import ambuda.database as db
 from ambuda.seed.utils.data_utils import create_db
+from ambuda.utils import content_hash, section_html, text_stats, verse_search
 from ambuda.utils.tei_parser import Document, parse_document
 
 
@@ -102,6 +103,12 @@ def add_document(engine, spec: Spec):
             _create_new_text(session, spec, document)
             log(f"- Created {spec.slug}")
 
+    num_rendered = section_html.prebuild(engine, spec.slug)
+    log(f"- Rendered {num_rendered} sections for {spec.slug}")
+    content_hash.hash_text(engine, spec.slug)
+    text_stats.update(engine, spec.slug)
+    verse_search.index_text(engine, spec.slug)
+
 
 def run():
     logging.getLogger().setLevel(0)
@@ -3,9 +3,11 @@ import itertools
 import logging
 from xml.etree import ElementTree as ET
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 import ambuda.database as db
+from ambuda.utils import content_hash, dict_search
 
 #: The maximum number of entries to add to the dictionary at one time.
 #:
@@ -57,7 +59,14 @@ def delete_existing_dict(session, slug: str):
     """Delete an existing dictionary and all of its entries."""
     dictionary = session.query(db.Dictionary).filter_by(slug=slug).first()
     if dictionary:
-        # Delete entries first to avoid slow relationship-based delete.
+        # Delete cached HTML and entries first to avoid slow relationship-based
+        # deletes.
+        entry_ids = select(db.DictionaryEntry.id).where(
+            db.DictionaryEntry.dictionary_id == dictionary.id
+        )
+        session.query(db.DictionaryEntryHtml).filter(
+            db.DictionaryEntryHtml.entry_id.in_(entry_ids)
+        ).delete(synchronize_session=False)
         session.query(db.DictionaryEntry).filter_by(
             dictionary_id=dictionary.id
         ).delete()
@@ -93,3 +102,8 @@ def create_from_scratch(engine, slug: str, title: str, generator):
                 )
             conn.execute(ins, items)
             logging.info(BATCH_SIZE * (i + 1))
+
+    content_hash.hash_dictionary(engine, slug)
+
+    if slug in dict_search.SOURCES:
+        dict_search.index_dictionary(engine, slug)
@@ -7,9 +7,11 @@ from typing import Iterator
 
 from dotenv import load_dotenv
 from indic_transliteration import sanscript
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 import ambuda.database as db
+from ambuda.utils import content_hash, section_html, text_stats, verse_search
 
 load_dotenv()
 PROJECT_DIR = Path(__file__).parent.parent.parent
@@ -135,10 +137,33 @@ def write_kandas(
                     n += 1
         session.commit()
 
+    section_html.prebuild(engine, text_slug)
+    content_hash.hash_text(engine, text_slug)
+    text_stats.update(engine, text_slug)
+    verse_search.index_text(engine, text_slug)
+
 
 def delete_existing_text(engine, slug: str):
+    """Delete an existing text and everything that refers to it."""
     with Session(engine) as session:
         text = session.query(db.Text).where(db.Text.slug == slug).first()
         if text:
+            # These tables refer to the text or its blocks but aren't in the
+            # text's ORM cascade, so delete their rows first.
+            block_ids = select(db.TextBlock.id).where(db.TextBlock.text_id == text.id)
+            session.query(db.BlockParseHtml).filter(
+                db.BlockParseHtml.block_id.in_(block_ids)
+            ).delete(synchronize_session=False)
+            for model in (
+                db.BlockAlignment,
+                db.TextAlignmentReport,
+                db.LemmaOccurrence,
+                db.BlockParse,
+            ):
+                session.query(model).filter_by(text_id=text.id).delete(
+                    synchronize_session=False
+                )
             session.delete(text)
             session.commit()
+    # Our search index refers to blocks by ID, so drop the text's entries too.
+    verse_search.delete_text(engine, slug)
@@ -7,6 +7,8 @@ import Routes from './routes';
 const DICTIONARY_CONFIG_KEY = 'dictionary';
 // The maximum number of queries to keep in `this.history`.
 const HISTORY_SIZE = 10;
+// The minimum query length before we fetch completions.
+const MIN_COMPLETION_LENGTH = 2;
 
 export default () => ({
   // The script to use for Sanskrit text.
@@ -24,6 +26,8 @@ export default () => ({
   query: '',
   // The user's search history, from least to most recent.
   history: [],
+  // Autocomplete suggestions for the current query.
+  completions: [],
   // If true, show the source selection widget.
   showSourceSelector: false,
 
@@ -100,6 +104,22 @@ export default () => ({
     }
   },
 
+  /** Fetch autocomplete suggestions for the current query. */
+  async fetchCompletions() {
+    if (!this.query || this.query.length < MIN_COMPLETION_LENGTH) {
+      this.completions = [];
+      return;
+    }
+
+    const url = Routes.ajaxDictionaryCompletions(this.sources, this.query);
+    const resp = await fetch(url);
+    if (resp.ok) {
+      this.completions = await resp.json();
+    } else {
+      this.completions = [];
+    }
+  },
+
   // Search with the given query.
   async searchFor(q) {
     this.query = q;
@@ -7,6 +7,11 @@ export default {
     return `/api/dictionaries/${sourcesStr}/${query}`;
   },
 
+  ajaxDictionaryCompletions: (sources, prefix) => {
+    const sourcesStr = sources.join(',');
+    return `/api/dictionaries/${sourcesStr}/complete/${prefix}`;
+  },
+
   dictionaryQuery: (sources, query) => {
     const sourcesStr = sources.join(',');
     return `/tools/dictionaries/${sourcesStr}/${query}`;
@@ -0,0 +1,102 @@
+"""Check how well each parsed block aligns with its parse data.
+
+Our parse data comes from DCS, and its tokens don't always line up with the
+text of our blocks. When they don't, the reader shows a backup parse (see
+`parse_alignment.create_backup_parse`), but nobody notices until a reader
+opens that block. So after we import parse data, we align every parsed block
+and record the result:
+
+- one `BlockAlignment` row per block, with whether alignment succeeded, how
+  many tokens were left over, and how long it took;
+- one `TextAlignmentReport` row per text that summarizes these rows.
+
+Since this job aligns every block anyway, it also stores each block's HTML in
+the `BlockParseHtml` cache (see `ambuda.utils.parse_html`).
+
+The tagging pages show these reports so that we can find and fix bad blocks.
+Our parse data seed script runs this job for each text it imports. To run it
+for all texts, use the `report-alignment` CLI command.
+"""
+
+import logging
+import multiprocessing
+from typing import Optional
+
+from sqlalchemy import select
+
+import ambuda.database as db
+from ambuda.utils import batch_jobs, parse_html
+
+
+def _report_text(engine, pool, num_workers: int, text_id: int, slug: str) -> dict:
+    block_alignments = db.BlockAlignment.__table__
+    reports = db.TextAlignmentReport.__table__
+
+    summary = {
+        "text_id": text_id,
+        "num_blocks": 0,
+        "num_backup": 0,
+        "num_mismatched": 0,
+        "seconds": 0.0,
+    }
+    work = parse_html.iter_block_batches(engine, text_id, only_stale=False)
+    all_items = []
+    for _, aligned in batch_jobs.imap(pool, parse_html.align_batch, work, num_workers):
+        parse_html.write_cache(engine, aligned)
+        for a in aligned:
+            all_items.append(
+                {
+                    "text_id": text_id,
+                    "block_id": a["block_id"],
+                    "is_backup": a["is_backup"],
+                    "num_tokens": a["num_tokens"],
+                    "num_unused_tokens": a["num_unused_tokens"],
+                    "seconds": a["seconds"],
+                }
+            )
+            summary["num_blocks"] += 1
+            summary["num_backup"] += a["is_backup"]
+            summary["num_mismatched"] += a["num_unused_tokens"] > 0
+            summary["seconds"] += a["seconds"]
+        logging.info(f"{slug}: aligned {summary['num_blocks']} blocks")
+
+    # Replace the old rows and summary together, so that readers never see a
+    # partial report.
+    with engine.begin() as conn:
+        conn.execute(
+            block_alignments.delete().where(block_alignments.c.text_id == text_id)
+        )
+        if all_items:
+            conn.execute(block_alignments.insert(), all_items)
+        conn.execute(reports.delete().where(reports.c.text_id == text_id))
+        conn.execute(reports.insert(), summary)
+    return summary
+
+
+def run(engine, slug: Optional[str] = None, num_workers: int = 1) -> dict[str, dict]:
+    """Align every parsed block, cache its HTML, and record the results.
+
+    :param engine: the database engine to use.
+    :param slug: the text to check. If `None`, check all texts.
+    :param num_workers: the number of worker processes to align with.
+    :return: a map from each text slug to its new `TextAlignmentReport`
+        fields.
+    """
+    texts = db.Text.__table__
+    query = select(texts.c.id, texts.c.slug).order_by(texts.c.id)
+    if slug is not None:
+        query = query.where(texts.c.slug == slug)
+    with engine.connect() as conn:
+        rows = conn.execute(query).all()
+    if slug is not None and not rows:
+        raise ValueError(f'Text "{slug}" does not exist.')
+
+    pool = multiprocessing.Pool(num_workers) if num_workers > 1 else None
+    try:
+        return {
+            r.slug: _report_text(engine, pool, num_workers, r.id, r.slug) for r in rows
+        }
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
@@ -0,0 +1,69 @@
+"""Helpers for jobs that process a large table in batches.
+
+Our prebuild and report jobs share the same shape: read rows one page at a
+time, do the expensive work for each page in a process pool, and write the
+results from the main process. This module holds the reading and pooling
+parts of that shape.
+"""
+
+from collections import deque
+from typing import Any, Callable, Iterable, Iterator
+
+#: The number of batches per worker that we send to a pool before we wait for
+#: the oldest result.
+PENDING_PER_WORKER = 2
+
+
+def iter_batches(engine, query, id_column) -> Iterator[list]:
+    """Run `query` one page at a time and yield each page of rows.
+
+    We page by `id_column` rather than holding one long-lived cursor, so that
+    we don't hold a read open (and, on SQLite, a lock) while the caller
+    writes results.
+
+    :param query: a `select` that's ordered by `id_column` and has a limit.
+    :param id_column: the column to page by. Each row must have a field with
+        the same name.
+    """
+    last_id = 0
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(query.where(id_column > last_id)).all()
+        if not rows:
+            return
+        last_id = getattr(rows[-1], id_column.name)
+        yield rows
+
+
+def imap(
+    pool, fn: Callable, work: Iterable[tuple[Any, Any]], num_workers: int = 1
+) -> Iterator[tuple[Any, Any]]:
+    """Apply `fn` to each batch in `work` and yield the results in order.
+
+    Unlike `Pool.imap`, we read `work` in the calling thread and keep at most
+    `PENDING_PER_WORKER * num_workers` batches in flight. So a slow consumer
+    doesn't cause the whole table to pile up in memory, and any state that
+    `work` touches is touched by one thread only.
+
+    :param pool: a `multiprocessing.Pool`, or `None` to run `fn` in this
+        process.
+    :param work: (context, batch) pairs. We send only `batch` to `fn` and
+        pass `context` through as-is, so the caller can attach data that
+        workers don't need, such as counts for rows that it skipped.
+    :return: (context, `fn(batch)`) pairs.
+    """
+    if pool is None:
+        for context, batch in work:
+            yield context, fn(batch)
+        return
+
+    max_pending = PENDING_PER_WORKER * num_workers
+    pending = deque()
+    for context, batch in work:
+        pending.append((context, pool.apply_async(fn, (batch,))))
+        if len(pending) >= max_pending:
+            context, result = pending.popleft()
+            yield context, result.get()
+    while pending:
+        context, result = pending.popleft()
+        yield context, result.get()
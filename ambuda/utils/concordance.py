@@ -0,0 +1,126 @@
+"""A concordance of the lemmas in our parse data.
+
+`BlockParse.data` is a TSV blob, so finding every occurrence of a lemma would
+mean scanning and parsing every blob we have. Instead, we parse each text's
+blobs once, when we import its parse data, and store one `LemmaOccurrence` row
+per token. Lookups then use the index on `LemmaOccurrence` (lemma, id).
+
+We page through results by ID rather than by offset, so that late pages are as
+fast as early ones. Within a text, IDs follow reading order.
+
+Our parse data seed script calls :func:`index_text` after it imports a text.
+To index all texts, use the `index-lemmas` CLI command.
+"""
+
+import logging
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import ambuda.database as db
+import ambuda.queries as q
+from ambuda.utils.word_parses import extract_tokens
+
+#: The number of parses to read at one time.
+BATCH_SIZE = 1000
+#: The number of occurrences to show on each page.
+PAGE_SIZE = 50
+
+
+class Occurrence(NamedTuple):
+    #: The occurrence's ID, which we use for pagination.
+    id: int
+    #: The slug of the text that contains this occurrence.
+    text_slug: str
+    #: The title of the text that contains this occurrence.
+    text_title: str
+    #: The slug of the block that contains this occurrence.
+    block_slug: str
+    #: The token's position within its block.
+    position: int
+    #: The inflected form, in SLP1.
+    form: str
+    #: The token's raw parse.
+    parse: str
+
+
+class Page(NamedTuple):
+    #: The occurrences on this page, in order.
+    occurrences: list[Occurrence]
+    #: The ID to pass as `after` to get the next page, or `None` if this is
+    #: the last page.
+    next_after: Optional[int]
+
+
+def index_text(engine, slug: str) -> int:
+    """(Re)index all parse data for the given text.
+
+    :return: the number of occurrences indexed.
+    """
+    with Session(engine) as session:
+        text = session.query(db.Text).filter_by(slug=slug).one()
+        text_id = text.id
+
+    blocks = db.TextBlock.__table__
+    parses = db.BlockParse.__table__
+    occurrences = db.LemmaOccurrence.__table__
+    num_indexed = 0
+    with engine.begin() as conn:
+        conn.execute(occurrences.delete().where(occurrences.c.text_id == text_id))
+
+        result = conn.execution_options(stream_results=True).execute(
+            select(parses.c.block_id, parses.c.data)
+            .join(blocks, blocks.c.id == parses.c.block_id)
+            .where(parses.c.text_id == text_id)
+            .order_by(blocks.c.section_id, blocks.c.n, parses.c.id)
+        )
+        for rows in result.partitions(BATCH_SIZE):
+            items = [
+                {
+                    "lemma": token.lemma,
+                    "text_id": text_id,
+                    "block_id": row.block_id,
+                    "position": i,
+                    "form": token.form,
+                    "parse": token.raw_parse,
+                }
+                for row in rows
+                for i, token in enumerate(extract_tokens(row.data))
+            ]
+            if items:
+                conn.execute(occurrences.insert(), items)
+            num_indexed += len(items)
+            logging.info(f"{slug}: indexed {num_indexed} occurrences")
+    return num_indexed
+
+
+def find(lemma: str, after: Optional[int] = None, limit: int = PAGE_SIZE) -> Page:
+    """Find occurrences of the given lemma across all texts.
+
+    :param lemma: the lemma to find, in SLP1.
+    :param after: if set, return only occurrences after this ID.
+    """
+    session = q.get_session()
+    query = (
+        session.query(
+            db.LemmaOccurrence.id,
+            db.Text.slug,
+            db.Text.title,
+            db.TextBlock.slug,
+            db.LemmaOccurrence.position,
+            db.LemmaOccurrence.form,
+            db.LemmaOccurrence.parse,
+        )
+        .join(db.Text, db.Text.id == db.LemmaOccurrence.text_id)
+        .join(db.TextBlock, db.TextBlock.id == db.LemmaOccurrence.block_id)
+        .filter(db.LemmaOccurrence.lemma == lemma)
+    )
+    if after is not None:
+        query = query.filter(db.LemmaOccurrence.id > after)
+    # Fetch one extra row to learn whether there's a next page.
+    rows = query.order_by(db.LemmaOccurrence.id).limit(limit + 1).all()
+
+    occurrences = [Occurrence(*r) for r in rows[:limit]]
+    next_after = occurrences[-1].id if len(rows) > limit else None
+    return Page(occurrences, next_after)
@@ -0,0 +1,136 @@
+"""Content hashes for texts and dictionaries.
+
+Texts and dictionaries change only when we reseed them. After each reseed, we
+hash their content and store the result on the `Text`, `TextSection`, and
+`Dictionary` rows. Views use these hashes to build HTTP ETags (see
+`ambuda.utils.http_cache`), so they can tell whether a page has changed
+without loading its blocks or entries.
+
+- A section's hash covers its slug, its title, and the XML and parse data of
+  each of its blocks.
+- A text's hash covers its slug, its title, its header, and the hash of each
+  of its sections.
+- A dictionary's hash covers its slug, its title, and each of its entries.
+
+A missing hash means that we haven't hashed that row yet. To hash all texts and
+dictionaries, use the `hash-content` CLI command.
+"""
+
+import hashlib
+import logging
+from typing import Optional
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+import ambuda.database as db
+from ambuda.utils import dict_index, text_nav
+
+#: The number of dictionary entries to read at one time.
+BATCH_SIZE = 1000
+
+
+def _update(hasher, *fields: Optional[str]):
+    """Add `fields` to `hasher` so that different field lists can't collide."""
+    for field in fields:
+        if field is None:
+            hasher.update(b"\x00")
+        else:
+            data = field.encode("utf-8")
+            hasher.update(b"\x01" + len(data).to_bytes(8, "big") + data)
+
+
+def hash_text(engine, slug: str) -> str:
+    """Hash the given text and each of its sections, and store the results.
+
+    :return: the text's new hash.
+    """
+    with Session(engine) as session:
+        text = session.query(db.Text).filter_by(slug=slug).one()
+        text_id = text.id
+        text_hasher = hashlib.sha256()
+        _update(text_hasher, text.slug, text.title, text.header)
+
+    sections = db.TextSection.__table__
+    blocks = db.TextBlock.__table__
+    parses = db.BlockParse.__table__
+    texts = db.Text.__table__
+    with engine.begin() as conn:
+        section_hashers = {}
+        for row in conn.execute(
+            select(sections.c.id, sections.c.slug, sections.c.title)
+            .where(sections.c.text_id == text_id)
+            .order_by(sections.c.id)
+        ):
+            section_hashers[row.id] = hasher = hashlib.sha256()
+            _update(hasher, row.slug, row.title)
+
+        result = conn.execution_options(stream_results=True).execute(
+            select(blocks.c.section_id, blocks.c.slug, blocks.c.xml, parses.c.data)
+            .outerjoin(parses, parses.c.block_id == blocks.c.id)
+            .where(blocks.c.text_id == text_id)
+            .order_by(blocks.c.section_id, blocks.c.n, parses.c.id)
+        )
+        for row in result:
+            _update(section_hashers[row.section_id], row.slug, row.xml, row.data)
+
+        items = []
+        for section_id, hasher in section_hashers.items():
+            section_hash = hasher.hexdigest()
+            _update(text_hasher, section_hash)
+            items.append({"section_id": section_id, "content_hash": section_hash})
+        if items:
+            conn.execute(
+                sections.update()
+                .where(sections.c.id == bindparam("section_id"))
+                .values(content_hash=bindparam("content_hash")),
+                items,
+            )
+
+        text_hash = text_hasher.hexdigest()
+        conn.execute(
+            texts.update().where(texts.c.id == text_id).values(content_hash=text_hash)
+        )
+
+    # We call this function after each reseed, so this is also a good time to
+    # drop the text's navigation index.
+    text_nav.invalidate(slug)
+    return text_hash
+
+
+def hash_dictionary(engine, slug: str) -> str:
+    """Hash the given dictionary and store the result.
+
+    :return: the dictionary's new hash.
+    """
+    with Session(engine) as session:
+        dictionary = session.query(db.Dictionary).filter_by(slug=slug).one()
+        dictionary_id = dictionary.id
+        hasher = hashlib.sha256()
+        _update(hasher, dictionary.slug, dictionary.title)
+
+    entries = db.DictionaryEntry.__table__
+    dictionaries = db.Dictionary.__table__
+    num_hashed = 0
+    with engine.begin() as conn:
+        result = conn.execution_options(stream_results=True).execute(
+            select(entries.c.key, entries.c.value)
+            .where(entries.c.dictionary_id == dictionary_id)
+            .order_by(entries.c.id)
+        )
+        for rows in result.partitions(BATCH_SIZE):
+            for row in rows:
+                _update(hasher, row.key, row.value)
+            num_hashed += len(rows)
+            logging.info(f"{slug}: hashed {num_hashed} entries")
+
+        dictionary_hash = hasher.hexdigest()
+        conn.execute(
+            dictionaries.update()
+            .where(dictionaries.c.id == dictionary_id)
+            .values(content_hash=dictionary_hash)
+        )
+
+    # As with texts, drop the dictionary's key index after each reseed.
+    dict_index.invalidate(slug)
+    return dictionary_hash
@@ -0,0 +1,287 @@
+"""A read-only file store of prerendered dictionary HTML.
+
+An *artifact* is a directory with three files:
+
+- `entries.bin` holds each entry's HTML, compressed with zlib and concatenated
+  together.
+- `entries.idx` is an array of fixed-width records sorted by entry ID. Each
+  record holds the entry's ID, the offset and length of its HTML in
+  `entries.bin`, and a digest of the entry's source XML and render version.
+- `manifest.json` maps each dictionary's slug to the content hash (see
+  `ambuda.utils.content_hash`) and render version it had when we built the
+  artifact.
+
+We memory-map the first two files, so a lookup is a binary search over the
+index plus one decompression, and all worker processes share the same pages in
+the OS page cache.
+
+We build artifacts offline with the `build-dictionary-artifact` CLI command.
+If the digest of an entry hasn't changed since the last build, the builder
+copies that entry's HTML from the old artifact instead of rendering it again.
+At serving time, we compare each dictionary's current content hash and render
+version with the manifest. If they match, we can serve the dictionary's HTML
+without reading its entries' XML at all. If they don't, the artifact is stale
+for that dictionary and we ignore it.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import shutil
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import select
+
+import ambuda.database as db
+from ambuda.utils import batch_jobs, dict_html
+
+#: Index record: entry ID, blob offset, blob length, source digest.
+RECORD = struct.Struct("<IQI8s")
+#: Name of the index file within an artifact directory.
+INDEX_FILENAME = "entries.idx"
+#: Name of the blob file within an artifact directory.
+BLOB_FILENAME = "entries.bin"
+#: Name of the manifest file within an artifact directory.
+MANIFEST_FILENAME = "manifest.json"
+#: The number of entries to send to a worker process at one time.
+BATCH_SIZE = 1000
+
+
+def source_digest(slug: str, value: str) -> bytes:
+    """Digest an entry's source XML and its dictionary's render version."""
+    h = hashlib.blake2b(digest_size=8)
+    h.update(dict_html.version(slug).encode("utf-8"))
+    h.update(value.encode("utf-8"))
+    return h.digest()
+
+
+def dictionary_version(slug: str, content_hash: Optional[str]) -> Optional[str]:
+    """Combine a dictionary's content hash and render version.
+
+    If the dictionary has no content hash, we can't tell when it changes, so
+    return ``None``.
+    """
+    if content_hash is None:
+        return None
+    return f"{content_hash}:{dict_html.version(slug)}"
+
+
+def _map_file(path: Path) -> Optional[mmap.mmap]:
+    # mmap doesn't support empty files.
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Artifact:
+    """A memory-mapped dictionary artifact."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._index = _map_file(self.path / INDEX_FILENAME)
+        self._blobs = _map_file(self.path / BLOB_FILENAME)
+        self._num_records = len(self._index) // RECORD.size if self._index else 0
+        try:
+            with open(self.path / MANIFEST_FILENAME) as f:
+                self._versions = json.load(f)
+        except FileNotFoundError:
+            self._versions = {}
+
+    def __len__(self):
+        return self._num_records
+
+    def _find(self, entry_id: int) -> Optional[tuple[int, int, int, bytes]]:
+        lo, hi = 0, self._num_records
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = RECORD.unpack_from(self._index, mid * RECORD.size)
+            if record[0] < entry_id:
+                lo = mid + 1
+            elif record[0] > entry_id:
+                hi = mid
+            else:
+                return record
+        return None
+
+    def is_fresh(self, slug: str, content_hash: Optional[str]) -> bool:
+        """Return whether this artifact is current for the given dictionary.
+
+        :param content_hash: the dictionary's current content hash.
+        """
+        version = dictionary_version(slug, content_hash)
+        return version is not None and self._versions.get(slug) == version
+
+    def get_compressed(
+        self, entry_id: int, digest: Optional[bytes] = None
+    ) -> Optional[bytes]:
+        """Get an entry's compressed HTML.
+
+        :param digest: if set, return ``None`` unless the entry's digest
+            matches.
+        """
+        record = self._find(entry_id)
+        if record is None:
+            return None
+        _, offset, length, record_digest = record
+        if digest is not None and record_digest != digest:
+            return None
+        return self._blobs[offset : offset + length]
+
+    def get(self, entry_id: int) -> Optional[str]:
+        """Get an entry's HTML, or ``None`` if it's missing.
+
+        This doesn't check whether the HTML is current, so check
+        :meth:`is_fresh` first.
+        """
+        blob = self.get_compressed(entry_id)
+        if blob is None:
+            return None
+        return zlib.decompress(blob).decode("utf-8")
+
+
+@functools.lru_cache(maxsize=4)
+def _open_artifact(path: str, mtime_ns: int) -> Artifact:
+    return Artifact(Path(path))
+
+
+def get_artifact(path: Optional[str]) -> Optional[Artifact]:
+    """Open the artifact at the given path, if it exists.
+
+    We reopen the artifact whenever its index file changes, so a rebuild takes
+    effect without a server restart.
+
+    :param path: the artifact directory. If empty, return ``None``.
+    """
+    if not path:
+        return None
+    try:
+        mtime_ns = os.stat(Path(path) / INDEX_FILENAME).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _open_artifact(path, mtime_ns)
+
+
+@dataclass
+class BuildStats:
+    #: The total number of entries in the artifact.
+    num_entries: int = 0
+    #: The number of entries we rendered during this build.
+    num_rendered: int = 0
+    #: The number of entries we copied from the previous build.
+    num_reused: int = 0
+    #: Total build time in seconds.
+    seconds: float = 0.0
+
+    @property
+    def entries_per_second(self) -> float:
+        return self.num_entries / self.seconds if self.seconds else 0.0
+
+
+def _render_batch(batch: list[tuple[int, bytes, str, str]]):
+    """Render a batch of entries. (Runs in a worker process.)"""
+    results = []
+    for entry_id, digest, slug, value in batch:
+        html = dict_html.render(slug, value)
+        results.append((entry_id, digest, zlib.compress(html.encode("utf-8"))))
+    return results
+
+
+def _iter_entry_batches(engine, id_to_slug: dict[int, str]):
+    """Yield all entries in ID order, in batches of (id, slug, value)."""
+    with engine.connect() as conn:
+        entries = db.DictionaryEntry.__table__
+        result = conn.execution_options(stream_results=True).execute(
+            select(entries.c.id, entries.c.dictionary_id, entries.c.value).order_by(
+                entries.c.id
+            )
+        )
+        for rows in result.partitions(BATCH_SIZE):
+            yield [(r.id, id_to_slug[r.dictionary_id], r.value) for r in rows]
+
+
+def build(engine, path: Path, num_workers: int = 1) -> BuildStats:
+    """Build an artifact for every dictionary entry in the database.
+
+    :param engine: the database engine to read from.
+    :param path: the artifact directory to create or update.
+    :param num_workers: the number of worker processes to render with.
+    """
+    path = Path(path)
+    start = time.time()
+    stats = BuildStats()
+
+    old = get_artifact(str(path))
+    tmp_path = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    # Read each dictionary's hash before its entries. If a dictionary changes
+    # during the build, its hash changes too, so we won't serve the
+    # dictionary's (possibly mixed) HTML from this artifact.
+    with engine.connect() as conn:
+        dicts = conn.execute(
+            select(db.Dictionary.id, db.Dictionary.slug, db.Dictionary.content_hash)
+        ).all()
+    id_to_slug = {d.id: d.slug for d in dicts}
+    versions = {d.slug: dictionary_version(d.slug, d.content_hash) for d in dicts}
+    with open(tmp_path / MANIFEST_FILENAME, "w") as f:
+        json.dump({k: v for k, v in versions.items() if v is not None}, f)
+
+    # For each batch, yield the entries we can copy from the old artifact
+    # and the entries we need to render.
+    def iter_work():
+        for batch in _iter_entry_batches(engine, id_to_slug):
+            reused = []
+            to_render = []
+            for entry_id, slug, value in batch:
+                digest = source_digest(slug, value)
+                blob = old.get_compressed(entry_id, digest) if old else None
+                if blob is None:
+                    to_render.append((entry_id, digest, slug, value))
+                else:
+                    reused.append((entry_id, digest, blob))
+            yield reused, to_render
+
+    def write(results):
+        offset = 0
+        with open(tmp_path / INDEX_FILENAME, "wb") as index_f, open(
+            tmp_path / BLOB_FILENAME, "wb"
+        ) as blob_f:
+            for reused, rendered in results:
+                stats.num_rendered += len(rendered)
+                stats.num_reused += len(reused)
+                for entry_id, digest, blob in sorted(rendered + reused):
+                    index_f.write(RECORD.pack(entry_id, offset, len(blob), digest))
+                    blob_f.write(blob)
+                    offset += len(blob)
+
+                stats.num_entries = stats.num_rendered + stats.num_reused
+                logging.info(f"Wrote {stats.num_entries} entries")
+
+    if num_workers > 1:
+        with multiprocessing.Pool(num_workers) as pool:
+            write(batch_jobs.imap(pool, _render_batch, iter_work(), num_workers))
+    else:
+        write(batch_jobs.imap(None, _render_batch, iter_work()))
+
+    # Swap in the new artifact. Readers that already have the old files open
+    # keep reading them until they notice the new index.
+    old_path = path.with_name(path.name + ".old")
+    shutil.rmtree(old_path, ignore_errors=True)
+    if path.exists():
+        path.rename(old_path)
+    tmp_path.rename(path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+    stats.seconds = time.time() - start
+    return stats
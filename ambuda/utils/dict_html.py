@@ -0,0 +1,145 @@
+"""Render dictionary entries as HTML.
+
+We store dictionary entries as XML and convert them to HTML with the rule tables
+in `ambuda.utils.xml`. This conversion is deterministic, so we cache its output
+in the `DictionaryEntryHtml` table.
+
+Each cached row records the version of the rule table that created it. If we
+change a rule table, its version changes too, and any rows it created become
+stale. We re-render stale rows the next time we see them. To render all entries
+ahead of time instead, use the `prebuild-dictionary-html` CLI command.
+
+For read-only serving, we can also prerender every dictionary into a single
+file artifact. For details, see `ambuda.utils.dict_artifact`.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.orm import Session
+
+import ambuda.database as db
+from ambuda.utils import batch_jobs, html_cache, xml
+
+#: The maximum number of entries to render in one batch when prebuilding.
+BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class Renderer:
+    """Converts a dictionary's XML to HTML."""
+
+    #: Converts an XML blob to an HTML string.
+    transform: Callable[[str], str]
+    #: The rule table that `transform` uses.
+    rules: dict
+
+
+#: Maps each dictionary slug to its renderer.
+RENDERERS = {
+    "apte": Renderer(xml.transform_apte_sanskrit_english, xml.apte_cologne_xml),
+    "apte-sh": Renderer(xml.transform_apte_sanskrit_hindi, xml.apte_uoh_xml),
+    "shabdartha-kaustubha": Renderer(xml.transform_sak, xml.vacaspatyam_xml),
+    "mw": Renderer(xml.transform_mw, xml.mw_xml),
+    "vacaspatyam": Renderer(xml.transform_vacaspatyam, xml.vacaspatyam_xml),
+    "amara": Renderer(xml.transform_amarakosha, xml.amarakosha_xml),
+    "shabdakalpadruma": Renderer(xml.transform_mw, xml.mw_xml),
+}
+
+#: The renderer to use for dictionaries that aren't in `RENDERERS`.
+DEFAULT_RENDERER = Renderer(xml.transform_mw, xml.mw_xml)
+
+
+def get_renderer(slug: str) -> Renderer:
+    """Get the renderer for the given dictionary."""
+    return RENDERERS.get(slug, DEFAULT_RENDERER)
+
+
+def version(slug: str) -> str:
+    """Get the current render version for the given dictionary."""
+    return html_cache.rules_version(get_renderer(slug).rules)
+
+
+def render(slug: str, value: str) -> str:
+    """Render an entry's XML as HTML without using the cache."""
+    return get_renderer(slug).transform(value)
+
+
+def entries_to_html(session, slug: str, entries: list) -> list[str]:
+    """Get HTML for the given entries, using the cache where possible.
+
+    Missing and stale cache rows are rendered and added to the session. To save
+    them, call `html_cache.save_cache`.
+
+    :param session: the session to add new cache rows to.
+    :param slug: the slug of the dictionary that contains these entries.
+    :param entries: rows from :func:`ambuda.queries.dict_entries`.
+    """
+    current_version = version(slug)
+    html_blobs = []
+    for entry in entries:
+        if entry.html_version == current_version:
+            html_blobs.append(entry.html)
+            continue
+
+        html = render(slug, entry.value)
+        if entry.html_version is not None:
+            # Replace the stale row. The delete runs now and the insert runs
+            # when we commit, so both happen in the same transaction.
+            session.execute(
+                delete(db.DictionaryEntryHtml).where(
+                    db.DictionaryEntryHtml.entry_id == entry.id
+                )
+            )
+        session.add(
+            db.DictionaryEntryHtml(
+                entry_id=entry.id, version=current_version, html=html
+            )
+        )
+        html_blobs.append(html)
+    return html_blobs
+
+
+def prebuild(engine, slug: str) -> int:
+    """Render and cache every missing or stale entry in the given dictionary.
+
+    :param engine: the database engine to use.
+    :param slug: the dictionary to prebuild.
+    :return: the number of entries rendered.
+    """
+    with Session(engine) as session:
+        dictionary = session.query(db.Dictionary).filter_by(slug=slug).one()
+        dictionary_id = dictionary.id
+
+    current_version = version(slug)
+    renderer = get_renderer(slug)
+    entries = db.DictionaryEntry.__table__
+    cache = db.DictionaryEntryHtml.__table__
+    stale_entries = (
+        select(entries.c.id, entries.c.value)
+        .outerjoin(cache, cache.c.entry_id == entries.c.id)
+        .where(
+            (entries.c.dictionary_id == dictionary_id)
+            & or_(cache.c.version.is_(None), cache.c.version != current_version)
+        )
+        .order_by(entries.c.id)
+        .limit(BATCH_SIZE)
+    )
+
+    num_rendered = 0
+    for rows in batch_jobs.iter_batches(engine, stale_entries, entries.c.id):
+        items = [
+            {
+                "entry_id": row.id,
+                "version": current_version,
+                "html": renderer.transform(row.value),
+            }
+            for row in rows
+        ]
+        html_cache.replace_rows(engine, cache, cache.c.entry_id, items)
+
+        num_rendered += len(rows)
+        logging.info(f"{slug}: rendered {num_rendered} entries")
+    return num_rendered
@@ -0,0 +1,368 @@
+"""An in-memory index of dictionary keys for prefix and fuzzy search.
+
+Exact lookups go through the database, but prefix completion and fuzzy
+matching need to scan many keys at once. So for each dictionary, we load all
+of its SLP1 keys into a sorted array:
+
+- For prefix search, we bisect to the first key with the prefix and read
+  forward.
+- For fuzzy search within one edit, we generate every string one edit away
+  from the query and look each one up in a sorted array of key hashes. This
+  takes a few milliseconds no matter how large the index is.
+- For fuzzy search within more edits, we walk the sorted keys as if they were
+  a trie. Adjacent keys share a prefix, so we reuse the edit distance rows for
+  that prefix and skip every key under a prefix that is already too far from
+  the query. A full walk over a large index can take most of a second, so
+  callers can pass a deadline.
+
+We pack the keys into a single `bytes` blob with an `array` of offsets, and
+their hashes into another `array`. Unlike a list of strings, these objects
+have no per-key reference counts, so if we
+build the index before gunicorn forks its workers (see `wsgi.py` and
+`gunicorn.conf.py`), the workers share its memory pages copy-on-write.
+"""
+
+import bisect
+import heapq
+import itertools
+import logging
+import time
+from array import array
+from collections.abc import Sequence
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+
+import ambuda.database as db
+import ambuda.queries as q
+
+#: How long `suggest` may spend looking for keys more than one edit away, in
+#: seconds.
+SUGGEST_TIME_LIMIT = 0.005
+#: How long we trust an index before we check that its dictionary hasn't
+#: changed, in seconds.
+CHECK_INTERVAL = 30
+
+
+class _PackedStrings(Sequence):
+    """A compact, immutable sequence of strings."""
+
+    def __init__(self, strings: list[str]):
+        encoded = [s.encode("utf-8") for s in strings]
+        self._blob = b"".join(encoded)
+        self._offsets = array("I", itertools.accumulate(map(len, encoded), initial=0))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.raw(i).decode("utf-8")
+
+    def raw(self, i: int) -> bytes:
+        """Get the UTF-8 bytes of the `i`-th string."""
+        return self._blob[self._offsets[i] : self._offsets[i + 1]]
+
+    def skip_prefix(self, prefix: bytes, lo: int) -> int:
+        """Find the first index at or after `lo` that doesn't start with `prefix`.
+
+        The strings must be sorted, and the string just before `lo` must start
+        with `prefix`. Most prefixes cover only a few strings, so we gallop
+        forward from `lo` before we binary search.
+        """
+        n = len(self)
+        step = 1
+        while lo + step - 1 < n and self.raw(lo + step - 1).startswith(prefix):
+            lo += step
+            step *= 2
+        hi = min(lo + step - 1, n)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw(mid).startswith(prefix):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+def _next_row(row: list[int], char: str, query: str) -> list[int]:
+    """Extend a row of the Levenshtein matrix by one character."""
+    new_row = [row[0] + 1]
+    for j, query_char in enumerate(query, 1):
+        new_row.append(
+            min(new_row[j - 1] + 1, row[j] + 1, row[j - 1] + (query_char != char))
+        )
+    return new_row
+
+
+def _distance(a: str, b: str) -> int:
+    """Return the Levenshtein distance between `a` and `b`."""
+    row = list(range(len(b) + 1))
+    for char in a:
+        row = _next_row(row, char, b)
+    return row[-1]
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+class KeyIndex:
+    """A sorted index of dictionary keys."""
+
+    def __init__(self, keys: Iterable[str]):
+        unique_keys = sorted(set(keys))
+        self._keys = _PackedStrings(unique_keys)
+        # Hashes are salted per process, so this array is valid only in the
+        # process that built it (and in processes forked from it).
+        self._hashes = array("q", sorted(hash(k) for k in unique_keys))
+        self._alphabet = "".join(sorted(set().union(*unique_keys)))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        i = bisect.bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+    def _might_contain(self, key: str) -> bool:
+        """Check the hash array, which is much faster than `__contains__`."""
+        h = hash(key)
+        i = bisect.bisect_left(self._hashes, h)
+        return i < len(self._hashes) and self._hashes[i] == h
+
+    def _edits(self, query: str) -> set[str]:
+        """Return every string within one edit of `query`, using our alphabet."""
+        splits = [(query[:i], query[i:]) for i in range(len(query) + 1)]
+        edits = {query}
+        for left, right in splits:
+            if right:
+                edits.add(left + right[1:])
+                if len(right) > 1:
+                    edits.add(left + right[1] + right[0] + right[2:])
+                for char in self._alphabet:
+                    edits.add(left + char + right[1:])
+            for char in self._alphabet:
+                edits.add(left + char + right)
+        return edits
+
+    def prefix(self, prefix: str, limit: int = 10) -> list[str]:
+        """Return up to `limit` keys that start with `prefix`, in sorted order."""
+        keys = self._keys
+        results = []
+        i = bisect.bisect_left(keys, prefix)
+        while i < len(keys) and len(results) < limit:
+            key = keys[i]
+            if not key.startswith(prefix):
+                break
+            results.append(key)
+            i += 1
+        return results
+
+    def fuzzy(self, query: str, max_distance: int = 1, limit: int = 10) -> list[str]:
+        """Return up to `limit` keys within `max_distance` edits of `query`.
+
+        Results are sorted by edit distance, then alphabetically.
+        """
+        return [key for _, key in self.fuzzy_matches(query, max_distance)[:limit]]
+
+    def fuzzy_matches(
+        self, query: str, max_distance: int, deadline: Optional[float] = None
+    ) -> list[tuple[int, str]]:
+        """Return (distance, key) pairs within `max_distance` of `query`.
+
+        :param deadline: if set and `max_distance` is more than 1, stop
+            searching once `time.perf_counter()` passes this value and return
+            the matches found so far. Most typos come after the first letter,
+            so we search the keys that share the query's first letter before
+            the rest.
+        """
+        if max_distance <= 1:
+            return self._close_matches(query, max_distance)
+
+        keys = self._keys
+        first = query[:1]
+        lo = bisect.bisect_left(keys, first)
+        hi = keys.skip_prefix(first.encode("utf-8"), lo) if first else lo
+
+        matches = []
+        for start, end in ((lo, hi), (0, lo), (hi, len(keys))):
+            if not self._walk(query, max_distance, start, end, deadline, matches):
+                break
+        matches.sort()
+        return matches
+
+    def _close_matches(self, query: str, max_distance: int) -> list[tuple[int, str]]:
+        """Return all (distance, key) pairs within one edit of `query`."""
+        candidates = self._edits(query) if max_distance == 1 else {query}
+        matches = []
+        for candidate in candidates:
+            if self._might_contain(candidate) and candidate in self:
+                # A transposition is one edit for `_edits` but two for
+                # Levenshtein distance, so check each match.
+                distance = _distance(candidate, query)
+                if distance <= max_distance:
+                    matches.append((distance, candidate))
+        matches.sort()
+        return matches
+
+    def _walk(
+        self,
+        query: str,
+        max_distance: int,
+        start: int,
+        end: int,
+        deadline: Optional[float],
+        matches: list[tuple[int, str]],
+    ) -> bool:
+        """Add matches from `keys[start:end]` to `matches`.
+
+        :return: whether we searched the whole range before the deadline.
+        """
+        keys = self._keys
+        # rows[d] is the edit distance row for the first `d` characters of the
+        # current key.
+        rows = [list(range(len(query) + 1))]
+        prev_key = ""
+        i = start
+        while i < end:
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            key = keys[i]
+            depth = min(_common_prefix_length(prev_key, key), len(rows) - 1)
+            del rows[depth + 1 :]
+
+            too_far = False
+            for char in key[depth:]:
+                rows.append(_next_row(rows[-1], char, query))
+                if min(rows[-1]) > max_distance:
+                    too_far = True
+                    break
+
+            if too_far:
+                # Every key with this stem is also too far, so skip them all.
+                stem = key[: len(rows) - 1]
+                i = min(keys.skip_prefix(stem.encode("utf-8"), i + 1), end)
+                prev_key = stem
+                continue
+
+            distance = rows[-1][-1]
+            if distance <= max_distance:
+                matches.append((distance, key))
+            prev_key = key
+            i += 1
+        return True
+
+
+def max_distance_for(query: str) -> int:
+    """The largest edit distance we tolerate when fuzzy matching `query`."""
+    return 1 if len(query) < 6 else 2
+
+
+#: Maps each dictionary slug to the (ID, content hash) of the dictionary we
+#: built its index from, the index, and when we last checked the first two.
+_indices: dict[str, tuple[tuple, KeyIndex, float]] = {}
+
+
+def get_index(slug: str) -> Optional[KeyIndex]:
+    """Get the key index for the given dictionary, building it if necessary.
+
+    Reseeding a dictionary changes its ID and content hash, so every
+    `CHECK_INTERVAL` seconds we check both and rebuild the index if either has
+    changed.
+
+    :return: the index, or ``None`` if the dictionary doesn't exist.
+    """
+    now = time.monotonic()
+    cached = _indices.get(slug)
+    if cached is not None and now - cached[2] < CHECK_INTERVAL:
+        return cached[1]
+
+    session = q.get_session()
+    dictionary = (
+        session.query(db.Dictionary.id, db.Dictionary.content_hash)
+        .filter_by(slug=slug)
+        .first()
+    )
+    if dictionary is None:
+        return None
+
+    version = tuple(dictionary)
+    if cached is not None and cached[0] == version:
+        _indices[slug] = (version, cached[1], now)
+        return cached[1]
+
+    keys = session.execute(
+        select(db.DictionaryEntry.key)
+        .where(db.DictionaryEntry.dictionary_id == dictionary.id)
+        .distinct()
+    ).scalars()
+    index = KeyIndex(keys)
+    _indices[slug] = (version, index, now)
+    logging.info(f"{slug}: indexed {len(index)} keys")
+    return index
+
+
+def _get_indices(slugs: list[str]) -> list[KeyIndex]:
+    indices = (get_index(slug) for slug in slugs)
+    return [index for index in indices if index is not None]
+
+
+def invalidate(slug: Optional[str] = None):
+    """Discard the index for the given dictionary, or all indices if `slug` is
+    `None`.
+
+    Other processes notice a changed dictionary within `CHECK_INTERVAL`
+    seconds, but the process that changed it should call this so that it
+    notices at once.
+    """
+    if slug is None:
+        _indices.clear()
+    else:
+        _indices.pop(slug, None)
+
+
+def preload():
+    """Build the indices for all dictionaries ahead of time."""
+    session = q.get_session()
+    for slug in session.execute(select(db.Dictionary.slug)).scalars().all():
+        get_index(slug)
+
+
+def complete(slugs: list[str], prefix: str, limit: int = 10) -> list[str]:
+    """Complete `prefix` with keys from the given dictionaries.
+
+    Results are sorted and contain no duplicates.
+    """
+    results = []
+    merged = heapq.merge(*(i.prefix(prefix, limit) for i in _get_indices(slugs)))
+    for key, _ in itertools.groupby(merged):
+        results.append(key)
+        if len(results) == limit:
+            break
+    return results
+
+
+def suggest(slugs: list[str], query: str, limit: int = 10) -> list[str]:
+    """Suggest keys from the given dictionaries that are close to `query`.
+
+    We look for keys within one edit first. If there are none, we look for
+    more distant keys until `SUGGEST_TIME_LIMIT` seconds have passed, so on
+    large dictionaries we might miss some of these. Results are sorted by
+    edit distance, then alphabetically.
+    """
+    deadline = time.perf_counter() + SUGGEST_TIME_LIMIT
+    indices = _get_indices(slugs)
+    distances = {}
+    for max_distance in range(1, max_distance_for(query) + 1):
+        for index in indices:
+            for distance, key in index.fuzzy_matches(query, max_distance, deadline):
+                distances[key] = min(distance, distances.get(key, distance))
+        if distances:
+            break
+    matches = sorted((distance, key) for key, distance in distances.items())
+    return [key for _, key in matches[:limit]]
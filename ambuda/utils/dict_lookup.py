@@ -0,0 +1,87 @@
+"""Look up and render dictionary entries for many queries at once.
+
+Both the dictionary pages and the parse gloss API use these functions.
+"""
+
+from typing import Optional
+
+from flask import current_app
+
+import ambuda.queries as q
+from ambuda.utils import dict_artifact, dict_html, dict_utils, html_cache
+
+
+def fetch_entries_batch(
+    sources: list[str],
+    queries: list[str],
+    is_slp1: bool = False,
+    hashes: Optional[dict[str, Optional[str]]] = None,
+) -> dict[str, dict[str, list[str]]]:
+    """Look up many queries at once.
+
+    We convert and expand all queries together, fetch every matching entry
+    with a single query, and render each entry at most once.
+
+    :param sources: slugs of the dictionaries to search.
+    :param queries: queries in any script.
+    :param is_slp1: if true, the queries are already in SLP1 (e.g. lemmas from
+        our parse data), so skip script detection.
+    :param hashes: the result of `q.dictionary_hashes(sources)`, if the caller
+        already has it.
+    :return: a map from each query to a map from each known source to the
+        HTML of its matching entries. Unknown sources are omitted.
+    """
+    if hashes is None:
+        hashes = q.dictionary_hashes(sources)
+    sources = [s for s in sources if s in hashes]
+    if is_slp1:
+        base_keys = {x: dict_utils.standardize_key(x) for x in queries}
+    else:
+        base_keys = dict_utils.to_slp1_keys(queries)
+    expansions = dict_utils.expand_keys(base_keys.values(), sources)
+    all_keys = {k for search_keys in expansions.values() for k in search_keys}
+    # source -> (key, HTML) for each matching entry, in ID order
+    rendered = _artifact_entries(sources, list(all_keys), hashes)
+    stale_sources = [s for s in sources if s not in rendered]
+    if stale_sources:
+        session = q.get_session()
+        entries = q.dict_entries(stale_sources, list(all_keys))
+        for source_slug, source_entries in entries.items():
+            blobs = dict_html.entries_to_html(session, source_slug, source_entries)
+            rendered[source_slug] = [(e.key, b) for e, b in zip(source_entries, blobs)]
+        html_cache.save_cache(session)
+    rendered = {s: rendered[s] for s in sources}
+
+    results = {}
+    for query, base_key in base_keys.items():
+        search_keys = set(expansions[base_key])
+        results[query] = {
+            source_slug: [blob for key, blob in pairs if key in search_keys]
+            for source_slug, pairs in rendered.items()
+        }
+    return results
+
+
+def _artifact_entries(
+    sources: list[str], keys: list[str], hashes: dict[str, Optional[str]]
+) -> dict[str, list[tuple[str, str]]]:
+    """Get HTML from the prerendered artifact for each source it's current for.
+
+    :return: a map from each source we could serve to its (key, HTML) pairs.
+        Sources that the artifact doesn't cover are omitted.
+    """
+    artifact = dict_artifact.get_artifact(current_app.config["DICTIONARY_ARTIFACT_DIR"])
+    if artifact is None:
+        return {}
+    fresh_sources = [s for s in sources if artifact.is_fresh(s, hashes.get(s))]
+    if not fresh_sources:
+        return {}
+
+    rendered = {}
+    for source_slug, source_entries in q.dict_entry_keys(fresh_sources, keys).items():
+        blobs = [artifact.get(e.id) for e in source_entries]
+        # The artifact should have every entry, but if it doesn't, render the
+        # whole source from the database instead.
+        if None not in blobs:
+            rendered[source_slug] = [(e.key, b) for e, b in zip(source_entries, blobs)]
+    return rendered
@@ -0,0 +1,115 @@
+"""Reverse (English to Sanskrit) search over dictionary definitions.
+
+We index the plain text of each entry's definition, as rendered by the rule
+tables in `ambuda.utils.dict_html`. Each dictionary is a separate group in the
+index, so we can reindex one dictionary after we reseed it without touching
+the others.
+"""
+
+import html
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import ambuda.database as db
+from ambuda.utils import dict_html, fulltext
+
+#: The name of our full-text index.
+INDEX_NAME = "dictionary_definitions"
+#: Dictionaries whose definitions we index. These are the dictionaries whose
+#: definitions are in English or Hindi.
+SOURCES = ("mw", "apte", "apte-sh")
+#: The number of entries to index at one time.
+BATCH_SIZE = 1000
+
+_TAG_RE = re.compile(r"<[^>]*>")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@dataclass
+class SearchResult:
+    #: The slug of the dictionary that contains this entry.
+    source: str
+    #: The entry's headword, in SLP1.
+    key: str
+    #: An HTML excerpt of the definition with matches wrapped in `<mark>`.
+    snippet: str
+
+
+def definition_text(slug: str, value: str) -> str:
+    """Get the plain text of an entry's definition."""
+    html_blob = dict_html.render(slug, value)
+    plain = html.unescape(_TAG_RE.sub(" ", html_blob))
+    return _SPACE_RE.sub(" ", plain).strip()
+
+
+def index_dictionary(engine, slug: str) -> int:
+    """(Re)index all entries in the given dictionary.
+
+    :return: the number of entries indexed.
+    """
+    with Session(engine) as session:
+        dictionary = session.query(db.Dictionary).filter_by(slug=slug).one()
+        dictionary_id = dictionary.id
+
+    backend = fulltext.get_backend(engine)
+    entries = db.DictionaryEntry.__table__
+    num_indexed = 0
+    with engine.begin() as conn:
+        backend.ensure_index(conn, INDEX_NAME)
+        backend.delete_group(conn, INDEX_NAME, slug)
+
+        result = conn.execution_options(stream_results=True).execute(
+            select(entries.c.id, entries.c.value)
+            .where(entries.c.dictionary_id == dictionary_id)
+            .order_by(entries.c.id)
+        )
+        for rows in result.partitions(BATCH_SIZE):
+            documents = [
+                fulltext.Document(r.id, slug, definition_text(slug, r.value))
+                for r in rows
+            ]
+            backend.add(conn, INDEX_NAME, documents)
+            num_indexed += len(documents)
+            logging.info(f"{slug}: indexed {num_indexed} definitions")
+    return num_indexed
+
+
+def search(
+    engine, query: str, sources: Optional[list[str]] = None, limit: int = 50
+) -> list[SearchResult]:
+    """Find entries whose definitions contain every word in `query`.
+
+    Results are ranked by relevance.
+
+    :param sources: if set, search only these dictionaries.
+    """
+    backend = fulltext.get_backend(engine)
+    with engine.connect() as conn:
+        if not backend.has_index(conn, INDEX_NAME):
+            return []
+        hits = backend.search(conn, INDEX_NAME, query, limit=limit, groups=sources)
+        if not hits:
+            return []
+
+        entries = db.DictionaryEntry.__table__
+        dictionaries = db.Dictionary.__table__
+        rows = conn.execute(
+            select(entries.c.id, entries.c.key, dictionaries.c.slug)
+            .join(dictionaries, dictionaries.c.id == entries.c.dictionary_id)
+            .where(entries.c.id.in_([h.id for h in hits]))
+        ).all()
+
+    id_to_row = {r.id: r for r in rows}
+    # Skip hits for entries that have since been deleted.
+    return [
+        SearchResult(
+            source=id_to_row[h.id].slug, key=id_to_row[h.id].key, snippet=h.snippet
+        )
+        for h in hits
+        if h.id in id_to_row
+    ]
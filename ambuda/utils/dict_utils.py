@@ -1,6 +1,31 @@
 """Utils for serving and generating dictionary data."""
 
 import re
+from collections import defaultdict
+from typing import Collection, Iterable
+
+from indic_transliteration import detect, sanscript
+
+from ambuda.utils.transliteration import transliterate_many
+
+#: Maps each consonant to the nasal that an anusvāra becomes before it.
+_PARASAVARNA = {
+    consonant: nasal
+    for consonants, nasal in [
+        ("kKgGN", "N"),
+        ("cCjJY", "Y"),
+        ("wWqQR", "R"),
+        ("tTdDn", "n"),
+        ("pPbBm", "m"),
+    ]
+    for consonant in consonants
+}
+_ANUSVARA_RE = re.compile("M(.)")
+
+
+def _to_parasavarna(m: re.Match) -> str:
+    following = m.group(1)
+    return _PARASAVARNA.get(following, "M") + following
 
 
 def standardize_key(s: str) -> str:
@@ -10,33 +35,18 @@ def standardize_key(s: str) -> str:
     words. This function standardizes these conventions so that users have a better
     lookup experience.
 
-    Right now, the only standardization we apply is to convert an anusvāra followed
-    by a consonant to its appropriate parasavarṇa ("similar to the following") sound.
+    Right now, the only standardization we apply is to convert an anusvāra followed
+    by a consonant to its appropriate parasavarṇa ("similar to the following") sound.
 
     For examples, see the unit tests.
 
     :param s: the key to standardize.
     :return: a standardize key
     """
-    buf = list(s)
     # Always apply parasavaraNatva.
-    for m in re.finditer("(M)(.)", s):
-        anusvara_index = m.span(1)[0]
-        consonant = m.group(2)
-
-        res = "M"
-        if consonant in "kKgGN":
-            res = "N"
-        if consonant in "cCjJY":
-            res = "Y"
-        if consonant in "wWqQR":
-            res = "R"
-        if consonant in "tTdDn":
-            res = "n"
-        if consonant in "pPbBm":
-            res = "m"
-        buf[anusvara_index] = res
-    return "".join(buf)
+    if "M" not in s:
+        return s
+    return _ANUSVARA_RE.sub(_to_parasavarna, s)
 
 
 def expand_apte_keys(key: str) -> list[str]:
@@ -106,3 +116,48 @@ def expand_skd_keys(key: str) -> list[str]:
         elif last in "sr":
             keys.append(prefix + "H")
     return keys
+
+
+def to_slp1_keys(queries: Iterable[str]) -> dict[str, str]:
+    """Convert many user queries to standardized SLP1 keys at once.
+
+    We detect each query's script separately, but we transliterate all queries
+    in the same script as one batch, which is much cheaper than one call per
+    query. Duplicate queries are converted only once.
+
+    :param queries: queries in any script that `detect` understands.
+    :return: a map from each query to its key.
+    """
+    by_scheme = defaultdict(list)
+    for query in dict.fromkeys(queries):
+        by_scheme[detect.detect(query.strip())].append(query)
+
+    keys = {}
+    for scheme, group in by_scheme.items():
+        stripped = [query.strip() for query in group]
+        converted = transliterate_many(stripped, scheme, sanscript.SLP1)
+        for query, slp1_key in zip(group, converted):
+            keys[query] = standardize_key(slp1_key)
+    return keys
+
+
+def expand_keys(keys: Iterable[str], sources: Collection[str]) -> dict[str, list[str]]:
+    """Expand many standardized keys for the given dictionaries at once.
+
+    :param keys: keys from `standardize_key`. Duplicates are expanded once.
+    :param sources: slugs of the dictionaries we will search.
+    :return: a map from each key to its search keys, without duplicates.
+    """
+    use_apte = any(x in sources for x in {"apte", "apte-sh"})
+    use_skd = "shabdakalpadruma" in sources
+
+    expansions = {}
+    for key in dict.fromkeys(keys):
+        search_keys = [key]
+        if key:
+            if use_apte:
+                search_keys.extend(expand_apte_keys(key))
+            if use_skd:
+                search_keys.extend(expand_skd_keys(key))
+        expansions[key] = list(dict.fromkeys(search_keys))
+    return expansions
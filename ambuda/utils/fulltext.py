@@ -0,0 +1,380 @@
+"""Full-text search over the site's database.
+
+We support several backends, which we choose based on the database engine:
+
+- On SQLite, we use FTS5 virtual tables.
+- On Postgres, we use a `tsvector` column with a GIN index.
+- Otherwise (or if SQLite was built without FTS5), we use a simple in-memory
+  index. This backend is useful in tests, but it doesn't persist anything and
+  isn't shared between processes.
+
+Each backend stores *indices* by name. An index holds *documents*, each of
+which has an integer ID, a *group* (such as a dictionary slug), and some text.
+We replace documents one group at a time, so that reseeding one dictionary
+doesn't require rebuilding the index for every other dictionary.
+
+Indices live outside our SQLAlchemy models and are created on demand with
+`ensure_index`. All of their tables start with `fts_` so that alembic can
+ignore them (see `migrations/env.py`).
+"""
+
+import functools
+import html
+import math
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Iterable, NamedTuple, Optional
+
+import regex
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+#: Prefix for all full-text index tables.
+TABLE_PREFIX = "fts_"
+#: Marks the start of a match in a raw snippet.
+_START = "\x02"
+#: Marks the end of a match in a raw snippet.
+_END = "\x03"
+#: The approximate number of tokens in a snippet.
+SNIPPET_TOKENS = 12
+#: Letters, numbers, and combining marks. We include marks so that we don't
+#: split Devanagari words on their vowel signs.
+_TOKEN_RE = regex.compile(r"[\p{L}\p{N}\p{M}]+")
+
+
+class Document(NamedTuple):
+    #: A unique ID for this document, e.g. a `DictionaryEntry` ID.
+    id: int
+    #: The group this document belongs to, e.g. a dictionary slug.
+    group: str
+    #: The text to index.
+    text: str
+
+
+@dataclass
+class Hit:
+    #: The ID of the matching document.
+    id: int
+    #: The document's relevance. Higher is better.
+    score: float
+    #: An HTML excerpt of the document with matches wrapped in `<mark>`.
+    snippet: str
+
+
+def tokenize(s: str) -> list[str]:
+    """Split `s` into lowercase word tokens."""
+    return [m.casefold() for m in _TOKEN_RE.findall(s)]
+
+
+def _to_html_snippet(raw: str) -> str:
+    """Escape a raw snippet and convert its match markers to HTML."""
+    return html.escape(raw).replace(_START, "<mark>").replace(_END, "</mark>")
+
+
+def _table(name: str) -> str:
+    assert name.isidentifier(), name
+    return TABLE_PREFIX + name
+
+
+class Backend(ABC):
+    """Base class for full-text backends."""
+
+    @abstractmethod
+    def has_index(self, conn: Connection, name: str) -> bool:
+        """Return whether the index `name` exists."""
+
+    @abstractmethod
+    def ensure_index(self, conn: Connection, name: str):
+        """Create the index `name` if it doesn't exist."""
+
+    @abstractmethod
+    def delete_group(self, conn: Connection, name: str, group: str):
+        """Delete all documents in `group` from the index."""
+
+    @abstractmethod
+    def add(self, conn: Connection, name: str, documents: Iterable[Document]):
+        """Add documents to the index."""
+
+    @abstractmethod
+    def search(
+        self,
+        conn: Connection,
+        name: str,
+        query: str,
+        limit: int = 20,
+        groups: Optional[list[str]] = None,
+    ) -> list[Hit]:
+        """Return up to `limit` documents that contain every token in `query`.
+
+        :param groups: if set, return only documents in these groups.
+        """
+
+
+class SQLiteBackend(Backend):
+    """Full-text search with SQLite's FTS5 extension."""
+
+    def has_index(self, conn, name):
+        return bool(
+            conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :t"),
+                {"t": _table(name)},
+            ).first()
+        )
+
+    def ensure_index(self, conn, name):
+        # By default, FTS5 splits words on combining marks. Keep them instead
+        # so that we can index Devanagari.
+        conn.execute(
+            text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {_table(name)} "
+                "USING fts5(grp UNINDEXED, body, tokenize = "
+                "\"unicode61 remove_diacritics 2 categories 'L* N* Co M*'\")"
+            )
+        )
+
+    def delete_group(self, conn, name, group):
+        conn.execute(
+            text(f"DELETE FROM {_table(name)} WHERE grp = :grp"), {"grp": group}
+        )
+
+    def add(self, conn, name, documents):
+        items = [{"id": d.id, "grp": d.group, "body": d.text} for d in documents]
+        if items:
+            conn.execute(
+                text(
+                    f"INSERT INTO {_table(name)} (rowid, grp, body) "
+                    "VALUES (:id, :grp, :body)"
+                ),
+                items,
+            )
+
+    def search(self, conn, name, query, limit=20, groups=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        table = _table(name)
+        # Quote each token so that FTS5 doesn't parse it as an operator.
+        match = " ".join('"' + t.replace('"', '""') + '"' for t in tokens)
+        params = {"match": match, "limit": limit, "start": _START, "end": _END}
+        where = f"{table} MATCH :match"
+        if groups is not None:
+            group_params = {f"g{i}": g for i, g in enumerate(groups)}
+            params.update(group_params)
+            placeholders = ", ".join(f":{p}" for p in group_params) or "NULL"
+            where += f" AND grp IN ({placeholders})"
+
+        rows = conn.execute(
+            text(
+                f"SELECT rowid, bm25({table}) AS rank, "
+                f"snippet({table}, 1, :start, :end, '…', {SNIPPET_TOKENS}) "
+                f"FROM {table} WHERE {where} ORDER BY rank LIMIT :limit"
+            ),
+            params,
+        ).all()
+        # bm25() returns lower values for better matches.
+        return [Hit(id=r[0], score=-r[1], snippet=_to_html_snippet(r[2])) for r in rows]
+
+
+class PostgresBackend(Backend):
+    """Full-text search with Postgres's `tsvector` type."""
+
+    def has_index(self, conn, name):
+        return (
+            conn.execute(text("SELECT to_regclass(:t)"), {"t": _table(name)}).scalar()
+            is not None
+        )
+
+    def ensure_index(self, conn, name):
+        table = _table(name)
+        conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "id INTEGER PRIMARY KEY, grp TEXT NOT NULL, body TEXT NOT NULL, "
+                "tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED)"
+            )
+        )
+        conn.execute(
+            text(f"CREATE INDEX IF NOT EXISTS {table}_tsv ON {table} USING GIN (tsv)")
+        )
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {table}_grp ON {table} (grp)"))
+
+    def delete_group(self, conn, name, group):
+        conn.execute(
+            text(f"DELETE FROM {_table(name)} WHERE grp = :grp"), {"grp": group}
+        )
+
+    def add(self, conn, name, documents):
+        items = [{"id": d.id, "grp": d.group, "body": d.text} for d in documents]
+        if items:
+            conn.execute(
+                text(
+                    f"INSERT INTO {_table(name)} (id, grp, body) "
+                    "VALUES (:id, :grp, :body) ON CONFLICT (id) DO UPDATE "
+                    "SET grp = EXCLUDED.grp, body = EXCLUDED.body"
+                ),
+                items,
+            )
+
+    def search(self, conn, name, query, limit=20, groups=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        table = _table(name)
+        params = {
+            "query": " ".join(tokens),
+            "limit": limit,
+            "options": (
+                f"StartSel={_START}, StopSel={_END}, MaxWords={SNIPPET_TOKENS}, "
+                "MinWords=4"
+            ),
+        }
+        where = "tsv @@ q"
+        if groups is not None:
+            params["groups"] = list(groups)
+            where += " AND grp = ANY(:groups)"
+
+        rows = conn.execute(
+            text(
+                "SELECT id, ts_rank(tsv, q) AS rank, "
+                "ts_headline('simple', body, q, :options) "
+                f"FROM {table}, plainto_tsquery('simple', :query) AS q "
+                f"WHERE {where} ORDER BY rank DESC LIMIT :limit"
+            ),
+            params,
+        ).all()
+        return [Hit(id=r[0], score=r[1], snippet=_to_html_snippet(r[2])) for r in rows]
+
+
+class _MemoryIndex:
+    def __init__(self):
+        #: Maps document ID to its group and text.
+        self.documents: dict[int, tuple[str, str]] = {}
+        #: Maps document ID to its length in tokens.
+        self.lengths: dict[int, int] = {}
+        #: Maps token to {document ID: term frequency}.
+        self.postings: dict[str, dict[int, int]] = defaultdict(dict)
+
+    def remove(self, id: int):
+        _, body = self.documents.pop(id)
+        del self.lengths[id]
+        for token in set(tokenize(body)):
+            del self.postings[token][id]
+
+    def add(self, doc: Document):
+        if doc.id in self.documents:
+            self.remove(doc.id)
+        tokens = tokenize(doc.text)
+        self.documents[doc.id] = (doc.group, doc.text)
+        self.lengths[doc.id] = len(tokens)
+        for token, count in Counter(tokens).items():
+            self.postings[token][doc.id] = count
+
+
+class MemoryBackend(Backend):
+    """Full-text search with a pure-Python inverted index.
+
+    We rank results with BM25, which is also what FTS5 uses.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self.indices: dict[str, _MemoryIndex] = {}
+
+    def has_index(self, conn, name):
+        return name in self.indices
+
+    def ensure_index(self, conn, name):
+        self.indices.setdefault(name, _MemoryIndex())
+
+    def delete_group(self, conn, name, group):
+        index = self.indices[name]
+        ids = [id for id, (g, _) in index.documents.items() if g == group]
+        for id in ids:
+            index.remove(id)
+
+    def add(self, conn, name, documents):
+        index = self.indices[name]
+        for doc in documents:
+            index.add(doc)
+
+    def search(self, conn, name, query, limit=20, groups=None):
+        tokens = set(tokenize(query))
+        index = self.indices[name]
+        if not tokens or not index.documents:
+            return []
+
+        postings = [index.postings.get(t, {}) for t in tokens]
+        ids = set.intersection(*(set(p) for p in postings))
+        if groups is not None:
+            ids = {id for id in ids if index.documents[id][0] in groups}
+
+        num_docs = len(index.documents)
+        avg_length = sum(index.lengths.values()) / num_docs
+        scores = {}
+        for id in ids:
+            length_norm = 1 - self.b + self.b * index.lengths[id] / avg_length
+            score = 0.0
+            for p in postings:
+                idf = math.log(1 + (num_docs - len(p) + 0.5) / (len(p) + 0.5))
+                tf = p[id]
+                score += idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+            scores[id] = score
+
+        ranked = sorted(ids, key=lambda id: (-scores[id], id))[:limit]
+        return [
+            Hit(
+                id=id,
+                score=scores[id],
+                snippet=_to_html_snippet(_snippet(index.documents[id][1], tokens)),
+            )
+            for id in ranked
+        ]
+
+
+def _snippet(body: str, tokens: set[str]) -> str:
+    """Excerpt `body` around its first match and mark all matching tokens."""
+    matches = list(_TOKEN_RE.finditer(body))
+    first = next(
+        (i for i, m in enumerate(matches) if m.group().casefold() in tokens), 0
+    )
+    lo = max(0, first - SNIPPET_TOKENS // 4)
+    hi = min(len(matches), lo + SNIPPET_TOKENS)
+
+    buf = []
+    pos = 0
+    if lo > 0:
+        buf.append("…")
+        pos = matches[lo].start()
+    for m in matches[lo:hi]:
+        buf.append(body[pos : m.start()])
+        if m.group().casefold() in tokens:
+            buf.append(_START + m.group() + _END)
+        else:
+            buf.append(m.group())
+        pos = m.end()
+    buf.append("…" if hi < len(matches) else body[pos:])
+    return "".join(buf)
+
+
+def _has_fts5(engine: Engine) -> bool:
+    with engine.connect() as conn:
+        options = conn.execute(text("PRAGMA compile_options")).scalars().all()
+    return "ENABLE_FTS5" in options
+
+
+# functools.cache makes this return value a per-engine singleton, which
+# `MemoryBackend` relies on.
+@functools.cache
+def get_backend(engine: Engine) -> Backend:
+    """Get the full-text backend that best suits the given engine."""
+    dialect = engine.dialect.name
+    if dialect == "sqlite" and _has_fts5(engine):
+        return SQLiteBackend()
+    if dialect == "postgresql":
+        return PostgresBackend()
+    return MemoryBackend()
@@ -0,0 +1,61 @@
+"""Shared helpers for our tables of pre-rendered HTML.
+
+We cache three kinds of rendered output in the database:
+
+- dictionary entries (`ambuda.utils.dict_html`)
+- reader sections (`ambuda.utils.section_html`)
+- aligned parses (`ambuda.utils.parse_html`)
+
+Each cache follows the same pattern. A row records the version of the code
+and rule table that rendered it, and we re-render stale rows either at
+request time or in a batch job ahead of time. This module holds the parts of
+that pattern that don't depend on what we render.
+"""
+
+from sqlalchemy.exc import IntegrityError
+
+from ambuda.utils import xml
+
+#: Maps each rule table's ID to the table, the `xml.RENDER_VERSION` we
+#: fingerprinted it with, and its fingerprint. We store each table so that its
+#: ID can't be reused while it's in this cache.
+_fingerprints: dict[int, tuple[dict, int, str]] = {}
+
+
+def rules_version(transforms: dict) -> str:
+    """Get the version of output rendered with the given rule table.
+
+    Our rule tables are module-level constants, so we fingerprint each table
+    once per process.
+    """
+    cached = _fingerprints.get(id(transforms))
+    if cached is None or cached[0] is not transforms or cached[1] != xml.RENDER_VERSION:
+        cached = (transforms, xml.RENDER_VERSION, xml.fingerprint(transforms))
+        _fingerprints[id(transforms)] = cached
+    return cached[2]
+
+
+def save_cache(session):
+    """Commit any new or updated cache rows in the session.
+
+    If another request cached the same item first, we get an integrity error.
+    That's harmless, so we discard our copy.
+    """
+    if not (session.new or session.dirty):
+        return
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+
+
+def replace_rows(engine, table, key_column, items: list[dict]):
+    """Replace the cache rows for the given items in one transaction.
+
+    :param key_column: the column that identifies each item's row, e.g.
+        `entry_id`.
+    """
+    keys = [item[key_column.name] for item in items]
+    with engine.begin() as conn:
+        conn.execute(table.delete().where(key_column.in_(keys)))
+        conn.execute(table.insert(), items)
@@ -0,0 +1,103 @@
+"""HTTP caching for pages that change only when we reseed.
+
+Reader sections, parses, and dictionary entries are expensive to render but
+almost never change. For these pages, we build a strong ETag from the content
+hashes in `ambuda.utils.content_hash` and answer a matching `If-None-Match`
+header with "304 Not Modified" before we load any blocks or entries.
+
+A page also depends on our templates, the user's locale, and whether (and as
+whom) the user is logged in, so each ETag covers these too. Pages for
+logged-out users are public, so nginx or a CDN may cache them for
+`MAX_AGE` seconds. Pages for logged-in users are private and must be
+revalidated on each request.
+
+Typical usage::
+
+    etag = http_cache.make_etag(text.content_hash, ...)
+    if http_cache.is_fresh(etag):
+        return http_cache.not_modified(etag)
+    ...
+    return http_cache.add_headers(render_template(...), etag)
+"""
+
+import functools
+import hashlib
+from pathlib import Path
+from typing import Optional, Union
+
+from flask import Response, make_response, request
+from flask_babel import get_locale
+from flask_login import current_user
+
+#: How long shared caches may serve a public page before they revalidate it,
+#: in seconds.
+MAX_AGE = 60 * 60
+
+_TEMPLATE_DIR = Path(__file__).resolve().parents[1] / "templates"
+
+
+@functools.cache
+def _template_version() -> str:
+    """Hash our templates, which change only when we deploy."""
+    hasher = hashlib.sha256()
+    for path in sorted(_TEMPLATE_DIR.rglob("*.html")):
+        hasher.update(path.relative_to(_TEMPLATE_DIR).as_posix().encode("utf-8"))
+        hasher.update(path.read_bytes())
+    return hasher.hexdigest()
+
+
+def make_etag(*parts) -> Optional[str]:
+    """Create an ETag for the current request from the given content parts.
+
+    :param parts: strings that identify the page's content, such as content
+        hashes and slugs. A `None` part is a content hash that we haven't
+        computed yet.
+    :return: the ETag, or `None` if any content hash is missing. In that case,
+        the caller should render the page as usual without caching it.
+    """
+    if any(p is None for p in parts):
+        return None
+
+    hasher = hashlib.sha256()
+    user_id = current_user.get_id() if current_user.is_authenticated else ""
+    for part in (_template_version(), str(get_locale()), user_id, *parts):
+        data = part.encode("utf-8")
+        hasher.update(len(data).to_bytes(8, "big") + data)
+    return hasher.hexdigest()
+
+
+def is_fresh(etag: Optional[str]) -> bool:
+    """Return whether the client already has the current version of the page."""
+    return etag is not None and request.if_none_match.contains(etag)
+
+
+def _set_cache_control(resp: Response):
+    if current_user.is_authenticated:
+        resp.cache_control.private = True
+        resp.cache_control.no_cache = True
+    else:
+        resp.cache_control.public = True
+        resp.cache_control.max_age = MAX_AGE
+    resp.vary.add("Cookie")
+
+
+def not_modified(etag: str) -> Response:
+    """Create a "304 Not Modified" response for the given ETag."""
+    resp = Response(status=304)
+    resp.set_etag(etag)
+    _set_cache_control(resp)
+    return resp
+
+
+def add_headers(rv: Union[str, Response], etag: Optional[str]) -> Response:
+    """Add caching headers to a response.
+
+    :param rv: the response or a rendered template.
+    :param etag: the ETag from :func:`make_etag`. If `None`, we return `rv`
+        without caching headers.
+    """
+    resp = make_response(rv)
+    if etag is not None:
+        resp.set_etag(etag)
+        _set_cache_control(resp)
+    return resp
@@ -6,16 +6,28 @@ element boundaries and sandhi changes.
 """
 
 from dataclasses import dataclass
-from typing import Iterator
+from typing import Iterator, NamedTuple
 from xml.etree import ElementTree as ET
 
 from indic_transliteration import sanscript
 
 from ambuda.seed.utils.sandhi_utils import AC
+from ambuda.utils.transliteration import transliterate_many
 from ambuda.utils.word_parses import Token
 from ambuda.utils.xml import tei_xml, transform
 
 
+class Alignment(NamedTuple):
+    #: The block as HTML, with parse data on each word.
+    html: str
+    #: Whether we couldn't align the parse and showed it with
+    #: `create_backup_parse` instead.
+    is_backup: bool
+    #: The number of tokens left over after we aligned every word in the
+    #: text. If this isn't 0, the text and its parse don't quite match.
+    num_unused_tokens: int = 0
+
+
 @dataclass
 class Chunk:
     text: str
@@ -109,14 +121,24 @@ def get_padas_for_text(text: str, iter_tokens: Iterator) -> list[Chunk]:
 
 
 def transliterate_text_to(xml: ET.Element, source: str, dest: str):
+    # Collect all strings first so that we can transliterate them in one batch.
+    texts = []
+    tails = []
     for el in xml.iter("*"):
         if el.attrib.get("lang") == "en":
             continue
         if el.text:
-            el.text = sanscript.transliterate(el.text, source, dest)
+            texts.append(el)
         # Ignore xml.tail, since it's not within `xml`.
         if el.tail and el is not xml:
-            el.tail = sanscript.transliterate(el.tail, source, dest)
+            tails.append(el)
+
+    strings = [el.text for el in texts] + [el.tail for el in tails]
+    converted = iter(transliterate_many(strings, source, dest))
+    for el in texts:
+        el.text = next(converted)
+    for el in tails:
+        el.tail = next(converted)
 
 
 def create_backup_parse(tokens: list[Token]) -> ET.Element:
@@ -144,9 +166,10 @@ def create_backup_parse(tokens: list[Token]) -> ET.Element:
     return div
 
 
-def align_text_with_parse(xml_blob: str, tokens: list[Token]) -> str:
-    """Align text and parse data by storing parse data on its source XML blob."""
+def align(xml_blob: str, tokens: list[Token]) -> Alignment:
+    """Align text and parse data, and report whether alignment succeeded."""
     iter_tokens = iter(tokens)
+    is_backup = False
 
     xml = ET.fromstring(xml_blob)
     transliterate_text_to(xml, sanscript.DEVANAGARI, sanscript.SLP1)
@@ -165,6 +188,7 @@ def align_text_with_parse(xml_blob: str, tokens: list[Token]) -> str:
             # Doesn't line up -- bail out with a lower quality but still usable
             # parse.
             xml = create_backup_parse(tokens)
+            is_backup = True
             break
 
         # Modify source XML with the aligned token data.
@@ -176,5 +200,11 @@ def align_text_with_parse(xml_blob: str, tokens: list[Token]) -> str:
             el.tail = None
             el[:] += chunk_elems
 
+    num_unused_tokens = 0 if is_backup else sum(1 for _ in iter_tokens)
     transliterate_text_to(xml, sanscript.SLP1, sanscript.DEVANAGARI)
-    return transform(xml, tei_xml)
+    return Alignment(transform(xml, tei_xml), is_backup, num_unused_tokens)
+
+
+def align_text_with_parse(xml_blob: str, tokens: list[Token]) -> str:
+    """Align text and parse data by storing parse data on its source XML blob."""
+    return align(xml_blob, tokens).html
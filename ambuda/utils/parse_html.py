@@ -0,0 +1,224 @@
+"""Cache the alignment of each block with its parse data.
+
+To show a block's parse, we align its XML with its parse tokens (see
+`ambuda.utils.parse_alignment`). Alignment transliterates every text node
+twice and then transforms the result to HTML, but its output depends only on
+the block's XML and parse data. So we store the output in the `BlockParseHtml`
+table, keyed by a hash of both inputs and of :func:`version`.
+
+Views align a block the first time they see it, or after its inputs change. To
+align every parsed block ahead of time, use the `prebuild-parse-html` CLI
+command, which also reports how many blocks fell back to a backup parse. The
+`report-alignment` job (see `ambuda.utils.alignment_report`) fills this cache
+as well, since it aligns every block anyway.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+import ambuda.database as db
+import ambuda.queries as q
+from ambuda.utils import batch_jobs, html_cache, xml
+from ambuda.utils.parse_alignment import align
+from ambuda.utils.word_parses import block_tokens, extract_tokens, unpack_tokens
+
+#: Increase this whenever the output of `parse_alignment.align` changes for
+#: reasons that `xml.fingerprint` can't see, e.g. a new English parse table.
+ALIGNMENT_VERSION = 1
+#: The number of blocks to align in each batch when prebuilding.
+BATCH_SIZE = 200
+
+
+@dataclass
+class PrebuildStats:
+    #: The number of parsed blocks we checked.
+    num_blocks: int = 0
+    #: The number of blocks we aligned during this build.
+    num_aligned: int = 0
+    #: The number of blocks that fell back to a backup parse.
+    num_backup: int = 0
+    #: Total build time in seconds.
+    seconds: float = 0.0
+
+
+def version() -> str:
+    """Get the current version of our alignment output."""
+    return f"{html_cache.rules_version(xml.tei_xml)}:{ALIGNMENT_VERSION}"
+
+
+def cache_key(block_xml: str, parse_data: str, packed: Optional[bytes]) -> str:
+    """Hash the inputs to an alignment.
+
+    :param block_xml: the block's XML.
+    :param parse_data: the parse's `data` field. We read it only if the parse
+        has no packed tokens.
+    :param packed: the parse's `tokens` field, if any.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(version().encode("utf-8") + b"\x00")
+    hasher.update(block_xml.encode("utf-8") + b"\x00")
+    if packed is not None:
+        hasher.update(b"p" + packed)
+    else:
+        hasher.update(b"d" + parse_data.encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def aligned_html(session, block: db.TextBlock, parse: db.BlockParse) -> str:
+    """Get a block's aligned parse, using the cache where possible.
+
+    If the cache row is missing or stale, we align the block and add the new
+    row to the session. To save it, call `html_cache.save_cache`.
+    """
+    key = _key_for(block, parse)
+    cached = q.block_parse_html(block.id)
+    if cached is not None and cached.key == key:
+        return cached.html
+
+    alignment = align(block.xml, block_tokens(parse))
+    if cached is None:
+        session.add(
+            db.BlockParseHtml(
+                block_id=block.id,
+                key=key,
+                html=alignment.html,
+                is_backup=alignment.is_backup,
+            )
+        )
+    else:
+        cached.key = key
+        cached.html = alignment.html
+        cached.is_backup = alignment.is_backup
+    return alignment.html
+
+
+def _key_for(block: db.TextBlock, parse: db.BlockParse) -> str:
+    # `parse.data` is deferred, so don't touch it unless we have to.
+    if parse.tokens is not None:
+        return cache_key(block.xml, "", parse.tokens)
+    return cache_key(block.xml, parse.data, None)
+
+
+def align_batch(batch: list[tuple]) -> list[dict]:
+    """Align a batch of blocks and time each one. (Runs in a worker process.)
+
+    :param batch: (block ID, cache key, XML, parse data, packed tokens) tuples,
+        as yielded by :func:`iter_block_batches`.
+    :return: one dict per block with its `BlockParseHtml` fields and its
+        `BlockAlignment` stats.
+    """
+    results = []
+    for block_id, key, block_xml, data, packed in batch:
+        start = time.perf_counter()
+        tokens = unpack_tokens(packed) if packed is not None else extract_tokens(data)
+        alignment = align(block_xml, tokens)
+        results.append(
+            {
+                "block_id": block_id,
+                "key": key,
+                "html": alignment.html,
+                "is_backup": alignment.is_backup,
+                "num_tokens": len(tokens),
+                "num_unused_tokens": alignment.num_unused_tokens,
+                "seconds": time.perf_counter() - start,
+            }
+        )
+    return results
+
+
+def iter_block_batches(engine, text_id: Optional[int], only_stale: bool = True):
+    """Yield batches of parsed blocks to align.
+
+    :param text_id: the text to read. If `None`, read all texts.
+    :param only_stale: if true, skip blocks whose cached alignment is current.
+    :return: (stats, batch) pairs, one per page of parsed blocks. `stats`
+        counts every block in the page and the backup parses among the blocks
+        that we skipped; `batch` holds the blocks to align.
+    """
+    blocks = db.TextBlock.__table__
+    parses = db.BlockParse.__table__
+    cache = db.BlockParseHtml.__table__
+    query = (
+        select(
+            blocks.c.id,
+            blocks.c.xml,
+            parses.c.data,
+            parses.c.tokens,
+            cache.c.key,
+            cache.c.is_backup,
+        )
+        .join(parses, parses.c.block_id == blocks.c.id)
+        .outerjoin(cache, cache.c.block_id == blocks.c.id)
+        .order_by(blocks.c.id)
+        .limit(BATCH_SIZE)
+    )
+    if text_id is not None:
+        query = query.where(blocks.c.text_id == text_id)
+
+    for rows in batch_jobs.iter_batches(engine, query, blocks.c.id):
+        stats = PrebuildStats(num_blocks=len(rows))
+        batch = []
+        for row in rows:
+            key = cache_key(row.xml, row.data, row.tokens)
+            if only_stale and row.key == key:
+                stats.num_backup += row.is_backup
+            else:
+                batch.append((row.id, key, row.xml, row.data, row.tokens))
+        yield stats, batch
+
+
+def prebuild(engine, slug: Optional[str] = None, num_workers: int = 1) -> PrebuildStats:
+    """Align and cache every parsed block whose cached alignment is stale.
+
+    :param engine: the database engine to use.
+    :param slug: the text to prebuild. If `None`, prebuild all texts.
+    :param num_workers: the number of worker processes to align with.
+    """
+    start = time.time()
+    stats = PrebuildStats()
+
+    text_id = None
+    if slug is not None:
+        with engine.connect() as conn:
+            text_id = conn.execute(
+                select(db.Text.id).where(db.Text.slug == slug)
+            ).scalar_one()
+
+    work = iter_block_batches(engine, text_id)
+    if num_workers > 1:
+        with multiprocessing.Pool(num_workers) as pool:
+            results = batch_jobs.imap(pool, align_batch, work, num_workers)
+            _write(engine, results, stats)
+    else:
+        _write(engine, batch_jobs.imap(None, align_batch, work), stats)
+
+    stats.seconds = time.time() - start
+    return stats
+
+
+def write_cache(engine, aligned: list[dict]):
+    """Store the output of :func:`align_batch` in the `BlockParseHtml` table."""
+    cache = db.BlockParseHtml.__table__
+    items = [
+        {k: a[k] for k in ("block_id", "key", "html", "is_backup")} for a in aligned
+    ]
+    html_cache.replace_rows(engine, cache, cache.c.block_id, items)
+
+
+def _write(engine, results: Iterator[tuple], stats: PrebuildStats):
+    for checked, aligned in results:
+        stats.num_blocks += checked.num_blocks
+        stats.num_backup += checked.num_backup
+        if not aligned:
+            continue
+
+        write_cache(engine, aligned)
+        stats.num_aligned += len(aligned)
+        stats.num_backup += sum(a["is_backup"] for a in aligned)
+        logging.info(f"Aligned {stats.num_aligned} blocks")
@@ -0,0 +1,144 @@
+"""Pre-render reader sections as HTML.
+
+To show a section in the reader, we convert the XML of each of its blocks to
+HTML and serialize the result as JSON. Both steps are deterministic, so we do
+them ahead of time and store the result in the `TextSectionHtml` table.
+
+Like our other HTML caches (see `ambuda.utils.html_cache`), each stored row
+records the version of the rule table that created it, and we re-render
+missing and stale rows the next time we see them. Our seed scripts render each text after they add it. To
+render all sections ahead of time, use the `prebuild-section-html` CLI command.
+"""
+
+import json
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+import ambuda.database as db
+import ambuda.queries as q
+from ambuda.utils import batch_jobs, html_cache, xml
+
+#: The maximum number of sections to render in one transaction when prebuilding.
+BATCH_SIZE = 100
+
+
+def version() -> str:
+    """Get the current render version for text sections."""
+    return html_cache.rules_version(xml.tei_xml)
+
+
+def render_blocks(blocks: Iterable) -> str:
+    """Render blocks as the JSON `blocks` field of a reader payload.
+
+    :param blocks: `TextBlock`s (or rows with `slug` and `xml`), in order.
+    """
+    return json.dumps(
+        [{"slug": b.slug, "mula": xml.transform_text_block(b.xml)} for b in blocks]
+    )
+
+
+def make_payload(
+    text_title: str,
+    section_title: str,
+    blocks: str,
+    prev_url: Optional[str],
+    next_url: Optional[str],
+) -> str:
+    """Create the reader's JSON payload from pre-rendered blocks.
+
+    The result is the same as serializing a `reader.schema.Section`, but we
+    splice in `blocks` as is instead of decoding and encoding it again.
+
+    :param blocks: a JSON string from :func:`render_blocks`.
+    """
+    head = json.dumps({"text_title": text_title, "section_title": section_title})
+    tail = json.dumps({"prev_url": prev_url, "next_url": next_url})
+    return f'{head[:-1]}, "blocks": {blocks}, {tail[1:]}'
+
+
+def section_blocks(session, section_id: int, cached) -> Optional[str]:
+    """Get the rendered blocks for a section, using the cache where possible.
+
+    If the cache row is missing or stale, we render the section and add the
+    new row to the session. To save it, call `html_cache.save_cache`.
+
+    :param session: the session to add new cache rows to.
+    :param section_id: the ID of the section to render. We load its blocks
+        only if we need to render them.
+    :param cached: the section's `TextSectionHtml` row, if any.
+    :return: a JSON string from :func:`render_blocks`, or `None` if the
+        section doesn't exist.
+    """
+    current_version = version()
+    if cached is not None and cached.version == current_version:
+        return cached.blocks
+
+    section = q.section_with_blocks(section_id)
+    if section is None:
+        return None
+
+    blocks = render_blocks(section.blocks)
+    if cached is None:
+        session.add(
+            db.TextSectionHtml(
+                section_id=section_id, version=current_version, blocks=blocks
+            )
+        )
+    else:
+        cached.version = current_version
+        cached.blocks = blocks
+    return blocks
+
+
+def prebuild(engine, slug: str) -> int:
+    """Render and cache every missing or stale section in the given text.
+
+    :param engine: the database engine to use.
+    :param slug: the text to prebuild.
+    :return: the number of sections rendered.
+    """
+    with Session(engine) as session:
+        text = session.query(db.Text).filter_by(slug=slug).one()
+        text_id = text.id
+
+    current_version = version()
+    sections = db.TextSection.__table__
+    blocks = db.TextBlock.__table__
+    cache = db.TextSectionHtml.__table__
+    stale_sections = (
+        select(sections.c.id)
+        .outerjoin(cache, cache.c.section_id == sections.c.id)
+        .where(
+            (sections.c.text_id == text_id)
+            & or_(cache.c.version.is_(None), cache.c.version != current_version)
+        )
+        .order_by(sections.c.id)
+    )
+
+    num_rendered = 0
+    for rows in batch_jobs.iter_batches(
+        engine, stale_sections.limit(BATCH_SIZE), sections.c.id
+    ):
+        items = []
+        with engine.connect() as conn:
+            for row in rows:
+                block_rows = conn.execute(
+                    select(blocks.c.slug, blocks.c.xml)
+                    .where(blocks.c.section_id == row.id)
+                    .order_by(blocks.c.n)
+                ).all()
+                items.append(
+                    {
+                        "section_id": row.id,
+                        "version": current_version,
+                        "blocks": render_blocks(block_rows),
+                    }
+                )
+        html_cache.replace_rows(engine, cache, cache.c.section_id, items)
+
+        num_rendered += len(items)
+        logging.info(f"{slug}: rendered {num_rendered} sections")
+    return num_rendered
@@ -0,0 +1,122 @@
+"""Whole-text exports as plain text, TEI XML, and JSON lines.
+
+A text can have tens of thousands of blocks, so we never load all of them at
+once. Instead, we read blocks with a server-side cursor, convert each block as
+we go, and yield the output in chunks that a view can stream to the client.
+Peak memory depends on `BATCH_SIZE` and `CHUNK_SIZE`, not on the size of the
+text.
+"""
+
+import html
+import json
+from typing import Iterable, Iterator, NamedTuple
+from xml.etree import ElementTree as ET
+
+import ambuda.database as db
+import ambuda.queries as q
+
+#: The number of blocks to fetch from the database at one time.
+BATCH_SIZE = 500
+#: The approximate size of each chunk we yield, in characters.
+CHUNK_SIZE = 64 * 1024
+
+_TEI_NS = "http://www.tei-c.org/ns/1.0"
+
+
+class ExportBlock(NamedTuple):
+    #: The slug of the section that contains this block.
+    section_slug: str
+    #: The block's slug.
+    slug: str
+    #: The block's XML.
+    xml: str
+
+
+def iter_blocks(text_id: int) -> Iterator[ExportBlock]:
+    """Iterate over all blocks in a text, in order, without loading them all."""
+    session = q.get_session()
+    query = (
+        session.query(db.TextSection.slug, db.TextBlock.slug, db.TextBlock.xml)
+        .join(db.TextSection, db.TextSection.id == db.TextBlock.section_id)
+        .filter(db.TextBlock.text_id == text_id)
+        .order_by(db.TextBlock.section_id, db.TextBlock.n)
+        .yield_per(BATCH_SIZE)
+    )
+    for row in query:
+        yield ExportBlock(*row)
+
+
+def _chunked(pieces: Iterable[str]) -> Iterator[str]:
+    """Join small strings into chunks of roughly `CHUNK_SIZE` characters."""
+    buf = []
+    size = 0
+    for piece in pieces:
+        buf.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield "".join(buf)
+            buf = []
+            size = 0
+    if buf:
+        yield "".join(buf)
+
+
+def block_to_plain_text(blob: str) -> str:
+    """Convert a block's XML to plain text.
+
+    Each verse line (`<l>`) is on its own line. Other blocks are on one line.
+    """
+    xml = ET.fromstring(blob)
+    lines = ["".join(L.itertext()).strip() for L in xml.iter("l")]
+    if not lines:
+        lines = [" ".join("".join(xml.itertext()).split())]
+    return "\n".join(lines)
+
+
+def to_plain_text(blocks: Iterable[ExportBlock]) -> Iterator[str]:
+    """Export blocks as plain text, with a blank line after each block."""
+    return _chunked(block_to_plain_text(b.xml) + "\n\n" for b in blocks)
+
+
+def _iter_tei_xml(header: str, blocks: Iterable[ExportBlock]) -> Iterator[str]:
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield f'<TEI xmlns="{_TEI_NS}">\n'
+    if header:
+        yield header.strip() + "\n"
+    yield "<text>\n<body>\n"
+    section_slug = None
+    for block in blocks:
+        if block.section_slug != section_slug:
+            if section_slug is not None:
+                yield "</div>\n"
+            section_slug = block.section_slug
+            yield f'<div n="{html.escape(section_slug)}">\n'
+        yield block.xml + "\n"
+    if section_slug is not None:
+        yield "</div>\n"
+    yield "</body>\n</text>\n</TEI>\n"
+
+
+def to_tei_xml(header: str, blocks: Iterable[ExportBlock]) -> Iterator[str]:
+    """Export blocks as a TEI document with one `<div>` per section.
+
+    :param header: the text's `<teiHeader>` element, if any.
+    """
+    return _chunked(_iter_tei_xml(header, blocks))
+
+
+def to_json_lines(blocks: Iterable[ExportBlock]) -> Iterator[str]:
+    """Export blocks as JSON lines, with one object per block."""
+    return _chunked(
+        json.dumps(
+            {
+                "section": b.section_slug,
+                "block": b.slug,
+                "xml": b.xml,
+                "text": block_to_plain_text(b.xml),
+            },
+            ensure_ascii=False,
+        )
+        + "\n"
+        for b in blocks
+    )
@@ -0,0 +1,128 @@
+"""A per-process navigation index for texts.
+
+To show a section, the reader needs the text's title and the section's
+neighbors. Loading every `TextSection` of a text on each page turn is
+wasteful for large texts like the Mahabharata, which has thousands of
+sections. So for each text, we load its sections once into a compact index
+that finds a section and its neighbors by slug in constant time.
+
+Each worker keeps its own indices. Reseeding a text changes its ID and
+content hash, so on each lookup we read both from the `Text` row and rebuild
+the index if either has changed. That way no worker serves a stale index, or
+builds an ETag from a stale content hash, after another process reseeds the
+text.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+import cachetools
+from sqlalchemy import select
+
+import ambuda.database as db
+import ambuda.queries as q
+
+#: The maximum number of texts to index at one time.
+MAX_TEXTS = 256
+
+
+@dataclass(frozen=True)
+class SectionInfo:
+    """The fields of a `TextSection` that we need for navigation."""
+
+    id: int
+    slug: str
+    title: str
+    content_hash: Optional[str]
+
+
+@dataclass(frozen=True)
+class TextNav:
+    """A text's metadata and its sections in order."""
+
+    id: int
+    slug: str
+    title: str
+    content_hash: Optional[str]
+    sections: tuple[SectionInfo, ...]
+    #: Maps each section slug to its position in `sections`.
+    _positions: dict[str, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        positions = {s.slug: i for i, s in enumerate(self.sections)}
+        object.__setattr__(self, "_positions", positions)
+
+    def prev_cur_next(self, slug: str):
+        """Get the previous, current, and next sections for the given slug.
+
+        :raises KeyError: if the text has no section with this slug.
+        """
+        i = self._positions[slug]
+        prev = self.sections[i - 1] if i > 0 else None
+        next_ = self.sections[i + 1] if i + 1 < len(self.sections) else None
+        return prev, self.sections[i], next_
+
+
+_cache = cachetools.LRUCache(maxsize=MAX_TEXTS)
+_lock = threading.Lock()
+
+
+def _load(text_id: int) -> TextNav:
+    session = q.get_session()
+    text = session.execute(
+        select(db.Text.id, db.Text.slug, db.Text.title, db.Text.content_hash).where(
+            db.Text.id == text_id
+        )
+    ).one()
+    rows = session.execute(
+        select(
+            db.TextSection.id,
+            db.TextSection.slug,
+            db.TextSection.title,
+            db.TextSection.content_hash,
+        )
+        .where(db.TextSection.text_id == text.id)
+        .order_by(db.TextSection.id)
+    ).all()
+    return TextNav(
+        id=text.id,
+        slug=text.slug,
+        title=text.title,
+        content_hash=text.content_hash,
+        sections=tuple(SectionInfo(*r) for r in rows),
+    )
+
+
+def get(slug: str) -> Optional[TextNav]:
+    """Get the navigation index for the given text, building it if necessary.
+
+    :return: the index, or `None` if the text doesn't exist.
+    """
+    session = q.get_session()
+    text = session.execute(
+        select(db.Text.id, db.Text.content_hash).where(db.Text.slug == slug)
+    ).first()
+    if text is None:
+        return None
+
+    with _lock:
+        nav = _cache.get(slug)
+    if nav is None or (nav.id, nav.content_hash) != tuple(text):
+        nav = _load(text.id)
+        with _lock:
+            _cache[slug] = nav
+    return nav
+
+
+def invalidate(slug: Optional[str] = None):
+    """Discard the index for the given text, or all indices if `slug` is `None`.
+
+    Call this after changing a text's sections without changing its content
+    hash.
+    """
+    with _lock:
+        if slug is None:
+            _cache.clear()
+        else:
+            _cache.pop(slug, None)
@@ -0,0 +1,70 @@
+"""Precomputed metadata and statistics for texts.
+
+The texts index and a text's about page used to load the full `Text` row and
+parse its TEI header on every request. Instead, we compute the fields these
+pages need when we seed a text and store them in the `TextStats` table.
+
+Our seed scripts call :func:`update` after they add a text or its parse data.
+To update all texts, use the `update-text-stats` CLI command.
+"""
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import ambuda.database as db
+from ambuda.utils import xml
+from ambuda.utils.text_exports import block_to_plain_text
+
+#: The number of blocks to read at one time.
+BATCH_SIZE = 1000
+
+
+def update(engine, slug: str) -> dict:
+    """Compute and store the stats for the given text.
+
+    :return: the new stats, as a dict of `TextStats` columns.
+    """
+    with Session(engine) as session:
+        text = session.query(db.Text).filter_by(slug=slug).one()
+        text_id = text.id
+        header = xml.parse_tei_header(text.header)
+
+    sections = db.TextSection.__table__
+    blocks = db.TextBlock.__table__
+    parses = db.BlockParse.__table__
+    stats = db.TextStats.__table__
+    with engine.begin() as conn:
+        num_sections = conn.execute(
+            select(func.count())
+            .select_from(sections)
+            .where(sections.c.text_id == text_id)
+        ).scalar()
+        num_parsed_blocks = conn.execute(
+            select(func.count(parses.c.block_id.distinct())).where(
+                parses.c.text_id == text_id
+            )
+        ).scalar()
+
+        num_blocks = 0
+        num_characters = 0
+        result = conn.execution_options(stream_results=True).execute(
+            select(blocks.c.xml).where(blocks.c.text_id == text_id)
+        )
+        for rows in result.partitions(BATCH_SIZE):
+            num_blocks += len(rows)
+            num_characters += sum(len(block_to_plain_text(r.xml)) for r in rows)
+
+        values = {
+            "text_id": text_id,
+            "title": header.get("title"),
+            "author": header.get("author"),
+            "publisher": header.get("publisher"),
+            "availability": header.get("availability"),
+            "num_sections": num_sections,
+            "num_blocks": num_blocks,
+            "num_parsed_blocks": num_parsed_blocks,
+            "num_characters": num_characters,
+        }
+        conn.execute(stats.delete().where(stats.c.text_id == text_id))
+        conn.execute(stats.insert(), values)
+    return values
@@ -0,0 +1,137 @@
+"""Memoized transliteration.
+
+We transliterate the same short strings over and over: headwords, lemmas,
+section titles, and the words of popular verses. `sanscript.transliterate` is
+pure but slow, so we keep a bounded LRU cache of its results for each pair of
+schemes.
+
+Each cache counts its hits and misses. To inspect them, use :func:`cache_info`.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterable, NamedTuple
+
+from indic_transliteration import sanscript
+
+#: The maximum number of strings to cache for each pair of schemes.
+CACHE_SIZE = 8192
+
+#: `sanscript` has toggle and suspend markers (e.g. "##" and "<...>") whose
+#: effects carry across newlines. We can't batch strings that contain them.
+_UNSAFE_TO_BATCH = re.compile(r"[\n#<>\\]")
+
+_MISSING = object()
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class _LRUCache:
+    """A thread-safe LRU cache that counts its hits and misses."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return _MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+
+#: Maps each (source, dest) pair to its cache.
+_caches: dict[tuple[str, str], _LRUCache] = {}
+
+
+def _get_cache(source: str, dest: str) -> _LRUCache:
+    try:
+        return _caches[source, dest]
+    except KeyError:
+        return _caches.setdefault((source, dest), _LRUCache(CACHE_SIZE))
+
+
+def transliterate(s: str, source: str, dest: str) -> str:
+    """Transliterate `s` from `source` to `dest`, using the cache if possible.
+
+    :param source: a `sanscript` scheme name, e.g. `sanscript.SLP1`.
+    :param dest: a `sanscript` scheme name, e.g. `sanscript.DEVANAGARI`.
+    """
+    cache = _get_cache(source, dest)
+    value = cache.get(s)
+    if value is _MISSING:
+        value = sanscript.transliterate(s, source, dest)
+        cache.put(s, value)
+    return value
+
+
+def _transliterate_uncached(strings: list[str], source: str, dest: str) -> list[str]:
+    if len(strings) > 1 and not any(_UNSAFE_TO_BATCH.search(s) for s in strings):
+        # One call for all strings is much cheaper than one call per string.
+        converted = sanscript.transliterate("\n".join(strings), source, dest)
+        results = converted.split("\n")
+        if len(results) == len(strings):
+            return results
+    return [sanscript.transliterate(s, source, dest) for s in strings]
+
+
+def transliterate_many(strings: Iterable[str], source: str, dest: str) -> list[str]:
+    """Transliterate many strings at once.
+
+    We look up each distinct string in the cache once, then convert all of the
+    misses with a single `sanscript` call.
+
+    :return: the transliterated strings, in the same order as `strings`.
+    """
+    strings = list(strings)
+    cache = _get_cache(source, dest)
+    results = {}
+    misses = []
+    for s in dict.fromkeys(strings):
+        value = cache.get(s)
+        if value is _MISSING:
+            misses.append(s)
+        else:
+            results[s] = value
+
+    for s, value in zip(misses, _transliterate_uncached(misses, source, dest)):
+        cache.put(s, value)
+        results[s] = value
+    return [results[s] for s in strings]
+
+
+def cache_info() -> dict[tuple[str, str], CacheInfo]:
+    """Get statistics for the cache of each (source, dest) pair we've seen."""
+    return {pair: cache.info() for pair, cache in _caches.items()}
+
+
+def cache_clear():
+    """Discard all caches, along with their counters.
+
+    New caches use the current value of `CACHE_SIZE`.
+    """
+    _caches.clear()
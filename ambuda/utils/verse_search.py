@@ -0,0 +1,282 @@
+"""Full-text search over the blocks of our texts.
+
+We index the plain text of each block once, when we seed its text:
+
+1. We extract the block's text from its XML and transliterate it to SLP1.
+2. We normalize each word with :func:`normalize_key`, which follows
+   `make_block_key` in `ambuda.scripts.analysis.dcs_utils`: we drop visarga,
+   punctuation, and digits, and we treat all nasals as anusvara. This way,
+   "saMjaya" matches "sañjaya" and "rAmaH" matches "rAma".
+3. We store the normalized words in two indices: one of whole words, and one
+   of the character trigrams in each word. The trigram index finds words
+   inside compounds, e.g. "Darma" in "Darmakzetre".
+
+Full-text backends fold case, but SLP1 is case-sensitive ("a" and "A" are
+different vowels). So before indexing, we encode each uppercase letter as its
+lowercase form followed by "1". Normalized keys have no digits, so this
+encoding is unambiguous.
+
+Each text is a separate group in both indices, so we can reindex one text after
+we reseed it without touching the others. Queries run against the configured
+database and need no other service.
+"""
+
+import html
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from indic_transliteration import detect, sanscript
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import ambuda.database as db
+from ambuda.utils import fulltext, transliteration
+from ambuda.utils.text_exports import block_to_plain_text
+
+#: The name of our whole-word index.
+WORD_INDEX = "text_block_words"
+#: The name of our trigram index.
+NGRAM_INDEX = "text_block_ngrams"
+#: The number of blocks to index at one time.
+BATCH_SIZE = 1000
+#: The number of trigram candidates to check for each result we want.
+NGRAM_CANDIDATES_PER_RESULT = 5
+#: The maximum number of words in a snippet.
+SNIPPET_WORDS = 40
+
+_UPPER_RE = re.compile(r"[A-Z]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@dataclass
+class SearchResult:
+    #: The slug of the text that contains this block.
+    text_slug: str
+    #: The slug of the section that contains this block.
+    section_slug: str
+    #: The block's slug.
+    block_slug: str
+    #: An HTML excerpt of the block with matching words wrapped in `<mark>`.
+    snippet: str
+
+
+def normalize_key(slp1: str) -> str:
+    """Normalize an SLP1 string for matching.
+
+    This follows `make_block_key` in `ambuda.scripts.analysis.dcs_utils`.
+    """
+    # Keep letters, ignoring H due to common typos in the source text.
+    key = re.sub(r"([^a-zA-GI-Z])", "", slp1)
+    # Normalize inconsistent anusvara/parasavarna usage
+    key = re.sub("[NYRnm]", "M", key)
+    # Normalize certain double consonants
+    key = re.sub("tt", "t", key)
+    return key
+
+
+def _units(key: str) -> list[str]:
+    """Split a normalized key into case-safe units, one per SLP1 letter."""
+    return [c.lower() + "1" if c.isupper() else c for c in key]
+
+
+def _encode(key: str) -> str:
+    """Encode a normalized key so that it survives case folding."""
+    return _UPPER_RE.sub(lambda m: m.group().lower() + "1", key)
+
+
+def _trigrams(key: str) -> list[str]:
+    units = _units(key)
+    return ["".join(units[i : i + 3]) for i in range(len(units) - 2)]
+
+
+def _block_words(blob: str) -> list[tuple[str, str]]:
+    """Split a block into (display word, normalized key) pairs.
+
+    Words whose keys are empty, such as dandas and verse numbers, have an
+    empty key.
+    """
+    words = _SPACE_RE.split(block_to_plain_text(blob).strip())
+    slp1_words = transliteration.transliterate_many(
+        words, sanscript.DEVANAGARI, sanscript.SLP1
+    )
+    return [(w, normalize_key(s)) for w, s in zip(words, slp1_words)]
+
+
+def _documents(rows, group: str):
+    word_docs = []
+    ngram_docs = []
+    for row in rows:
+        keys = [key for _, key in _block_words(row.xml) if key]
+        word_docs.append(
+            fulltext.Document(row.id, group, " ".join(_encode(k) for k in keys))
+        )
+        ngram_docs.append(
+            fulltext.Document(
+                row.id, group, " ".join(t for k in keys for t in _trigrams(k))
+            )
+        )
+    return word_docs, ngram_docs
+
+
+def index_text(engine, slug: str) -> int:
+    """(Re)index all blocks in the given text.
+
+    :return: the number of blocks indexed.
+    """
+    with Session(engine) as session:
+        text = session.query(db.Text).filter_by(slug=slug).one()
+        text_id = text.id
+
+    backend = fulltext.get_backend(engine)
+    blocks = db.TextBlock.__table__
+    num_indexed = 0
+    with engine.begin() as conn:
+        for name in (WORD_INDEX, NGRAM_INDEX):
+            backend.ensure_index(conn, name)
+            backend.delete_group(conn, name, slug)
+
+        result = conn.execution_options(stream_results=True).execute(
+            select(blocks.c.id, blocks.c.xml)
+            .where(blocks.c.text_id == text_id)
+            .order_by(blocks.c.id)
+        )
+        for rows in result.partitions(BATCH_SIZE):
+            word_docs, ngram_docs = _documents(rows, slug)
+            backend.add(conn, WORD_INDEX, word_docs)
+            backend.add(conn, NGRAM_INDEX, ngram_docs)
+            num_indexed += len(rows)
+            logging.info(f"{slug}: indexed {num_indexed} blocks")
+    return num_indexed
+
+
+def delete_text(engine, slug: str):
+    """Remove all blocks in the given text from the index."""
+    backend = fulltext.get_backend(engine)
+    with engine.begin() as conn:
+        for name in (WORD_INDEX, NGRAM_INDEX):
+            backend.ensure_index(conn, name)
+            backend.delete_group(conn, name, slug)
+
+
+def query_keys(query: str) -> list[str]:
+    """Convert a query in any script to a list of normalized SLP1 keys."""
+    query = query.strip()
+    if not query:
+        return []
+    scheme = detect.detect(query)
+    slp1 = transliteration.transliterate(query, scheme, sanscript.SLP1)
+    keys = (normalize_key(w) for w in slp1.split())
+    return [k for k in keys if k]
+
+
+def _snippet(blob: str, is_match) -> str:
+    """Excerpt a block's text and mark all matching words."""
+    words = _block_words(blob)
+    first = next((i for i, (_, key) in enumerate(words) if is_match(key)), 0)
+    lo = max(0, first - SNIPPET_WORDS // 4)
+    hi = min(len(words), lo + SNIPPET_WORDS)
+
+    buf = ["…"] if lo > 0 else []
+    for word, key in words[lo:hi]:
+        if is_match(key):
+            buf.append(f"<mark>{html.escape(word)}</mark>")
+        else:
+            buf.append(html.escape(word))
+    if hi < len(words):
+        buf.append("…")
+    return " ".join(buf)
+
+
+def search(
+    engine, query: str, text_slugs: Optional[list[str]] = None, limit: int = 20
+) -> list[SearchResult]:
+    """Find blocks that contain every word in `query`.
+
+    Blocks that contain each word as a whole word come first, ranked by
+    relevance. If there are fewer than `limit` such blocks, we add blocks
+    that contain each word inside some longer word.
+
+    :param query: a query in any script that `detect` understands.
+    :param text_slugs: if set, search only these texts.
+    """
+    keys = query_keys(query)
+    if not keys:
+        return []
+
+    backend = fulltext.get_backend(engine)
+    with engine.connect() as conn:
+        if not backend.has_index(conn, WORD_INDEX):
+            return []
+
+        word_query = " ".join(_encode(k) for k in keys)
+        hits = backend.search(conn, WORD_INDEX, word_query, limit, text_slugs)
+        ids = [h.id for h in hits]
+
+        ngram_ids = []
+        # Words shorter than three letters have no trigrams, so they can only
+        # match whole words.
+        if len(ids) < limit and all(len(_units(k)) >= 3 for k in keys):
+            trigrams = [t for k in keys for t in _trigrams(k)]
+            candidates = backend.search(
+                conn,
+                NGRAM_INDEX,
+                " ".join(trigrams),
+                limit * NGRAM_CANDIDATES_PER_RESULT,
+                text_slugs,
+            )
+            seen = set(ids)
+            ngram_ids = [h.id for h in candidates if h.id not in seen]
+
+        rows = _load_blocks(conn, ids + ngram_ids)
+
+    def contains_a_key(word: str) -> bool:
+        return any(k in word for k in keys)
+
+    results = []
+    for id in ids:
+        if id in rows:
+            results.append(_make_result(rows[id], lambda key: key in keys))
+
+    # Trigrams can match across words, so check each candidate's words.
+    for id in ngram_ids:
+        if len(results) >= limit:
+            break
+        if id not in rows:
+            continue
+        words = [key for _, key in _block_words(rows[id].xml)]
+        if all(any(k in w for w in words) for k in keys):
+            results.append(_make_result(rows[id], contains_a_key))
+    return results
+
+
+def _load_blocks(conn, ids: list[int]) -> dict:
+    if not ids:
+        return {}
+    blocks = db.TextBlock.__table__
+    sections = db.TextSection.__table__
+    texts = db.Text.__table__
+    rows = conn.execute(
+        select(
+            blocks.c.id,
+            blocks.c.slug,
+            blocks.c.xml,
+            sections.c.slug.label("section"),
+            texts.c.slug.label("text"),
+        )
+        .join(sections, sections.c.id == blocks.c.section_id)
+        .join(texts, texts.c.id == blocks.c.text_id)
+        .where(blocks.c.id.in_(ids))
+    ).all()
+    # Skip hits for blocks that have since been deleted.
+    return {r.id: r for r in rows}
+
+
+def _make_result(row, is_match) -> SearchResult:
+    return SearchResult(
+        text_slug=row.text,
+        section_slug=row.section,
+        block_slug=row.slug,
+        snippet=_snippet(row.xml, is_match),
+    )
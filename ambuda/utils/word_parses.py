@@ -5,6 +5,8 @@ This module is quite sloppy and will likely change in the future.
 FIXME: add i18n support
 """
 
+import functools
+import struct
 from dataclasses import dataclass
 
 
@@ -126,3 +128,140 @@ def extract_tokens(blob: str) -> list[Token]:
         )
         rows.append(token)
     return rows
+
+
+# Packed parse data
+# -----------------
+#
+# Splitting and reading a TSV blob for every request is wasteful, so we also
+# store each block's tokens in a packed binary form (`BlockParse.tokens`):
+#
+# - a header with a format version and the number of tokens;
+# - one fixed-width record per token, whose bytes are small-integer codes for
+#   the token's part of speech, gender, case, person, number, and lakara, plus
+#   a flag byte;
+# - each token's form and lemma as NUL-separated UTF-8 strings.
+#
+# Code 0 means that the field is absent. Otherwise, a code is an index into the
+# field's code table below, which we derive from the tables above. Since we
+# append new values to these tables rather than reorder them, old data stays
+# valid.
+#
+# If we can't rebuild a token's raw parse from its codes, e.g. because it uses
+# a value we don't know, we set `_RAW` and store the raw parse as a third
+# string for that token.
+
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<BI")
+_RECORD = struct.Struct("<7B")
+
+#: (key, code table) for each field, in the order we write raw parses.
+_FIELDS = (
+    ("pos", (None, *POS)),
+    ("g", (None, *GENDERS)),
+    ("c", (None, *CASES)),
+    ("p", (None, *PERSONS)),
+    ("n", (None, *NUMBERS)),
+    ("l", (None, *LAKARAS)),
+)
+_CODES = [{v: i for i, v in enumerate(table) if v is not None} for _, table in _FIELDS]
+
+#: The token is part of a compound ("comp=y").
+_COMPOUNDED = 0x1
+#: The token's raw parse is stored as a string.
+_RAW = 0x2
+
+
+def _raw_parse(codes: tuple[int, ...], flags: int) -> str:
+    fields = [
+        f"{key}={table[code]}" for (key, table), code in zip(_FIELDS, codes) if code
+    ]
+    if flags & _COMPOUNDED:
+        fields.append("comp=y")
+    return ",".join(fields)
+
+
+def _encode_parse(parse: str) -> tuple[tuple[int, ...], int]:
+    """Encode a raw parse as field codes and flags."""
+    fields = dict(field.split("=") for field in parse.split(","))
+    flags = _COMPOUNDED if fields.pop("comp", None) == "y" else 0
+    try:
+        codes = tuple(
+            _CODES[i][fields.pop(key)] if key in fields else 0
+            for i, (key, _) in enumerate(_FIELDS)
+        )
+    except KeyError:
+        return (0,) * len(_FIELDS), _RAW
+    if fields or _raw_parse(codes, flags) != parse:
+        return (0,) * len(_FIELDS), _RAW
+    return codes, flags
+
+
+@functools.cache
+def _decode_parse(codes: tuple[int, ...], flags: int) -> tuple[str, str]:
+    """Decode field codes and flags as a (raw parse, English parse) pair.
+
+    There are few distinct combinations of codes, so we cache the result.
+    """
+    raw = _raw_parse(codes, flags)
+    return raw, readable_parse(raw)
+
+
+def pack_tokens(blob: str) -> bytes:
+    """Pack the parse data in `blob` for `BlockParse.tokens`."""
+    records = []
+    strings = []
+    lines = blob.splitlines()
+    for line in lines:
+        form, lemma, parse = line.split("\t")
+        codes, flags = _encode_parse(parse)
+        records.append(_RECORD.pack(*codes, flags))
+        strings.extend((form, lemma))
+        if flags & _RAW:
+            strings.append(parse)
+    return (
+        _HEADER.pack(_FORMAT_VERSION, len(lines))
+        + b"".join(records)
+        + "\0".join(strings).encode("utf-8")
+    )
+
+
+def unpack_tokens(packed: bytes) -> list[Token]:
+    """Unpack data from `pack_tokens`."""
+    version, num_tokens = _HEADER.unpack_from(packed)
+    if version != _FORMAT_VERSION:
+        raise ValueError(f"Unknown packed parse version {version}")
+
+    start = _HEADER.size
+    end = start + num_tokens * _RECORD.size
+    strings = iter(packed[end:].decode("utf-8").split("\0"))
+    tokens = []
+    for *codes, flags in _RECORD.iter_unpack(packed[start:end]):
+        form = next(strings)
+        lemma = next(strings)
+        if flags & _RAW:
+            raw_parse = next(strings)
+            en_parse = readable_parse(raw_parse)
+        else:
+            raw_parse, en_parse = _decode_parse(tuple(codes), flags)
+        tokens.append(
+            Token(
+                form,
+                lemma,
+                raw_parse=raw_parse,
+                en_parse=en_parse,
+                is_compounded="compounded" in en_parse,
+            )
+        )
+    return tokens
+
+
+def block_tokens(parse) -> list[Token]:
+    """Get the tokens for a `BlockParse`, preferring its packed form.
+
+    Parses that we imported before we added `BlockParse.tokens` have only
+    their raw data, so we fall back to parsing it.
+    """
+    if parse.tokens is not None:
+        return unpack_tokens(parse.tokens)
+    return extract_tokens(parse.data)
@@ -20,18 +20,44 @@ document, so we handle them with different functions.
 Performance
 -----------
 In Python 3, `ElementTree` uses the C implementation by default, so the
-performance penalty for this work is minimal. In the future, we can also cache
-or pre-build common requests.
+performance penalty for this work is minimal. Since a transform's output changes
+only when its input or its rule table changes, callers can also cache that
+output and use :func:`fingerprint` to tell when the cache is stale. If you
+change how rules are applied, bump `RENDER_VERSION` so that caches rebuild.
+
+Before we apply a rule table, we compile it into a table of simple operations
+(see :func:`compile_rules`). Most rules just rename an element and replace its
+attributes with a fixed dict, so `transform` handles these inline instead of
+calling a Python function for each element. Serializing the result is often
+slower than the transform itself, so we serialize straight to `str`. To measure
+this, run `python -m ambuda.scripts.benchmarks.xml_transform`.
+
+Backends
+--------
+`transform` builds the whole tree before it applies any rules. For large
+blobs, we can instead apply the same rules to a stream of parser events and
+write HTML as we go (see :func:`stream_transform`). The tree-based transform is
+our reference implementation, and the streaming transform must match its
+output exactly. Use :func:`set_backend` to choose which backend the
+`transform_*` functions use.
 """
 
+import hashlib
 from dataclasses import dataclass
 from typing import Callable, NewType, Optional
 from xml.etree import ElementTree as ET
 
 from indic_transliteration import sanscript
 
+from ambuda.utils.transliteration import transliterate
+
 Attributes = NewType("Attributes", dict[str, str])
 
+#: Increase this whenever a transform's output changes for reasons that the
+#: rule tables themselves can't show, e.g. a change to `Rule.__call__`,
+#: `sanskrit_text`, or the compiled dispatcher.
+RENDER_VERSION = 1
+
 
 @dataclass
 class Rule:
@@ -60,29 +86,44 @@ class Rule:
                 el.text = (el.text or "") + self.text_after
 
 
-def _overwrite(new_attrib: Attributes) -> Callable:
+@dataclass
+class _Overwrite:
     """Remove the element's existing attributes and use `new_attrib` instead."""
 
-    def inner(_: Attributes) -> Attributes:
-        return new_attrib
+    new_attrib: Attributes
 
-    return inner
+    def __call__(self, _: Attributes) -> Attributes:
+        return self.new_attrib
 
 
-def _rename(mapping: dict[str, str]) -> Callable:
+@dataclass
+class _Rename:
     """Rename the element's existing attributes.
 
     Attributes not defined in the mapping are removed from the output.
     """
 
-    def inner(old_attrib: Attributes) -> Attributes:
+    mapping: dict[str, str]
+
+    def __call__(self, old_attrib: Attributes) -> Attributes:
         new_attrib = {}
-        for k, v in mapping.items():
+        for k, v in self.mapping.items():
             if k in old_attrib:
                 new_attrib[v] = old_attrib[k]
         return new_attrib
 
-    return inner
+
+def _overwrite(new_attrib: Attributes) -> Callable:
+    """Remove the element's existing attributes and use `new_attrib` instead."""
+    return _Overwrite(new_attrib)
+
+
+def _rename(mapping: dict[str, str]) -> Callable:
+    """Rename the element's existing attributes.
+
+    Attributes not defined in the mapping are removed from the output.
+    """
+    return _Rename(mapping)
 
 
 def _delete(xml: ET.Element):
@@ -102,7 +143,7 @@ def text(before="", after="") -> Rule:
 
 def sanskrit_text(xml: ET.Element):
     """Transliterate inline elements in-place."""
-    t = sanscript.transliterate
+    t = transliterate
     xml.tag = "span"
     xml.attrib = {"lang": "sa"}
     for el in xml.iter("*"):
@@ -293,46 +334,443 @@ tei_xml = {
 }
 
 
-def transform(xml: ET.Element, transforms: dict[str, Rule]) -> str:
+# Operation codes for compiled rules. For details, see `compile_rules`.
+_HIDE = 0
+_SET = 1
+_RENAME = 2
+_DELETE = 3
+_CALL = 4
+
+
+def _compile_rule(rule) -> tuple:
+    if rule is None:
+        return (_HIDE,)
+    if rule is _delete:
+        return (_DELETE,)
+    if isinstance(rule, Rule):
+        if isinstance(rule.attrib_fn, _Overwrite):
+            return (
+                _SET,
+                rule.tag,
+                rule.attrib_fn.new_attrib,
+                rule.text_before,
+                rule.text_after,
+            )
+        if isinstance(rule.attrib_fn, _Rename):
+            return (
+                _RENAME,
+                rule.tag,
+                rule.attrib_fn.mapping,
+                rule.text_before,
+                rule.text_after,
+            )
+    return (_CALL, rule)
+
+
+def compile_rules(transforms: dict[str, Rule]) -> dict[str, tuple]:
+    """Compile a rule table into a table of operations for `transform`.
+
+    Each operation is a tuple whose first item is an operation code:
+
+    - `_HIDE`: hide the element's tag and text but keep its tail and children.
+    - `_SET`: (tag, attrib, text_before, text_after). Rename the element and
+      replace its attributes with `attrib`.
+    - `_RENAME`: like `_SET`, but rename attributes with a mapping.
+    - `_DELETE`: delete the element and all of its content.
+    - `_CALL`: (fn,). Call `fn` on the element.
+
+    The output is exactly what applying each rule directly would produce.
+    """
+    return {tag: _compile_rule(rule) for tag, rule in transforms.items()}
+
+
+#: Compiled rule tables, keyed by table ID. We store each table alongside its
+#: compiled form so that its ID can't be reused while it's in this cache.
+_compiled_tables = {}
+#: The maximum number of compiled tables to keep. Our own tables are
+#: module-level constants, so this limit matters only for ad hoc tables.
+_MAX_COMPILED_TABLES = 64
+
+
+def _get_compiled(transforms: dict[str, Rule]) -> dict[str, tuple]:
+    try:
+        table, ops = _compiled_tables[id(transforms)]
+        if table is transforms:
+            return ops
+    except KeyError:
+        pass
+    ops = compile_rules(transforms)
+    if len(_compiled_tables) >= _MAX_COMPILED_TABLES:
+        _compiled_tables.clear()
+    _compiled_tables[id(transforms)] = (transforms, ops)
+    return ops
+
+
+def _apply(xml: ET.Element, ops: dict[str, tuple]):
+    """Apply compiled rules to `xml` and its descendants in place."""
     for el in xml.iter("*"):
-        if el.tag in transforms:
-            fn = transforms[el.tag]
-            if fn is None:
-                # Don't delete the tail, as that would delete meaningful text.
-                el.tag = el.text = None
+        op = ops.get(el.tag)
+        if op is None:
+            continue
+
+        code = op[0]
+        if code == _SET or code == _RENAME:
+            _, tag, attrib, text_before, text_after = op
+            el.tag = tag
+            if code == _SET:
+                el.attrib = attrib
+            else:
+                old_attrib = el.attrib
+                el.attrib = {
+                    v: old_attrib[k] for k, v in attrib.items() if k in old_attrib
+                }
+            if text_before:
+                el.text = text_before + (el.text or "")
+            if text_after:
+                if len(el):
+                    el[-1].tail = (el.tail or "") + text_after
+                else:
+                    el.text = (el.text or "") + text_after
+        elif code == _HIDE:
+            # Don't delete the tail, as that would delete meaningful text.
+            el.tag = el.text = None
+        elif code == _DELETE:
+            el.clear()
+            el.tag = None
+        else:
+            op[1](el)
+
+
+def transform(xml: ET.Element, transforms: dict[str, Rule]) -> str:
+    _apply(xml, _get_compiled(transforms))
+    # "unicode" gives the same output as encoding to UTF-8 and decoding, but it
+    # skips a slow round trip through a text encoder.
+    return ET.tostring(xml, encoding="unicode")
+
+
+def etree_transform(blob: str, transforms: dict[str, Rule]) -> str:
+    """Parse `blob` into a tree and transform it. This is our reference backend."""
+    return transform(ET.fromstring(blob), transforms)
+
+
+#: Attribute names in this namespace serialize with the `xml:` prefix.
+_XML_NAMESPACE = "{http://www.w3.org/XML/1998/namespace}"
+
+# We escape text exactly as `ElementTree` does.
+_escape_text = ET._escape_cdata
+_escape_attrib = ET._escape_attrib
+
+
+class _Fallback(Exception):
+    """Raised if the streaming backend can't match `ElementTree`'s output."""
+
+
+class _Tail:
+    """The tail of an element in the streaming backend.
+
+    A rule with `text_after` replaces the tail of its element's last child with
+    its element's own tail plus `text_after`. We don't know an element's tail
+    until after the element ends, so we write these tails to the output buffer
+    as placeholders and resolve them once the document is complete.
+    """
+
+    __slots__ = ("text", "source", "suffix", "dropped")
+
+    def __init__(self, dropped: bool = False):
+        #: The original tail text.
+        self.text = ""
+        #: If set, use this tail plus `suffix` instead of `text`.
+        self.source = None
+        self.suffix = ""
+        #: If set, the element was deleted along with its tail.
+        self.dropped = dropped
+
+    def value(self) -> str:
+        if self.dropped:
+            return ""
+        if self.source is not None:
+            return self.source.value() + self.suffix
+        return self.text
+
+
+class _Frame:
+    """An open element in the streaming backend."""
+
+    __slots__ = ("tag", "head", "text", "text_after", "opened", "last_tail")
+
+    def __init__(self, tag, head, text_before, text_after):
+        self.tag = tag
+        #: The start tag without its closing `>`.
+        self.head = head
+        self.text = text_before
+        self.text_after = text_after
+        #: Whether we have written this element's start tag.
+        self.opened = False
+        #: The tail of this element's most recent child, if any.
+        self.last_tail = None
+
+
+def _start_tag(tag: Optional[str], attrib: Attributes) -> Optional[str]:
+    """Serialize a start tag as `ElementTree` does, but without its `>`."""
+    if tag is None:
+        return None
+    buf = ["<", tag]
+    for k, v in attrib.items():
+        if k[0] == "{":
+            k = "xml:" + k[len(_XML_NAMESPACE) :]
+        buf.append(f' {k}="{_escape_attrib(v)}"')
+    return "".join(buf)
+
+
+class _StreamTarget:
+    """An `XMLParser` target that applies compiled rules as it parses.
+
+    Elements whose rule is a plain function can change their descendants in
+    arbitrary ways, so we build those elements as trees and transform them
+    with the reference backend. Such functions must not change the element's
+    tail.
+    """
+
+    def __init__(self, ops: dict[str, tuple]):
+        self.ops = ops
+        #: Maps each tag with a `_SET` rule to its start tag.
+        self.heads = {}
+        #: Strings and `_Tail` placeholders, in document order.
+        self.out = []
+        self.stack = []
+        #: The tail that incoming text belongs to, if any.
+        self.tail = None
+        #: How deep we are inside a deleted element.
+        self.skip_depth = 0
+        #: A builder for an element that a plain function will transform.
+        self.builder = None
+        self.builder_depth = 0
+
+    def start(self, tag, attrib):
+        if self.skip_depth:
+            self.skip_depth += 1
+            return
+        if tag[0] == "{" or any(
+            k[0] == "{" and not k.startswith(_XML_NAMESPACE) for k in attrib
+        ):
+            # `ElementTree` declares namespaces on the root element, so it
+            # needs to see the whole tree first.
+            raise _Fallback
+        if self.builder is not None:
+            self.builder_depth += 1
+            self.builder.start(tag, attrib)
+            return
+
+        if self.tail is not None:
+            # The previous sibling isn't the last child, so its tail is final.
+            self._write_tail(self.tail)
+            self.tail = None
+        elif self.stack and not self.stack[-1].opened:
+            self._open(self.stack[-1])
+
+        op = self.ops.get(tag)
+        if op is None:
+            self.stack.append(_Frame(tag, _start_tag(tag, attrib), "", ""))
+            return
+        code = op[0]
+        if code == _SET:
+            _, new_tag, new_attrib, text_before, text_after = op
+            try:
+                head = self.heads[tag]
+            except KeyError:
+                head = self.heads[tag] = _start_tag(new_tag, new_attrib)
+            self.stack.append(_Frame(new_tag, head, text_before, text_after))
+        elif code == _RENAME:
+            _, new_tag, mapping, text_before, text_after = op
+            new_attrib = {v: attrib[k] for k, v in mapping.items() if k in attrib}
+            head = _start_tag(new_tag, new_attrib)
+            self.stack.append(_Frame(new_tag, head, text_before, text_after))
+        elif code == _HIDE:
+            self.stack.append(_Frame(None, None, None, ""))
+        elif code == _DELETE:
+            self.skip_depth = 1
+        else:
+            self.builder = ET.TreeBuilder()
+            self.builder_depth = 1
+            self.builder.start(tag, attrib)
+
+    def data(self, data):
+        if self.skip_depth:
+            return
+        if self.builder is not None:
+            self.builder.data(data)
+        elif self.tail is not None:
+            self.tail.text += data
+        elif self.stack and self.stack[-1].text is not None:
+            self.stack[-1].text += data
+
+    def end(self, tag):
+        if self.skip_depth:
+            self.skip_depth -= 1
+            if not self.skip_depth:
+                self._end_child(_Tail(dropped=True))
+            return
+        if self.builder is not None:
+            self.builder.end(tag)
+            self.builder_depth -= 1
+            if not self.builder_depth:
+                el = self.builder.close()
+                self.builder = None
+                _apply(el, self.ops)
+                self.out.append(ET.tostring(el, encoding="unicode"))
+                self._end_child(_Tail())
+            return
+
+        frame = self.stack.pop()
+        tail = _Tail()
+        if frame.opened:
+            last_tail = frame.last_tail
+            if frame.text_after and not last_tail.dropped:
+                last_tail.source = tail
+                last_tail.suffix = frame.text_after
+                self.out.append(last_tail)
             else:
-                fn(el)
-    return ET.tostring(xml, encoding="utf-8").decode("utf-8")
+                self._write_tail(last_tail)
+            if frame.tag is not None:
+                self.out.append("</" + frame.tag + ">")
+        else:
+            if frame.text_after:
+                frame.text += frame.text_after
+            self._open(frame, closing=True)
+        self._end_child(tail)
+
+    def _open(self, frame: _Frame, closing: bool = False):
+        """Write the start tag and text of `frame`."""
+        frame.opened = True
+        text = frame.text
+        if frame.tag is None:
+            if text:
+                self.out.append(_escape_text(text))
+        elif closing and not text:
+            self.out.append(frame.head + " />")
+        elif closing:
+            self.out.append(
+                frame.head + ">" + _escape_text(text) + "</" + frame.tag + ">"
+            )
+        elif text:
+            self.out.append(frame.head + ">" + _escape_text(text))
+        else:
+            self.out.append(frame.head + ">")
+
+    def _write_tail(self, tail: _Tail):
+        if tail.text and not tail.dropped:
+            self.out.append(_escape_text(tail.text))
+
+    def _end_child(self, tail: _Tail):
+        self.tail = tail
+        if self.stack:
+            self.stack[-1].last_tail = tail
+
+    def close(self) -> str:
+        return "".join(
+            _escape_text(x.value()) if isinstance(x, _Tail) else x for x in self.out
+        )
+
+
+def stream_transform(blob: str, transforms: dict[str, Rule]) -> str:
+    """Transform `blob` as we parse it, without building the whole tree.
+
+    The output is identical to :func:`etree_transform`. If the blob uses XML
+    namespaces, we fall back to that function.
+    """
+    parser = ET.XMLParser(target=_StreamTarget(_get_compiled(transforms)))
+    try:
+        parser.feed(blob)
+        return parser.close()
+    except _Fallback:
+        return etree_transform(blob, transforms)
+
+
+#: Maps each backend name to its transform function.
+BACKENDS = {
+    "etree": etree_transform,
+    "stream": stream_transform,
+}
+
+_backend = etree_transform
+
+
+def set_backend(name: str):
+    """Choose the backend that the `transform_*` functions use."""
+    global _backend
+    try:
+        _backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown XML backend: {name!r}") from None
+
+
+def _describe(value) -> str:
+    """Describe a rule (or part of a rule) as a deterministic string.
+
+    Rules contain closures and plain functions, whose default `repr` includes
+    a memory address. So for functions, we describe their name and any values
+    they close over instead. We don't describe their code, which changes
+    across Python versions; changes to code are what `RENDER_VERSION` is for.
+    """
+    if isinstance(value, Rule):
+        return "Rule({!r}, {}, {!r}, {!r})".format(
+            value.tag,
+            _describe(value.attrib_fn),
+            value.text_before,
+            value.text_after,
+        )
+    if isinstance(value, _Overwrite):
+        return f"_Overwrite({_describe(value.new_attrib)})"
+    if isinstance(value, _Rename):
+        return f"_Rename({_describe(value.mapping)})"
+    if isinstance(value, dict):
+        items = ", ".join(f"{k!r}: {_describe(v)}" for k, v in value.items())
+        return "{" + items + "}"
+    if isinstance(value, (list, tuple)):
+        return "(" + ", ".join(_describe(v) for v in value) + ")"
+    if hasattr(value, "__code__"):
+        cells = tuple(c.cell_contents for c in value.__closure__ or ())
+        return "fn({}.{}, {})".format(
+            value.__module__, value.__qualname__, _describe(cells)
+        )
+    return repr(value)
+
+
+def fingerprint(transforms: dict[str, Rule]) -> str:
+    """Return a short hash of the given rule table and `RENDER_VERSION`.
+
+    The hash changes whenever the table's data changes, so it's a good
+    version number for cached output.
+
+    :param transforms: a rule table, e.g. `mw_xml`.
+    """
+    description = f"{_describe(transforms)}:{RENDER_VERSION}"
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()[:16]
 
 
 def transform_mw(blob: str) -> str:
     """Transform XML for the Monier-Williams dictionary."""
-    xml = ET.fromstring(blob)
-    return transform(xml, mw_xml)
+    return _backend(blob, mw_xml)
 
 
 def transform_apte_sanskrit_english(blob: str) -> str:
     """Transform XML for the Apte Sanskrit-English dictionary."""
-    xml = ET.fromstring(blob)
-    return transform(xml, apte_cologne_xml)
+    return _backend(blob, apte_cologne_xml)
 
 
 def transform_apte_sanskrit_hindi(blob: str) -> str:
     """Transform XML for the Apte Sanskrit-Hindi dictionary."""
-    xml = ET.fromstring(blob)
-    return transform(xml, apte_uoh_xml)
+    return _backend(blob, apte_uoh_xml)
 
 
 def transform_vacaspatyam(blob: str) -> str:
     """Transform XML for the Vacaspatyam."""
-    xml = ET.fromstring(blob)
-    return transform(xml, vacaspatyam_xml)
+    return _backend(blob, vacaspatyam_xml)
 
 
 def transform_amarakosha(blob: str) -> str:
     """Transform XML for the Amarakosha."""
-    xml = ET.fromstring(blob)
-    return transform(xml, amarakosha_xml)
+    return _backend(blob, amarakosha_xml)
 
 
 def _text_of(xml: ET.Element, path: str, default: str) -> str:
@@ -367,9 +805,8 @@ def parse_tei_header(blob: Optional[str]) -> dict[str, str]:
 
 def transform_sak(blob: str) -> str:
     """Transform XML for the Shabdarthakaustubha."""
-    xml = ET.fromstring(blob)
     # Reuse the Vacaspatyam xml config, since it's close enough.
-    return transform(xml, vacaspatyam_xml)
+    return _backend(blob, vacaspatyam_xml)
 
 
 def transform_text_block(block_blob: str) -> str:
@@ -380,5 +817,4 @@ def transform_text_block(block_blob: str) -> str:
     """
     # FIXME: leaky abstraction. We should return just a string blob here and
     # get the XML ID from `database.Block` instead.
-    xml = ET.fromstring(block_blob)
-    return transform(xml, transforms=tei_xml)
+    return _backend(block_blob, tei_xml)
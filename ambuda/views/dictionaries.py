@@ -15,58 +15,72 @@ If a source list is invalid, we raise a 404 error.
 import functools
 from typing import Optional
 
-from flask import Blueprint, abort, redirect, render_template, request, url_for
-from indic_transliteration import detect, sanscript
+from flask import (
+    Blueprint,
+    abort,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
 
 import ambuda.queries as q
-from ambuda.utils import xml
-from ambuda.utils.dict_utils import expand_apte_keys, expand_skd_keys, standardize_key
+from ambuda.filters import slp_to_devanagari
+from ambuda.utils import (
+    dict_html,
+    dict_index,
+    dict_lookup,
+    dict_search,
+    dict_utils,
+    http_cache,
+)
 from ambuda.views.api import bp as api
 
 bp = Blueprint("dictionaries", __name__)
 
+#: The maximum number of keys to return from the autocomplete API.
+MAX_COMPLETIONS = 10
+#: How long browsers and CDNs may cache autocomplete results, in seconds.
+COMPLETIONS_MAX_AGE = 60 * 60 * 24
+
 
 @functools.cache
 def _get_dictionary_data() -> dict[str, str]:
     return {d.slug: d.title for d in q.dictionaries()}
 
 
-def _create_query_keys(sources: list[str], query: str) -> list[str]:
-    query = query.strip()
-    input_scheme = detect.detect(query)
-    slp1_key = sanscript.transliterate(query, input_scheme, sanscript.SLP1)
+def _create_base_key(query: str) -> str:
+    return dict_utils.to_slp1_keys([query])[query]
 
-    slp1_key = standardize_key(slp1_key)
-    keys = [slp1_key]
 
-    if any(x in sources for x in {"apte", "apte-sh"}):
-        keys.extend(expand_apte_keys(slp1_key))
-    if "shabdakalpadruma" in sources:
-        keys.extend(expand_skd_keys(slp1_key))
+def _fetch_entries(
+    sources: list[str], query: str, hashes: dict[str, Optional[str]]
+) -> dict[str, list[str]]:
+    return dict_lookup.fetch_entries_batch(sources, [query], hashes=hashes)[query]
 
-    return keys
 
+def _entry_etag(
+    sources: list[str], query: str, hashes: dict[str, Optional[str]]
+) -> Optional[str]:
+    """Create an ETag for the results of `query` in `sources`.
 
-def _fetch_entries(sources: list[str], query: str) -> dict[str, str]:
-    keys = _create_query_keys(sources, query)
-    entries = q.dict_entries(sources, keys)
+    :param hashes: the result of `q.dictionary_hashes(sources)`.
+    """
+    # The page lists all dictionaries, so include them too.
+    parts = [query, *_get_dictionary_data()]
+    for source in sources:
+        parts += [source, hashes.get(source), dict_html.version(source)]
+    return http_cache.make_etag(*parts)
 
-    transforms = {
-        "apte": xml.transform_apte_sanskrit_english,
-        "apte-sh": xml.transform_apte_sanskrit_hindi,
-        "shabdartha-kaustubha": xml.transform_sak,
-        "mw": xml.transform_mw,
-        "vacaspatyam": xml.transform_vacaspatyam,
-        "amara": xml.transform_amarakosha,
-        "shabdakalpadruma": xml.transform_mw,
-    }
 
-    results = {}
-    for source_slug, source_entries in entries.items():
-        fn = transforms.get(source_slug, xml.transform_mw)
-        html_blobs = [fn(e.value) for e in source_entries]
-        results[source_slug] = html_blobs
-    return results
+def _fetch_suggestions(
+    sources: list[str], query: str, entries: dict[str, list]
+) -> list[str]:
+    """If the query has no results, suggest similar keys."""
+    if any(entries.values()):
+        return []
+    return dict_index.suggest(sources, _create_base_key(query))
 
 
 def _handle_form_submission(
@@ -112,6 +126,19 @@ def index():
     return render_template("dictionaries/index.html", dictionaries=dictionaries)
 
 
+@bp.route("/search")
+def reverse_search():
+    """Search dictionary definitions for English or Hindi words."""
+    query = request.args.get("q", "").strip()
+    results = dict_search.search(q.get_engine(), query) if query else []
+    return render_template(
+        "dictionaries/search.html",
+        query=query,
+        results=results,
+        dictionaries=_get_dictionary_data(),
+    )
+
+
 @bp.route("/<list:sources>/")
 def index_with_sources(sources):
     if request.args:
@@ -136,13 +163,21 @@ def entry(sources, query):
     if not sources:
         abort(404)
 
-    entries = _fetch_entries(sources, query)
-    return render_template(
+    hashes = q.dictionary_hashes(sources)
+    etag = _entry_etag(sources, query, hashes)
+    if http_cache.is_fresh(etag):
+        return http_cache.not_modified(etag)
+
+    entries = _fetch_entries(sources, query, hashes)
+    suggestions = _fetch_suggestions(sources, query, entries)
+    rv = render_template(
         "dictionaries/index.html",
         query=query,
         entries=entries,
+        suggestions=suggestions,
         dictionaries=dictionaries,
     )
+    return http_cache.add_headers(rv, etag)
 
 
 @api.route("/dictionaries/<list:sources>/<query>")
@@ -152,10 +187,38 @@ def entry_htmx(sources, query):
     if not sources:
         abort(404)
 
-    entries = _fetch_entries(sources, query)
-    return render_template(
+    hashes = q.dictionary_hashes(sources)
+    etag = _entry_etag(sources, query, hashes)
+    if http_cache.is_fresh(etag):
+        return http_cache.not_modified(etag)
+
+    entries = _fetch_entries(sources, query, hashes)
+    suggestions = _fetch_suggestions(sources, query, entries)
+    rv = render_template(
         "htmx/dictionary-results.html",
         query=query,
         entries=entries,
+        suggestions=suggestions,
         dictionaries=dictionaries,
     )
+    return http_cache.add_headers(rv, etag)
+
+
+@api.route("/dictionaries/<list:sources>/complete/<prefix>")
+def complete(sources, prefix):
+    """Complete a partial query with keys from the given dictionaries.
+
+    Completions come from the in-memory key index, so this endpoint never
+    renders entries or queries the entries table.
+    """
+    dictionaries = _get_dictionary_data()
+    sources = [s for s in sources if s in dictionaries]
+    if not sources:
+        abort(404)
+
+    keys = dict_index.complete(sources, _create_base_key(prefix), MAX_COMPLETIONS)
+    resp = jsonify([{"key": k, "devanagari": slp_to_devanagari(k)} for k in keys])
+    # Completions change only when we reseed a dictionary.
+    resp.cache_control.public = True
+    resp.cache_control.max_age = COMPLETIONS_MAX_AGE
+    return resp
@@ -20,7 +20,8 @@ class EditBlockForm(FlaskForm):
 @bp.route("/")
 def index():
     texts = q.texts()
-    return render_template("proofing/tagging/index.html", texts=texts)
+    reports = q.text_alignment_reports()
+    return render_template("proofing/tagging/index.html", texts=texts, reports=reports)
 
 
 @bp.route("/<slug>/")
@@ -32,11 +33,15 @@ def text(slug):
     session = q.get_session()
     num_blocks = session.query(db.TextBlock).filter_by(text_id=text_.id).count()
     num_parsed_blocks = session.query(db.BlockParse).filter_by(text_id=text_.id).count()
+    report = q.text_alignment_report(text_.id)
+    misaligned_blocks = q.misaligned_blocks(text_.id) if report else []
     return render_template(
         "proofing/tagging/text.html",
         text=text_,
         num_blocks=num_blocks,
         num_parsed_blocks=num_parsed_blocks,
+        report=report,
+        misaligned_blocks=misaligned_blocks,
     )
 
 
@@ -76,7 +81,7 @@ def edit_block(text_slug, block_slug):
         abort(404)
 
     mula = xml.transform_text_block(block.xml)
-    tokens = word_parses.extract_tokens(block_parse.data)
+    tokens = word_parses.block_tokens(block_parse)
 
     form = EditBlockForm()
     return render_template(
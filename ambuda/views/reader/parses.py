@@ -1,13 +1,36 @@
-from flask import Blueprint, abort, render_template
+from flask import Blueprint, abort, jsonify, render_template, request
 
 import ambuda.queries as q
+from ambuda.utils import concordance, dict_lookup, html_cache, http_cache, parse_html
 from ambuda.utils import word_parses as parse_utils
-from ambuda.utils.parse_alignment import align_text_with_parse
 from ambuda.views.api import bp as api
 
 bp = Blueprint("parses", __name__)
 
 
+def _parse_etag(text, block_slug: str):
+    """Create an ETag for the parse of the given block.
+
+    The text's content hash covers the block's XML and parse data, but not the
+    code that aligns and renders them, so we include its version too.
+    """
+    return http_cache.make_etag(text.content_hash, block_slug, parse_html.version())
+
+
+@bp.route("/lemmas/<lemma>")
+def lemma(lemma):
+    """Show every occurrence of a lemma across all parsed texts."""
+    after = request.args.get("after", type=int)
+    page = concordance.find(lemma, after=after)
+    return render_template(
+        "texts/lemma.html",
+        lemma=lemma,
+        after=after,
+        page=page,
+        readable_parse=parse_utils.readable_parse,
+    )
+
+
 @bp.route("/<text_slug>/<block_slug>")
 def block(text_slug, block_slug):
     """Show the analysis for a specific block."""
@@ -15,6 +38,10 @@ def block(text_slug, block_slug):
     if text is None:
         abort(404)
 
+    etag = _parse_etag(text, block_slug)
+    if http_cache.is_fresh(etag):
+        return http_cache.not_modified(etag)
+
     block = q.block(text.id, block_slug)
     if block is None:
         abort(404)
@@ -23,9 +50,11 @@ def block(text_slug, block_slug):
     if parse is None:
         abort(404)
 
-    tokens = parse_utils.extract_tokens(parse.data)
-    aligned = align_text_with_parse(block.xml, tokens)
-    return render_template("texts/block-parse.html", aligned=aligned)
+    session = q.get_session()
+    aligned = parse_html.aligned_html(session, block, parse)
+    html_cache.save_cache(session)
+    rv = render_template("texts/block-parse.html", aligned=aligned)
+    return http_cache.add_headers(rv, etag)
 
 
 @api.route("/parses/<text_slug>/<block_slug>")
@@ -34,6 +63,10 @@ def block_parse_htmx(text_slug, block_slug):
     if text is None:
         abort(404)
 
+    etag = _parse_etag(text, block_slug)
+    if http_cache.is_fresh(etag):
+        return http_cache.not_modified(etag)
+
     block = q.block(text.id, block_slug)
     if block is None:
         abort(404)
@@ -42,11 +75,73 @@ def block_parse_htmx(text_slug, block_slug):
     if not parse:
         abort(404)
 
-    tokens = parse_utils.extract_tokens(parse.data)
-    aligned = align_text_with_parse(block.xml, tokens)
-    return render_template(
+    session = q.get_session()
+    aligned = parse_html.aligned_html(session, block, parse)
+    html_cache.save_cache(session)
+    rv = render_template(
         "htmx/parsed-tokens.html",
         text_slug=text_slug,
         block_slug=block_slug,
         aligned=aligned,
     )
+    return http_cache.add_headers(rv, etag)
+
+
+@api.route("/parses/<text_slug>/<block_slug>/gloss/<list:sources>")
+def block_gloss(text_slug, block_slug, sources):
+    """Look up every lemma in the given block at once.
+
+    We return a map from each lemma (in SLP1) to its entries, keyed by source.
+    Sources without any entries for a lemma are omitted.
+    """
+    text = q.text_meta(text_slug)
+    if text is None:
+        abort(404)
+
+    block = q.block(text.id, block_slug)
+    if block is None:
+        abort(404)
+
+    parse = q.block_parse(block.id)
+    if not parse:
+        abort(404)
+
+    tokens = parse_utils.block_tokens(parse)
+    lemmas = list(dict.fromkeys(t.lemma for t in tokens))
+    results = dict_lookup.fetch_entries_batch(sources, lemmas, is_slp1=True)
+    # The results cover only the sources that exist.
+    if not any(results.values()):
+        abort(404)
+
+    return jsonify(
+        {
+            lemma: {slug: entries for slug, entries in by_source.items() if entries}
+            for lemma, by_source in results.items()
+        }
+    )
+
+
+@api.route("/lemmas/<lemma>")
+def lemma_api(lemma):
+    """List occurrences of a lemma, one page at a time.
+
+    To get the next page, pass the returned `next_after` as `after`.
+    """
+    after = request.args.get("after", type=int)
+    page = concordance.find(lemma, after=after)
+    return jsonify(
+        {
+            "lemma": lemma,
+            "occurrences": [
+                {
+                    "text": o.text_slug,
+                    "block": o.block_slug,
+                    "position": o.position,
+                    "form": o.form,
+                    "parse": o.parse,
+                }
+                for o in page.occurrences
+            ],
+            "next_after": page.next_after,
+        }
+    )
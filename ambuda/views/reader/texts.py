@@ -3,16 +3,33 @@
 import json
 from typing import Optional
 
-from flask import Blueprint, abort, jsonify, render_template, url_for
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    jsonify,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
 from indic_transliteration import sanscript
 
 import ambuda.database as db
 import ambuda.queries as q
 from ambuda.consts import TEXT_CATEGORIES
-from ambuda.utils import xml
-from ambuda.utils.json_serde import AmbudaJSONEncoder
+from ambuda.utils import (
+    html_cache,
+    http_cache,
+    section_html,
+    text_exports,
+    text_nav,
+    verse_search,
+    xml,
+)
+from ambuda.utils.transliteration import transliterate
 from ambuda.views.api import bp as api
-from ambuda.views.reader.schema import Block, Section
+from ambuda.views.reader.schema import Section
 
 bp = Blueprint("texts", __name__)
 
@@ -34,30 +51,8 @@ HAS_NO_PARSE = {
 SINGLE_SECTION_SLUG = "all"
 
 
-def _prev_cur_next(sections: list[db.TextSection], slug: str):
-    """Get the previous, current, and next esctions.
-
-    :param sections: all of the sections in this text.
-    :param slug: the slug for the current section.
-    """
-    found = False
-    i = 0
-    for i, s in enumerate(sections):
-        if s.slug == slug:
-            found = True
-            break
-
-    if not found:
-        raise ValueError(f"Unknown slug {slug}")
-
-    prev = sections[i - 1] if i > 0 else None
-    cur = sections[i]
-    next = sections[i + 1] if i < len(sections) - 1 else None
-    return prev, cur, next
-
-
 def _make_section_url(
-    text: db.Text, section: Optional[db.TextSection]
+    text: text_nav.TextNav, section: Optional[text_nav.SectionInfo]
 ) -> Optional[str]:
     if section:
         return url_for("texts.section", text_slug=text.slug, section_slug=section.slug)
@@ -76,7 +71,7 @@ def _section_groups(sections: list[db.TextSection]):
 
 
 def _hk_to_dev(s: str) -> str:
-    return sanscript.transliterate(s, sanscript.HK, sanscript.DEVANAGARI)
+    return transliterate(s, sanscript.HK, sanscript.DEVANAGARI)
 
 
 @bp.route("/")
@@ -88,6 +83,17 @@ def index():
     )
 
 
+@bp.route("/search")
+def search():
+    """Search the blocks of all texts."""
+    query = request.args.get("q", "").strip()
+    results = verse_search.search(q.get_engine(), query) if query else []
+    titles = {t.slug: t.title for t in q.texts()} if results else {}
+    return render_template(
+        "texts/search.html", query=query, results=results, titles=titles
+    )
+
+
 @bp.route("/<slug>/")
 def text(slug):
     """Show a text's title page and contents."""
@@ -102,15 +108,22 @@ def text(slug):
 @bp.route("/<slug>/about")
 def text_about(slug):
     """Show a text's metadata."""
-    text = q.text(slug)
+    text = text_nav.get(slug)
     if text is None:
         abort(404)
 
-    header_data = xml.parse_tei_header(text.header)
+    stats = q.text_stats(text.id)
+    if stats is None:
+        # We haven't computed stats for this text yet, so parse its header
+        # directly.
+        header = xml.parse_tei_header(q.text_header(text.id))
+    else:
+        header = stats if stats.title else None
     return render_template(
         "texts/text-about.html",
         text=text,
-        header=header_data,
+        header=header,
+        stats=stats,
     )
 
 
@@ -124,16 +137,68 @@ def text_resources(slug):
     return render_template("texts/text-resources.html", text=text)
 
 
+def _download(text_: text_nav.TextNav, chunks, mimetype: str, extension: str):
+    """Stream an export of a text to the client as a file download."""
+    filename = f"{text_.slug}.{extension}"
+    resp = Response(stream_with_context(chunks), mimetype=mimetype)
+    resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return resp
+
+
+@bp.route("/<slug>/download/text")
+def download_as_text(slug):
+    """Download a text as plain text."""
+    text_ = text_nav.get(slug)
+    if text_ is None:
+        abort(404)
+
+    blocks = text_exports.iter_blocks(text_.id)
+    return _download(text_, text_exports.to_plain_text(blocks), "text/plain", "txt")
+
+
+@bp.route("/<slug>/download/xml")
+def download_as_xml(slug):
+    """Download a text as TEI XML."""
+    text_ = text_nav.get(slug)
+    if text_ is None:
+        abort(404)
+
+    header = q.text_header(text_.id)
+    blocks = text_exports.iter_blocks(text_.id)
+    return _download(
+        text_, text_exports.to_tei_xml(header, blocks), "application/xml", "xml"
+    )
+
+
+@bp.route("/<slug>/download/jsonl")
+def download_as_json_lines(slug):
+    """Download a text as JSON lines, with one object per block."""
+    text_ = text_nav.get(slug)
+    if text_ is None:
+        abort(404)
+
+    blocks = text_exports.iter_blocks(text_.id)
+    return _download(
+        text_, text_exports.to_json_lines(blocks), "application/x-ndjson", "jsonl"
+    )
+
+
 @bp.route("/<text_slug>/<section_slug>")
 def section(text_slug, section_slug):
     """Show a specific section of a text."""
-    text_ = q.text(text_slug)
+    return _section(text_slug, section_slug, can_retry=True)
+
+
+def _section(text_slug: str, section_slug: str, can_retry: bool):
+    # The text and its sections come from our navigation index, so we usually
+    # need just one query for the section's pre-rendered blocks.
+    text_ = text_nav.get(text_slug)
     if text_ is None:
         abort(404)
 
     try:
-        prev, cur, next_ = _prev_cur_next(text_.sections, section_slug)
-    except ValueError:
+        prev, cur, next_ = text_.prev_cur_next(section_slug)
+    except KeyError:
         abort(404)
 
     is_single_section_text = not prev and not next_
@@ -145,41 +210,50 @@ def section(text_slug, section_slug):
 
     has_no_parse = text_.slug in HAS_NO_PARSE
 
-    # Fetch with content blocks
-    cur = q.text_section(text_.id, section_slug)
-
-    with q.get_session() as _:
-        _ = cur.blocks
-
-    blocks = []
-    for block in cur.blocks:
-        blocks.append(
-            Block(
-                slug=block.slug,
-                mula=xml.transform_text_block(block.xml),
-            )
-        )
+    etag = http_cache.make_etag(
+        text_.slug,
+        text_.title,
+        cur.content_hash,
+        prev.slug if prev else "",
+        next_.slug if next_ else "",
+        section_html.version(),
+    )
+    if http_cache.is_fresh(etag):
+        return http_cache.not_modified(etag)
+
+    # Sections are usually pre-rendered, in which case we don't load their
+    # blocks at all.
+    session = q.get_session()
+    blocks = section_html.section_blocks(session, cur.id, q.section_html(cur.id))
+    if blocks is None:
+        # The section was deleted after we read the index, e.g. because the
+        # text is being reseeded. Rebuild the index and try once more.
+        if not can_retry:
+            abort(404)
+        text_nav.invalidate(text_slug)
+        return _section(text_slug, section_slug, can_retry=False)
+    html_cache.save_cache(session)
 
-    data = Section(
+    json_payload = section_html.make_payload(
         text_title=_hk_to_dev(text_.title),
         section_title=_hk_to_dev(cur.title),
         blocks=blocks,
         prev_url=_make_section_url(text_, prev),
         next_url=_make_section_url(text_, next_),
     )
-    json_payload = json.dumps(data, cls=AmbudaJSONEncoder)
 
-    return render_template(
+    rv = render_template(
         "texts/section.html",
         text=text_,
         prev=prev,
         section=cur,
         next=next_,
         json_payload=json_payload,
-        html_blocks=data.blocks,
+        html_blocks=json.loads(blocks),
         has_no_parse=has_no_parse,
         is_single_section_text=is_single_section_text,
     )
+    return http_cache.add_headers(rv, etag)
 
 
 @api.route("/texts/<text_slug>/blocks/<block_slug>")
@@ -204,23 +278,25 @@ def block_htmx(text_slug, block_slug):
 def reader_json(text_slug, section_slug):
     # NOTE: currently unused, since we bootstrap from a JSON blob in the
     # original request.
-    text_ = q.text(text_slug)
+    text_ = text_nav.get(text_slug)
     if text_ is None:
         abort(404)
 
     try:
-        prev, cur, next_ = _prev_cur_next(text_.sections, section_slug)
-    except ValueError:
+        prev, cur, next_ = text_.prev_cur_next(section_slug)
+    except KeyError:
         abort(404)
 
-    with q.get_session() as _:
-        html_blocks = [xml.transform_text_block(b.xml) for b in cur.blocks]
+    section = q.section_with_blocks(cur.id)
+    if section is None:
+        abort(404)
+    html_blocks = [xml.transform_text_block(b.xml) for b in section.blocks]
 
     data = Section(
         text_title=_hk_to_dev(text_.title),
         section_title=_hk_to_dev(cur.title),
         blocks=html_blocks,
-        prev_url=_make_section_url(text, prev),
-        next_url=_make_section_url(text, next_),
+        prev_url=_make_section_url(text_, prev),
+        next_url=_make_section_url(text_, next_),
     )
     return jsonify(data)
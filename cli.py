@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import getpass
+import os
 from pathlib import Path
 
 import click
@@ -11,9 +12,22 @@ from sqlalchemy.orm import Session
 import ambuda
 from ambuda import database as db
 from ambuda import queries as q
+from ambuda.seed import dcs
 from ambuda.seed.utils.data_utils import create_db
 from ambuda.tasks.projects import create_project_inner
 from ambuda.tasks.utils import LocalTaskStatus
+from ambuda.utils import (
+    alignment_report,
+    concordance,
+    content_hash,
+    dict_artifact,
+    dict_html,
+    dict_search,
+    parse_html,
+    section_html,
+    text_stats,
+    verse_search,
+)
 
 engine = create_db()
 
@@ -107,5 +121,197 @@ def create_project(title, pdf_path):
         )
 
 
+@cli.command()
+@click.option("--slug", help="the dictionary to prebuild (default: all)")
+def prebuild_dictionary_html(slug):
+    """Render and cache HTML for dictionary entries.
+
+    Only missing and stale entries are rendered, so this command is cheap to
+    run again after a rule table changes.
+    """
+    with Session(engine) as session:
+        if slug:
+            if not session.query(db.Dictionary).filter_by(slug=slug).first():
+                raise click.ClickException(f'Dictionary "{slug}" does not exist.')
+            slugs = [slug]
+        else:
+            slugs = [d.slug for d in session.query(db.Dictionary).all()]
+
+    for slug in slugs:
+        num_rendered = dict_html.prebuild(engine, slug)
+        print(f"{slug}: rendered {num_rendered} entries.")
+
+
+@cli.command()
+@click.option("--slug", help="the text to prebuild (default: all)")
+def prebuild_section_html(slug):
+    """Render and cache HTML for text sections.
+
+    Only missing and stale sections are rendered, so this command is cheap to
+    run again after a rule table changes.
+    """
+    with Session(engine) as session:
+        if slug:
+            if not session.query(db.Text).filter_by(slug=slug).first():
+                raise click.ClickException(f'Text "{slug}" does not exist.')
+            slugs = [slug]
+        else:
+            slugs = [t.slug for t in session.query(db.Text).all()]
+
+    for slug in slugs:
+        num_rendered = section_html.prebuild(engine, slug)
+        print(f"{slug}: rendered {num_rendered} sections.")
+
+
+@cli.command()
+@click.option("--slug", help="the text to prebuild (default: all)")
+@click.option("--workers", default=os.cpu_count(), help="number of worker processes")
+def prebuild_parse_html(slug, workers):
+    """Align and cache the parse data for every parsed block.
+
+    Only missing and stale blocks are aligned, so this command is cheap to run
+    again.
+    """
+    if slug:
+        with Session(engine) as session:
+            if not session.query(db.Text).filter_by(slug=slug).first():
+                raise click.ClickException(f'Text "{slug}" does not exist.')
+
+    stats = parse_html.prebuild(engine, slug, num_workers=workers)
+    print(
+        f"Checked {stats.num_blocks} blocks and aligned {stats.num_aligned} in "
+        f"{stats.seconds:.1f}s. {stats.num_backup} blocks use a backup parse."
+    )
+
+
+@cli.command()
+@click.option("--slug", help="the text to check (default: all)")
+@click.option("--workers", default=os.cpu_count(), help="number of worker processes")
+def report_alignment(slug, workers):
+    """Check how well each parsed block aligns with its parse data."""
+    if slug:
+        with Session(engine) as session:
+            if not session.query(db.Text).filter_by(slug=slug).first():
+                raise click.ClickException(f'Text "{slug}" does not exist.')
+
+    reports = alignment_report.run(engine, slug, num_workers=workers)
+    for slug, report in reports.items():
+        if report["num_blocks"]:
+            print(
+                f"{slug}: {report['num_backup']} failed, "
+                f"{report['num_mismatched']} mismatched, "
+                f"{report['num_blocks']} total ({report['seconds']:.1f}s)."
+            )
+
+
+@cli.command()
+def hash_content():
+    """Hash every text and dictionary for HTTP caching.
+
+    Our seed scripts do this automatically, so this command is mainly useful
+    for data that was seeded before we stored content hashes.
+    """
+    with Session(engine) as session:
+        text_slugs = [t.slug for t in session.query(db.Text).all()]
+        dictionary_slugs = [d.slug for d in session.query(db.Dictionary).all()]
+
+    for slug in text_slugs:
+        content_hash.hash_text(engine, slug)
+        print(f"Hashed text {slug}.")
+    for slug in dictionary_slugs:
+        content_hash.hash_dictionary(engine, slug)
+        print(f"Hashed dictionary {slug}.")
+
+
+@cli.command()
+@click.option("--slug", help="the text to update (default: all)")
+def update_text_stats(slug):
+    """Recompute the metadata and statistics for texts."""
+    with Session(engine) as session:
+        if slug:
+            if not session.query(db.Text).filter_by(slug=slug).first():
+                raise click.ClickException(f'Text "{slug}" does not exist.')
+            slugs = [slug]
+        else:
+            slugs = [t.slug for t in session.query(db.Text).all()]
+
+    for slug in slugs:
+        stats = text_stats.update(engine, slug)
+        print(f"{slug}: {stats['num_blocks']} blocks.")
+
+
+@cli.command()
+@click.option("--slug", help="the text to index (default: all)")
+def index_texts(slug):
+    """Rebuild the full-text index for verse search."""
+    with Session(engine) as session:
+        if slug:
+            if not session.query(db.Text).filter_by(slug=slug).first():
+                raise click.ClickException(f'Text "{slug}" does not exist.')
+            slugs = [slug]
+        else:
+            slugs = [t.slug for t in session.query(db.Text).all()]
+
+    for slug in slugs:
+        num_indexed = verse_search.index_text(engine, slug)
+        print(f"{slug}: indexed {num_indexed} blocks.")
+
+
+@cli.command()
+@click.option("--slug", help="the text to index (default: all)")
+def index_lemmas(slug):
+    """Rebuild the lemma concordance from parse data."""
+    with Session(engine) as session:
+        if slug:
+            if not session.query(db.Text).filter_by(slug=slug).first():
+                raise click.ClickException(f'Text "{slug}" does not exist.')
+            slugs = [slug]
+        else:
+            slugs = [t.slug for t in session.query(db.Text).all()]
+
+    for slug in slugs:
+        num_indexed = concordance.index_text(engine, slug)
+        print(f"{slug}: indexed {num_indexed} occurrences.")
+
+
+@cli.command()
+def pack_parse_data():
+    """Pack parse data that was imported before packing existed."""
+    num_packed = dcs.pack_existing_parse_data(engine)
+    print(f"Packed {num_packed} parses.")
+
+
+@cli.command()
+@click.option(
+    "--output-dir",
+    envvar="DICTIONARY_ARTIFACT_DIR",
+    required=True,
+    help="where to write the artifact (default: $DICTIONARY_ARTIFACT_DIR)",
+)
+@click.option("--workers", default=os.cpu_count(), help="number of worker processes")
+def build_dictionary_artifact(output_dir, workers):
+    """Prerender all dictionaries into a read-only serving artifact.
+
+    Entries that haven't changed since the last build are copied from the old
+    artifact instead of being rendered again.
+    """
+    stats = dict_artifact.build(engine, Path(output_dir), num_workers=workers)
+    print(
+        f"Wrote {stats.num_entries} entries to {output_dir} "
+        f"({stats.num_rendered} rendered, {stats.num_reused} unchanged) "
+        f"in {stats.seconds:.1f}s ({stats.entries_per_second:.0f} entries/sec)."
+    )
+
+
+@cli.command()
+@click.option("--slug", help="the dictionary to index (default: all indexed sources)")
+def index_dictionary_definitions(slug):
+    """Rebuild the full-text index for reverse dictionary search."""
+    slugs = [slug] if slug else dict_search.SOURCES
+    for slug in slugs:
+        num_indexed = dict_search.index_dictionary(engine, slug)
+        print(f"{slug}: indexed {num_indexed} entries.")
+
+
 if __name__ == "__main__":
     cli()
@@ -80,6 +80,16 @@ class BaseConfig:
     #: Where to store user uploads (PDFs, images, etc.).
     UPLOAD_FOLDER = _env("FLASK_UPLOAD_FOLDER")
 
+    #: Directory of a prerendered dictionary artifact, as created by
+    #: `./cli.py build-dictionary-artifact`. If empty, we render dictionary
+    #: entries from the database instead.
+    DICTIONARY_ARTIFACT_DIR = _env("DICTIONARY_ARTIFACT_DIR", "")
+
+    #: How to transform XML to HTML. "etree" builds a full tree first, and
+    #: "stream" transforms as it parses, which uses less memory on large
+    #: blobs. Both produce the same output. See `ambuda.utils.xml`.
+    XML_BACKEND = _env("XML_BACKEND", "etree")
+
     #: Logger setup
     LOG_LEVEL = logging.INFO
 
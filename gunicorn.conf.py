@@ -0,0 +1,8 @@
+"""Gunicorn settings for production.
+
+Gunicorn reads this file by default when we start it from the repository root.
+"""
+
+#: Load the app before we fork workers. Then `wsgi.py` builds our dictionary
+#: key indices once, and all workers share them copy-on-write.
+preload_app = True
@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 from sqlalchemy import engine_from_config, pool
 
 from ambuda.models.base import Base
+from ambuda.utils.fulltext import TABLE_PREFIX
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -25,6 +26,16 @@ load_dotenv(".env")
 config.set_main_option("sqlalchemy.url", os.environ["SQLALCHEMY_DATABASE_URI"])
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """Skip full-text index tables, which we manage outside of alembic.
+
+    For details, see `ambuda.utils.fulltext`.
+    """
+    if type_ == "table" and reflected and name.startswith(TABLE_PREFIX):
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -43,6 +54,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -63,7 +75,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -5,6 +5,7 @@ import ambuda.database as db
 from ambuda import create_app
 from ambuda.consts import BOT_USERNAME, TEXT_CATEGORIES
 from ambuda.queries import get_engine, get_session
+from ambuda.seed.utils.itihasa_utils import delete_existing_text
 
 
 def _add_dictionaries(session):
@@ -166,9 +167,11 @@ def initialize_test_db():
 
 
 @pytest.fixture(scope="session")
-def flask_app():
+def flask_app(tmp_path_factory):
     app = create_app("testing")
-    app.config.update({"TESTING": True})
+    # Keep files that tests upload out of the source tree.
+    upload_folder = tmp_path_factory.mktemp("file-uploads")
+    app.config.update({"TESTING": True, "UPLOAD_FOLDER": str(upload_folder)})
     app.test_client_class = FlaskLoginClient
 
     with app.app_context():
@@ -177,6 +180,62 @@ def flask_app():
     yield app
 
 
+@pytest.fixture()
+def dict_entry(flask_app):
+    """Get a `DictionaryEntry` by its dictionary's slug and its key."""
+
+    def get(slug: str, key: str) -> db.DictionaryEntry:
+        session = get_session()
+        dictionary = session.query(db.Dictionary).filter_by(slug=slug).one()
+        return (
+            session.query(db.DictionaryEntry)
+            .filter_by(dictionary_id=dictionary.id, key=key)
+            .one()
+        )
+
+    return get
+
+
+@pytest.fixture()
+def add_text(flask_app):
+    """Add a one-section text with the given blocks, and delete it afterward.
+
+    Each block is an (n, XML, parse data) tuple, and we add the blocks in the
+    order given. If a block's parse data is `None`, the block has no parse.
+    """
+    slugs = []
+
+    def add(slug: str, blocks: list[tuple], title: str = "test") -> int:
+        session = get_session()
+        text = db.Text(slug=slug, title=title)
+        session.add(text)
+        session.flush()
+        section = db.TextSection(text_id=text.id, slug="1", title="1")
+        session.add(section)
+        session.flush()
+
+        for n, xml, data in blocks:
+            block = db.TextBlock(
+                text_id=text.id, section_id=section.id, slug=f"1.{n}", xml=xml, n=n
+            )
+            session.add(block)
+            session.flush()
+            if data is not None:
+                session.add(
+                    db.BlockParse(text_id=text.id, block_id=block.id, data=data)
+                )
+        session.commit()
+        slugs.append(slug)
+        return text.id
+
+    with flask_app.app_context():
+        yield add
+
+        get_session().close()
+        for slug in slugs:
+            delete_existing_text(get_engine(), slug)
+
+
 @pytest.fixture()
 def client(flask_app):
     return flask_app.test_client()
@@ -0,0 +1,116 @@
+import pytest
+
+import ambuda.scripts.analysis.block_matcher as bm
+from ambuda.queries import get_engine
+
+
+def _matcher():
+    return bm.BlockMatcher(
+        [
+            ("1.1.1", "DarmakzetrekurukzetresamavetAyuyutsava"),
+            ("1.1.1", "mAmakAHpARqavAScEvakimakurvatasaMjaya"),
+            ("1.1.2", "dfzwvAtupARqavAnIkaMvyUQaMduryoDanastadA"),
+            ("1.10.1", "DarmakzetrekurukzetresamavetAyuyutsava"),
+        ]
+    )
+
+
+def test_match__exact():
+    m = _matcher()
+    assert m.match("DarmakzetrekurukzetresamavetAyuyutsava", "1.1") == ("1.1.1", 0)
+
+
+def test_match__uses_section():
+    m = _matcher()
+    # "1.1" is a prefix of "1.10", but they're different sections.
+    assert m.match("DarmakzetrekurukzetresamavetAyuyutsava", "1.10") == ("1.10.1", 0)
+    assert m.match("DarmakzetrekurukzetresamavetAyuyutsava", "1.1") == ("1.1.1", 0)
+
+
+def test_match__each_line_once():
+    m = _matcher()
+    key = "DarmakzetrekurukzetresamavetAyuyutsava"
+    assert m.match(key, "1.10") == ("1.10.1", 0)
+    assert m.match(key, "1.10") == ("1.1.1", 0)
+    assert m.match(key, "1.10") is None
+
+
+def test_match__other_section():
+    m = _matcher()
+    # Exact matches fall back to the whole text.
+    assert m.match("dfzwvAtupARqavAnIkaMvyUQaMduryoDanastadA", "1.10") == (
+        "1.1.2",
+        0,
+    )
+    # But a line in the phrase's own section comes first.
+    assert m.match("DarmakzetrekurukzetresamavetAyuyutsava", "1.10") == ("1.10.1", 0)
+
+
+def test_match__near():
+    m = _matcher()
+    # One typo.
+    assert m.match("mAmakAHpARqavAScEvakimakurvatasaMjeya", "1.1") == ("1.1.1", 1)
+    # Near matches stay within the section.
+    assert m.match("dfzwvAtupARqavAnIkaMvyUQaMduryoDanastada", "1.10") is None
+
+
+def test_match__miss():
+    m = _matcher()
+    assert m.match("agnimIqepurohitam", "1.1") is None
+    # Short keys must match exactly.
+    assert m.match("rAma", "1.1") is None
+
+
+def test_match_all():
+    m = _matcher()
+    report = bm.match_all(
+        m,
+        [
+            ("DarmakzetrekurukzetresamavetAyuyutsava", "1.1.1", "a"),
+            ("mAmakAHpARqavAScEvakimakurvatasaMjeya", "1.1.1", "b"),
+            ("agnimIqepurohitam", "1.1.5", "c"),
+        ],
+    )
+    assert report.hits == {"1.1.1": ["a", "b"]}
+    assert report.misses == {"1.1.5": [("agnimIqepurohitam", "c")]}
+    assert (report.num_exact, report.num_near, report.num_misses) == (1, 1, 1)
+
+
+def test_write_report(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    report = bm.MatchReport(
+        hits={"1.10.1": ["b"], "1.2.1": ["a"]},
+        misses={"1.3.1": [("key", "c")]},
+    )
+    bm.write_report(report, "gita", "G")
+    assert (tmp_path / "gita.txt").read_text() == (
+        "# id = G.1.2.1\na\n\n# id = G.1.10.1\nb\n\n"
+    )
+    assert (tmp_path / "gita-errors.txt").read_text() == (
+        "# dcs_id = 1.3.1\n# key = key\nc\n\n"
+    )
+
+
+@pytest.fixture
+def verse_text(add_text):
+    xml = "<lg><l>रामः वनं</l><l>गच्छति ॥ १ ॥</l></lg>"
+    return add_text("block-matcher-test", [(1, xml, None)])
+
+
+def test_load_lines(verse_text):
+    assert bm.load_lines(get_engine(), "block-matcher-test") == [
+        ("1.1", "rAMavaMaM"),
+        ("1.1", "gacCati"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "block_xml,expected",
+    [
+        ("<lg><l>a</l><l>b</l></lg>", ["a", "b"]),
+        ("<p><s>a</s> <s>b</s></p>", ["a", "b"]),
+        ("<p>a <hi>b</hi></p>", ["a b"]),
+    ],
+)
+def test_lines_of(block_xml, expected):
+    assert bm._lines_of(block_xml) == expected
@@ -0,0 +1,59 @@
+import ambuda.scripts.analysis.dcs_utils as dcs
+
+DATA = """\
+## chapter: Rām, Bā, 1
+
+# text_line: tapaḥsvādhyāyaniratam
+# text_line_counter: 1
+1-2	tapaḥsvādhyāya	_	_	_	_	_	_	_	_	_	_	_
+1	_	tapas	_	NC	Case=Cpd	_	_	_	_	1	tapas	_
+2	_	svādhyāya	_	NC	Case=Cpd	_	_	_	_	2	svādhyāya	_
+3	niratam	nirata	_	PPP	Case=Acc|Gender=Masc|Number=Sing|VerbForm=Part	_	_	_	_	3	_	_
+
+# text_line: vāgvidāṃ varam
+# text_line_counter: 2
+1	vāgvidām	vāgvid	_	NC	Case=Gen|Gender=Masc|Number=Plur	_	_	_	_	4	_	_
+2	varam	vara	_	JJ	Case=Acc|Gender=Masc|Number=Sing	_	_	_	_	5	_	_
+
+## chapter: Rām, Bā, 2
+
+# text_line: nāradam
+# text_line_counter: 1
+1	nāradam	nārada	_	NC	Case=Acc|Gender=Masc|Number=Sing	_	_	_	_	6	_	_
+"""
+
+
+def test_parse_file(tmp_path):
+    path = tmp_path / "test.conllu"
+    path.write_text(DATA)
+
+    progress = dcs.Progress()
+    sections = dcs.parse_file(path, progress)
+
+    first = next(sections)
+    assert first.slug == "Rām, Bā, 1"
+    assert [p.slug for p in first.phrases] == ["1", "2"]
+    assert first.phrases[0].raw == "tapaḥsvādhyāyaniratam"
+    # Multi-word tokens are skipped.
+    assert [t.form for t in first.phrases[0].tokens] == ["tapas", "svADyAya", "niratam"]
+    assert first.phrases[1].tokens[0] == dcs.Token(
+        form="vAgvidAm", lemma="vAgvid", parse="pos=n,g=m,c=6,n=p"
+    )
+    # We yield each section as soon as we finish it.
+    assert progress.num_sections == 1
+    assert progress.num_files == 0
+
+    (second,) = list(sections)
+    assert second.slug == "Rām, Bā, 2"
+    assert progress.num_files == 1
+    assert progress.num_sections == 2
+    assert progress.num_phrases == 3
+    assert progress.num_tokens == 6
+
+
+def test_parse_file__matches_parse_sections(tmp_path):
+    path = tmp_path / "test.conllu"
+    path.write_text(DATA)
+    text = DATA.replace("# chapter:", "# chapter =").replace("_line:", "_line =")
+    text = text.replace("_counter:", "_counter =")
+    assert list(dcs.parse_file(path)) == list(dcs.parse_sections(text))
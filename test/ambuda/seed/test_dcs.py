@@ -0,0 +1,86 @@
+import pytest
+
+import ambuda.database as db
+from ambuda.queries import get_engine, get_session
+from ambuda.seed import dcs
+from ambuda.utils.word_parses import extract_tokens, unpack_tokens
+
+
+def test_iter_parse_data(tmp_path):
+    path = tmp_path / "test.txt"
+    path.write_text(
+        "# id = test.1.1\n"
+        "agniH\tagni\tpos=n,g=m,c=1,n=s\n"
+        "\n"
+        "# id = test.1.2\n"
+        "Iqe\tId\tpos=v,p=1,n=s,l=lat\n"
+        "puroh\tpurohita\tpos=n,g=m,c=2,n=s\n"
+    )
+    assert list(dcs.iter_parse_data(path)) == [
+        ("1.1", "agniH\tagni\tpos=n,g=m,c=1,n=s"),
+        ("1.2", "Iqe\tId\tpos=v,p=1,n=s,l=lat\npuroh\tpurohita\tpos=n,g=m,c=2,n=s"),
+    ]
+
+
+def test_pack_existing_parse_data(flask_app):
+    with flask_app.app_context():
+        session = get_session()
+        session.query(db.BlockParse).update({"tokens": None})
+        session.commit()
+
+        num_parses = session.query(db.BlockParse).count()
+        assert dcs.pack_existing_parse_data(get_engine()) == num_parses
+        assert dcs.pack_existing_parse_data(get_engine()) == 0
+
+        session.expire_all()
+        for parse in session.query(db.BlockParse).all():
+            assert unpack_tokens(parse.tokens) == extract_tokens(parse.data)
+
+
+@pytest.fixture
+def dcs_text(add_text):
+    """Add a text with two blocks and one old parse."""
+    return add_text(
+        "dcs-test",
+        [(1, "<div>1</div>", "old\told\tpos=i"), (2, "<div>2</div>", None)],
+    )
+
+
+def test_replace_parse_data(dcs_text, tmp_path):
+    path = tmp_path / "dcs-test.txt"
+    path.write_text(
+        "# id = test.1.1\n"
+        "agniH\tagni\tpos=n,g=m,c=1,n=s\n"
+        "\n"
+        "# id = test.1.2\n"
+        "Iqe\tId\tpos=v,p=1,n=s,l=lat\n"
+    )
+    # A batch size of 1 checks that we insert every batch.
+    assert dcs.replace_parse_data(get_engine(), dcs_text, path, batch_size=1) == 2
+
+    session = get_session()
+    parses = session.query(db.BlockParse).filter_by(text_id=dcs_text).all()
+    assert sorted(p.data for p in parses) == [
+        "Iqe\tId\tpos=v,p=1,n=s,l=lat",
+        "agniH\tagni\tpos=n,g=m,c=1,n=s",
+    ]
+    for parse in parses:
+        assert unpack_tokens(parse.tokens) == extract_tokens(parse.data)
+
+
+def test_replace_parse_data__rolls_back_on_error(dcs_text, tmp_path):
+    path = tmp_path / "dcs-test.txt"
+    path.write_text(
+        "# id = test.1.1\n"
+        "agniH\tagni\tpos=n,g=m,c=1,n=s\n"
+        "\n"
+        "# id = test.9.9\n"
+        "Iqe\tId\tpos=v,p=1,n=s,l=lat\n"
+    )
+    with pytest.raises(KeyError):
+        dcs.replace_parse_data(get_engine(), dcs_text, path, batch_size=1)
+
+    # The old data is still there.
+    session = get_session()
+    (parse,) = session.query(db.BlockParse).filter_by(text_id=dcs_text).all()
+    assert parse.data == "old\told\tpos=i"
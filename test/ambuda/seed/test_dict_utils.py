@@ -1,6 +1,13 @@
 import pytest
+from indic_transliteration import detect, sanscript
 
-from ambuda.utils.dict_utils import expand_apte_keys, expand_skd_keys, standardize_key
+from ambuda.utils.dict_utils import (
+    expand_apte_keys,
+    expand_keys,
+    expand_skd_keys,
+    standardize_key,
+    to_slp1_keys,
+)
 
 
 @pytest.mark.parametrize(
@@ -57,3 +64,32 @@ def test_expand_apte_keys(before, after):
 )
 def test_expand_skd_keys(before, after):
     assert expand_skd_keys(before) == after
+
+
+def test_standardize_key__repeated_anusvara():
+    # Each anusvara is checked against the character after it, and matches
+    # don't overlap.
+    assert standardize_key("MMk") == "MMk"
+    assert standardize_key("aMMka") == "aMMka"
+    assert standardize_key("aM") == "aM"
+
+
+def test_to_slp1_keys():
+    queries = ["rAmaH", "saMgacCaDvam", "कृष्णः", "शंकर", "kṣetra", "ದೇವ", "rAmaH"]
+    expected = {}
+    for query in queries:
+        scheme = detect.detect(query)
+        slp1 = sanscript.transliterate(query, scheme, sanscript.SLP1)
+        expected[query] = standardize_key(slp1)
+
+    assert to_slp1_keys(queries) == expected
+    assert to_slp1_keys(["  nara "]) == {"  nara ": "nara"}
+
+
+def test_expand_keys():
+    assert expand_keys(["nara", "nara"], ["mw"]) == {"nara": ["nara"]}
+    assert expand_keys(["nara", "rAjan"], ["apte", "shabdakalpadruma"]) == {
+        "nara": ["nara", "naraH", "naraM"],
+        "rAjan": ["rAjan", "rAjA", "rAja"],
+    }
+    assert expand_keys([""], ["apte"]) == {"": [""]}
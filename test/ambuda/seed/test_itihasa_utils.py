@@ -0,0 +1,83 @@
+from sqlalchemy import text as sql
+
+import ambuda.database as db
+import ambuda.seed.utils.itihasa_utils as iti
+from ambuda.queries import get_engine, get_session
+from ambuda.utils import alignment_report, concordance, parse_html
+
+SLUG = "itihasa-test"
+KANDAS = [
+    iti.Kanda(
+        n=1,
+        sections=[
+            iti.Section(
+                kanda=1,
+                n=1,
+                blocks=[
+                    iti.Verse(
+                        kanda=1,
+                        section=1,
+                        n=1,
+                        lines=[iti.Line(1, 1, 1, "a", "रामः")],
+                    )
+                ],
+            )
+        ],
+    )
+]
+
+
+def _seed_parsed_text(engine) -> int:
+    iti.write_kandas(engine, KANDAS, SLUG, "test", "", "T")
+    session = get_session()
+    text = session.query(db.Text).filter_by(slug=SLUG).one()
+    (block,) = session.query(db.TextBlock).filter_by(text_id=text.id).all()
+    session.add(
+        db.BlockParse(
+            text_id=text.id, block_id=block.id, data="rAmaH\trAma\tpos=n,g=m,c=1,n=s"
+        )
+    )
+    session.commit()
+
+    parse_html.prebuild(engine, SLUG)
+    alignment_report.run(engine, SLUG)
+    concordance.index_text(engine, SLUG)
+    return text.id
+
+
+def test_delete_existing_text__reseed_parsed_text(flask_app):
+    with flask_app.app_context():
+        engine = get_engine()
+        with engine.connect() as conn:
+            conn.execute(sql("PRAGMA foreign_keys = ON"))
+        try:
+            old_id = _seed_parsed_text(engine)
+            session = get_session()
+            for model in (
+                db.BlockParseHtml,
+                db.BlockAlignment,
+                db.TextAlignmentReport,
+                db.LemmaOccurrence,
+            ):
+                assert session.query(model).count()
+
+            iti.delete_existing_text(engine, SLUG)
+            for model in (
+                db.BlockAlignment,
+                db.TextAlignmentReport,
+                db.LemmaOccurrence,
+                db.BlockParse,
+            ):
+                assert not session.query(model).filter_by(text_id=old_id).count()
+            block_ids = {b.id for b in session.query(db.TextBlock)}
+            assert all(
+                r.block_id in block_ids for r in session.query(db.BlockParseHtml)
+            )
+
+            # Seeding the text again works as before.
+            new_id = _seed_parsed_text(engine)
+            assert session.query(db.BlockAlignment).filter_by(text_id=new_id).count()
+        finally:
+            iti.delete_existing_text(engine, SLUG)
+            with engine.connect() as conn:
+                conn.execute(sql("PRAGMA foreign_keys = OFF"))
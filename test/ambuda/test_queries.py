@@ -0,0 +1,120 @@
+from sqlalchemy import event
+
+import ambuda.database as db
+import ambuda.queries as q
+
+
+def test_pad_in_list():
+    assert q._pad_in_list([1]) == [1]
+    assert q._pad_in_list([1, 2, 3]) == [1, 2, 3, 3]
+    assert q._pad_in_list([1, 2, 3, 4]) == [1, 2, 3, 4]
+    assert q._pad_in_list([1, 2, 3, 4, 5]) == [1, 2, 3, 4, 5, 5, 5, 5]
+
+
+def test_dict_entries__reseeded(flask_app):
+    with flask_app.app_context():
+        session = q.get_session()
+        old = db.Dictionary(slug="reseeded", title="test")
+        session.add(old)
+        session.flush()
+        session.add(db.DictionaryEntry(dictionary_id=old.id, key="a", value="old"))
+        session.commit()
+        assert [r.value for r in q.dict_entries(["reseeded"], ["a"])["reseeded"]] == [
+            "old"
+        ]
+
+        # Reseeding keeps the slug but assigns a new ID.
+        session.query(db.DictionaryEntry).filter_by(dictionary_id=old.id).delete()
+        session.delete(old)
+        filler = db.Dictionary(slug="filler", title="test")
+        session.add(filler)
+        session.commit()
+        new = db.Dictionary(slug="reseeded", title="test")
+        session.add(new)
+        session.flush()
+        session.add(db.DictionaryEntry(dictionary_id=new.id, key="a", value="new"))
+        session.commit()
+        assert new.id != old.id
+        assert [r.value for r in q.dict_entries(["reseeded"], ["a"])["reseeded"]] == [
+            "new"
+        ]
+
+        session.query(db.DictionaryEntry).filter_by(dictionary_id=new.id).delete()
+        session.delete(new)
+        session.delete(filler)
+        session.commit()
+
+
+def test_dict_entries(flask_app):
+    with flask_app.app_context():
+        entries = q.dict_entries(["dict-1", "dict-2"], ["agni", "indra"])
+        assert [r.value for r in entries["dict-1"]] == ["<div>fire</div>"]
+        assert [r.value for r in entries["dict-2"]] == ["<div>ignis</div>"]
+        assert entries["dict-1"][0].key == "agni"
+
+
+def test_dict_entries__single_statement(flask_app):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with flask_app.app_context():
+        engine = q.get_engine()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            entries = q.dict_entries(["dict-1"], ["agni"])
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert entries["dict-1"][0].dictionary_slug == "dict-1"
+        assert len(statements) == 1
+
+
+def test_dict_entries__unknown_source(flask_app):
+    with flask_app.app_context():
+        assert q.dict_entries(["unknown"], ["agni"]) == {"unknown": []}
+
+
+def test_section_with_blocks(flask_app):
+    with flask_app.app_context():
+        session = q.get_session()
+        text = session.query(db.Text).filter_by(slug="pariksha").one()
+        section = session.query(db.TextSection).filter_by(text_id=text.id, slug="1")
+        section_id = section.one().id
+        # Insert this block out of order to check that we sort by `n`.
+        block = db.TextBlock(
+            text_id=text.id, section_id=section_id, slug="1.0", xml="<div/>", n=0
+        )
+        session.add(block)
+        session.commit()
+        block_id = block.id
+        session.close()
+
+        try:
+            section = q.section_with_blocks(section_id)
+            assert section.slug == "1"
+            assert section.text.title == "parIkSA"
+            assert [b.slug for b in section.blocks] == ["1.0", "1.1"]
+            assert section.blocks[1].xml == "<div>agniH</div>"
+        finally:
+            session.delete(session.get(db.TextBlock, block_id))
+            session.commit()
+
+
+def test_section_with_blocks__empty_section(flask_app):
+    with flask_app.app_context():
+        session = q.get_session()
+        text = session.query(db.Text).filter_by(slug="pariksha").one()
+        section = (
+            session.query(db.TextSection).filter_by(text_id=text.id, slug="2").one()
+        )
+        session.close()
+
+        section = q.section_with_blocks(section.id)
+        assert section.slug == "2"
+        assert section.blocks == []
+
+
+def test_section_with_blocks__missing(flask_app):
+    with flask_app.app_context():
+        assert q.section_with_blocks(-1) is None
@@ -0,0 +1,107 @@
+import pytest
+
+import ambuda.database as db
+from ambuda.queries import get_engine, get_session
+from ambuda.utils import alignment_report, parse_html
+
+
+@pytest.fixture
+def parsed_text(add_text):
+    """Add a text with a good block, a failed block, and a mismatched block."""
+    agni = "agniH\tagni\tpos=n,g=m,c=1,n=s"
+    ca = "ca\tca\tpos=i"
+    xml = "<lg><l>अग्निः</l></lg>"
+    return add_text(
+        "alignment-test",
+        [(n, xml, data) for n, data in enumerate(["", agni, f"{agni}\n{ca}"], 1)],
+    )
+
+
+def test_run(parsed_text):
+    reports = alignment_report.run(get_engine(), "alignment-test")
+    report = reports["alignment-test"]
+    assert report["num_blocks"] == 3
+    assert report["num_backup"] == 1
+    assert report["num_mismatched"] == 1
+    assert report["seconds"] > 0
+
+    session = get_session()
+    rows = (
+        session.query(db.BlockAlignment)
+        .filter_by(text_id=parsed_text)
+        .order_by(db.BlockAlignment.block_id)
+        .all()
+    )
+    assert [(r.is_backup, r.num_tokens, r.num_unused_tokens) for r in rows] == [
+        (True, 0, 0),
+        (False, 1, 0),
+        (False, 2, 1),
+    ]
+
+    saved = session.query(db.TextAlignmentReport).filter_by(text_id=parsed_text).one()
+    assert saved.num_backup == 1
+    assert saved.num_mismatched == 1
+
+
+def test_run__fills_parse_html_cache(parsed_text):
+    engine = get_engine()
+    alignment_report.run(engine, "alignment-test")
+
+    session = get_session()
+    block_ids = [
+        b.id for b in session.query(db.TextBlock).filter_by(text_id=parsed_text)
+    ]
+    cached = (
+        session.query(db.BlockParseHtml)
+        .filter(db.BlockParseHtml.block_id.in_(block_ids))
+        .order_by(db.BlockParseHtml.block_id)
+        .all()
+    )
+    assert [c.is_backup for c in cached] == [True, False, False]
+
+    # Nothing is left for the prebuild job to do.
+    stats = parse_html.prebuild(engine, "alignment-test")
+    assert stats.num_blocks == 3
+    assert stats.num_aligned == 0
+    assert stats.num_backup == 1
+
+
+def test_run__replaces_old_results(parsed_text):
+    engine = get_engine()
+    alignment_report.run(engine, "alignment-test")
+    alignment_report.run(engine, "alignment-test")
+
+    session = get_session()
+    assert session.query(db.BlockAlignment).filter_by(text_id=parsed_text).count() == 3
+    assert (
+        session.query(db.TextAlignmentReport).filter_by(text_id=parsed_text).count()
+        == 1
+    )
+
+
+def test_run__workers(parsed_text):
+    reports = alignment_report.run(get_engine(), "alignment-test", num_workers=2)
+    assert reports["alignment-test"]["num_blocks"] == 3
+
+    session = get_session()
+    assert session.query(db.BlockAlignment).filter_by(text_id=parsed_text).count() == 3
+
+
+def test_run__keeps_old_results_on_error(parsed_text, monkeypatch):
+    engine = get_engine()
+    alignment_report.run(engine, "alignment-test")
+
+    def fail(batch):
+        raise RuntimeError
+
+    monkeypatch.setattr(parse_html, "align_batch", fail)
+    with pytest.raises(RuntimeError):
+        alignment_report.run(engine, "alignment-test")
+
+    session = get_session()
+    assert session.query(db.BlockAlignment).filter_by(text_id=parsed_text).count() == 3
+
+
+def test_run__missing_text(flask_app):
+    with pytest.raises(ValueError):
+        alignment_report.run(get_engine(), "unknown")
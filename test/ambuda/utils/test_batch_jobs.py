@@ -0,0 +1,46 @@
+import multiprocessing
+
+from sqlalchemy import select
+
+import ambuda.database as db
+from ambuda.queries import get_engine
+from ambuda.utils import batch_jobs
+
+
+def test_iter_batches(flask_app):
+    with flask_app.app_context():
+        engine = get_engine()
+        texts = db.Text.__table__
+        query = select(texts.c.id).order_by(texts.c.id).limit(1)
+        with engine.connect() as conn:
+            expected = conn.execute(select(texts.c.id).order_by(texts.c.id)).all()
+
+        batches = list(batch_jobs.iter_batches(engine, query, texts.c.id))
+        assert all(len(b) == 1 for b in batches)
+        assert [r for b in batches for r in b] == expected
+
+
+def test_imap__no_pool():
+    work = [("a", [1, 2]), ("b", []), ("c", [3])]
+    assert list(batch_jobs.imap(None, sum, work)) == [("a", 3), ("b", 0), ("c", 3)]
+
+
+def test_imap__bounded():
+    num_read = 0
+    num_yielded = 0
+
+    def work():
+        nonlocal num_read
+        for i in range(20):
+            # We read work in this thread, and only a few batches ahead of
+            # the consumer.
+            assert num_read - num_yielded <= batch_jobs.PENDING_PER_WORKER * 2
+            num_read += 1
+            yield i, [i, i]
+
+    with multiprocessing.Pool(2) as pool:
+        results = []
+        for context, total in batch_jobs.imap(pool, sum, work(), num_workers=2):
+            num_yielded += 1
+            results.append((context, total))
+    assert results == [(i, 2 * i) for i in range(20)]
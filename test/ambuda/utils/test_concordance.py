@@ -0,0 +1,63 @@
+import pytest
+
+import ambuda.database as db
+from ambuda.queries import get_engine, get_session
+from ambuda.utils import concordance
+
+
+@pytest.fixture
+def parsed_text(add_text):
+    """Add a text with two parsed blocks, then index it."""
+    agni = "agniH\tagni\tpos=n,g=m,c=1,n=s\nIqe\tId\tpos=v,p=3,n=s,l=lat"
+    agnina = "agninA\tagni\tpos=n,g=m,c=3,n=s\nagnim\tagni\tpos=n,g=m,c=2,n=s"
+    # Add the blocks out of order to check that we index in reading order.
+    text_id = add_text(
+        "concordance-test", [(2, "<div>2</div>", agnina), (1, "<div>1</div>", agni)]
+    )
+    concordance.index_text(get_engine(), "concordance-test")
+    return text_id
+
+
+def test_index_text(parsed_text):
+    # Reindexing replaces the old occurrences.
+    assert concordance.index_text(get_engine(), "concordance-test") == 4
+    session = get_session()
+    assert session.query(db.LemmaOccurrence).filter_by(text_id=parsed_text).count() == 4
+
+
+def test_find(parsed_text):
+    page = concordance.find("Id")
+    assert page.next_after is None
+    (o,) = page.occurrences
+    assert o.text_slug == "concordance-test"
+    assert o.block_slug == "1.1"
+    assert o.position == 1
+    assert o.form == "Iqe"
+    assert o.parse == "pos=v,p=3,n=s,l=lat"
+
+
+def test_find__reading_order(parsed_text):
+    page = concordance.find("agni")
+    matches = [
+        (o.block_slug, o.form)
+        for o in page.occurrences
+        if o.text_slug == "concordance-test"
+    ]
+    assert matches == [("1.1", "agniH"), ("1.2", "agninA"), ("1.2", "agnim")]
+
+
+def test_find__pagination(parsed_text):
+    forms = []
+    after = None
+    while True:
+        page = concordance.find("agni", after=after, limit=2)
+        assert len(page.occurrences) <= 2
+        forms.extend(o.form for o in page.occurrences)
+        after = page.next_after
+        if after is None:
+            break
+    assert forms[-3:] == ["agniH", "agninA", "agnim"]
+
+
+def test_find__missing(parsed_text):
+    assert concordance.find("indra") == ([], None)
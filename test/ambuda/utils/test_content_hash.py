@@ -0,0 +1,51 @@
+import ambuda.database as db
+from ambuda.queries import get_engine, get_session
+from ambuda.utils import content_hash
+
+
+def test_hash_text(flask_app):
+    with flask_app.app_context():
+        engine = get_engine()
+        text_hash = content_hash.hash_text(engine, "pariksha")
+        assert content_hash.hash_text(engine, "pariksha") == text_hash
+
+        session = get_session()
+        text = session.query(db.Text).filter_by(slug="pariksha").one()
+        session.refresh(text)
+        assert text.content_hash == text_hash
+        section_hashes = [s.content_hash for s in text.sections]
+        assert all(section_hashes)
+        # Sections with different content have different hashes.
+        assert len(set(section_hashes)) == len(section_hashes)
+
+
+def test_hash_text__changes_with_content(flask_app):
+    with flask_app.app_context():
+        engine = get_engine()
+        old_hash = content_hash.hash_text(engine, "pariksha")
+
+        session = get_session()
+        block = session.query(db.TextBlock).filter_by(slug="1.1").one()
+        old_xml = block.xml
+        block.xml = "<div>agniH!</div>"
+        session.commit()
+        try:
+            assert content_hash.hash_text(engine, "pariksha") != old_hash
+        finally:
+            block.xml = old_xml
+            session.commit()
+        assert content_hash.hash_text(engine, "pariksha") == old_hash
+
+
+def test_hash_dictionary(flask_app):
+    with flask_app.app_context():
+        engine = get_engine()
+        hash_1 = content_hash.hash_dictionary(engine, "dict-1")
+        hash_2 = content_hash.hash_dictionary(engine, "dict-2")
+        assert hash_1 != hash_2
+        assert content_hash.hash_dictionary(engine, "dict-1") == hash_1
+
+        session = get_session()
+        dictionary = session.query(db.Dictionary).filter_by(slug="dict-1").one()
+        session.refresh(dictionary)
+        assert dictionary.content_hash == hash_1
@@ -0,0 +1,66 @@
+from ambuda.queries import get_engine
+from ambuda.utils import content_hash, dict_artifact
+
+
+def test_get_artifact__missing(tmp_path):
+    assert dict_artifact.get_artifact("") is None
+    assert dict_artifact.get_artifact(str(tmp_path / "missing")) is None
+
+
+def _hash_dictionaries():
+    hashes = {}
+    for slug in ("dict-1", "dict-2"):
+        hashes[slug] = content_hash.hash_dictionary(get_engine(), slug)
+    return hashes
+
+
+def test_build(flask_app, tmp_path, dict_entry):
+    path = tmp_path / "artifact"
+    with flask_app.app_context():
+        hashes = _hash_dictionaries()
+        stats = dict_artifact.build(get_engine(), path)
+        assert stats.num_entries == 2
+        assert stats.num_rendered == 2
+        assert stats.num_reused == 0
+
+        artifact = dict_artifact.get_artifact(str(path))
+        assert len(artifact) == 2
+        assert artifact.is_fresh("dict-1", hashes["dict-1"])
+        assert artifact.is_fresh("dict-2", hashes["dict-2"])
+        assert artifact.get(dict_entry("dict-1", "agni").id) == "<div>fire</div>"
+        assert artifact.get(dict_entry("dict-2", "agni").id) == "<div>ignis</div>"
+
+
+def test_build__reuses_unchanged_entries(flask_app, tmp_path, dict_entry):
+    path = tmp_path / "artifact"
+    with flask_app.app_context():
+        dict_artifact.build(get_engine(), path)
+        stats = dict_artifact.build(get_engine(), path)
+        assert stats.num_rendered == 0
+        assert stats.num_reused == 2
+
+        artifact = dict_artifact.get_artifact(str(path))
+        assert artifact.get(dict_entry("dict-1", "agni").id) == "<div>fire</div>"
+
+
+def test_build__workers(flask_app, tmp_path, dict_entry):
+    path = tmp_path / "artifact"
+    with flask_app.app_context():
+        stats = dict_artifact.build(get_engine(), path, num_workers=2)
+        assert stats.num_entries == 2
+        assert stats.num_rendered == 2
+
+        artifact = dict_artifact.get_artifact(str(path))
+        assert artifact.get(dict_entry("dict-1", "agni").id) == "<div>fire</div>"
+
+
+def test_is_fresh__changed_dictionary(flask_app, tmp_path):
+    path = tmp_path / "artifact"
+    with flask_app.app_context():
+        hashes = _hash_dictionaries()
+        dict_artifact.build(get_engine(), path)
+        artifact = dict_artifact.get_artifact(str(path))
+
+        assert not artifact.is_fresh("dict-1", "new-hash")
+        assert not artifact.is_fresh("dict-1", None)
+        assert not artifact.is_fresh("unknown", hashes["dict-1"])
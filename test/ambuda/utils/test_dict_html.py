@@ -0,0 +1,84 @@
+import ambuda.database as db
+from ambuda.queries import dict_entries, get_engine, get_session
+from ambuda.utils import dict_html, html_cache, xml
+
+
+def _row(slug: str, key: str):
+    (row,) = dict_entries([slug], [key])[slug]
+    return row
+
+
+def _set_cache(entry: db.DictionaryEntry, version: str, html: str):
+    if entry.html_cache:
+        entry.html_cache.version = version
+        entry.html_cache.html = html
+    else:
+        entry.html_cache = db.DictionaryEntryHtml(version=version, html=html)
+    get_session().commit()
+
+
+def test_get_renderer():
+    assert dict_html.get_renderer("apte").rules is xml.apte_cologne_xml
+    assert dict_html.get_renderer("unknown") is dict_html.DEFAULT_RENDERER
+
+
+def test_version():
+    assert dict_html.version("mw") == xml.fingerprint(xml.mw_xml)
+    assert dict_html.version("mw") != dict_html.version("apte")
+
+
+def test_entries_to_html__creates_cache(flask_app, dict_entry):
+    with flask_app.app_context():
+        session = get_session()
+        row = _row("dict-1", "agni")
+        assert dict_html.entries_to_html(session, "dict-1", [row]) == [
+            "<div>fire</div>"
+        ]
+        html_cache.save_cache(session)
+
+        entry = dict_entry("dict-1", "agni")
+        assert entry.html_cache.version == dict_html.version("dict-1")
+        assert entry.html_cache.html == "<div>fire</div>"
+
+
+def test_entries_to_html__reads_cache(flask_app, dict_entry):
+    with flask_app.app_context():
+        session = get_session()
+        entry = dict_entry("dict-2", "agni")
+        _set_cache(entry, dict_html.version("dict-2"), "<div>cached</div>")
+
+        row = _row("dict-2", "agni")
+        assert dict_html.entries_to_html(session, "dict-2", [row]) == [
+            "<div>cached</div>"
+        ]
+
+
+def test_entries_to_html__replaces_stale_cache(flask_app, dict_entry):
+    with flask_app.app_context():
+        session = get_session()
+        entry = dict_entry("dict-2", "agni")
+        _set_cache(entry, "old", "<div>old</div>")
+
+        row = _row("dict-2", "agni")
+        assert dict_html.entries_to_html(session, "dict-2", [row]) == [
+            "<div>ignis</div>"
+        ]
+        html_cache.save_cache(session)
+        session.expire_all()
+        assert dict_entry("dict-2", "agni").html_cache.version == dict_html.version(
+            "dict-2"
+        )
+
+
+def test_prebuild(flask_app, dict_entry):
+    with flask_app.app_context():
+        session = get_session()
+        entry = dict_entry("dict-1", "agni")
+        _set_cache(entry, "old", "<div>old</div>")
+
+        assert dict_html.prebuild(get_engine(), "dict-1") == 1
+        # Nothing is stale, so there's nothing left to render.
+        assert dict_html.prebuild(get_engine(), "dict-1") == 0
+
+        session.expire_all()
+        assert dict_entry("dict-1", "agni").html_cache.html == "<div>fire</div>"
@@ -0,0 +1,146 @@
+import random
+import time
+
+import pytest
+from sqlalchemy import event
+
+import ambuda.database as db
+from ambuda.queries import get_engine, get_session
+from ambuda.utils import dict_index
+from ambuda.utils.dict_index import KeyIndex
+
+KEYS = ["agni", "agnihotra", "agnI", "deva", "devatA", "devI", "indra", "rAma"]
+
+
+@pytest.fixture
+def index():
+    return KeyIndex(KEYS)
+
+
+def test_len_and_contains(index):
+    assert len(index) == len(KEYS)
+    assert "deva" in index
+    assert "dev" not in index
+    assert "zzz" not in index
+
+
+def test_prefix(index):
+    # SLP1 keys sort by code point, so "I" comes before "a".
+    assert index.prefix("dev") == ["devI", "deva", "devatA"]
+    assert index.prefix("dev", limit=2) == ["devI", "deva"]
+    assert index.prefix("agni") == ["agni", "agnihotra"]
+    assert index.prefix("x") == []
+
+
+@pytest.mark.parametrize(
+    "query,max_distance,expected",
+    [
+        ("deva", 0, ["deva"]),
+        ("devA", 1, ["devI", "deva"]),
+        ("devatAH", 1, ["devatA"]),
+        ("devatAH", 2, ["devatA"]),
+        ("indrasya", 2, []),
+        ("agnihotram", 1, ["agnihotra"]),
+        ("rama", 1, ["rAma"]),
+    ],
+)
+def test_fuzzy(index, query, max_distance, expected):
+    assert index.fuzzy(query, max_distance) == expected
+
+
+def test_fuzzy__matches_brute_force():
+    keys = [a + b + c for a in "akdi" for b in "aAgn" for c in ["", "a", "ni", "An"]]
+    index = KeyIndex(keys)
+
+    def distance(a, b):
+        row = list(range(len(b) + 1))
+        for char in a:
+            row = dict_index._next_row(row, char, b)
+        return row[-1]
+
+    for query in ["agni", "dAn", "k", "iAgA", "gaa", "aagn"]:
+        for max_distance in (0, 1, 2):
+            expected = sorted(
+                (distance(k, query), k)
+                for k in set(keys)
+                if distance(k, query) <= max_distance
+            )
+            assert index.fuzzy_matches(query, max_distance) == expected
+
+
+def _random_keys(n: int) -> list[str]:
+    rng = random.Random(0)
+    alphabet = "aAiIuUfeEoOkKgGNcCjJYwWqQRtTdDnpPbBmyrlvSzsh"
+    return ["".join(rng.choices(alphabet, k=rng.randint(3, 12))) for _ in range(n)]
+
+
+def test_suggest__latency_on_large_index(monkeypatch):
+    keys = _random_keys(200_000)
+    index = KeyIndex(keys)
+    monkeypatch.setattr(dict_index, "get_index", lambda slug: index)
+
+    queries = ["agni", "devatA", "indrasya", "rAmAyaRa", keys[0] + "a", keys[1][1:]]
+    for query in queries:
+        start = time.perf_counter()
+        dict_index.suggest(["a", "b"], query)
+        # A full fuzzy search here takes most of a second. Allow some slack
+        # for slow machines.
+        assert time.perf_counter() - start < 0.05, query
+
+    # Keys within one edit are always found.
+    assert keys[0] in dict_index.suggest(["a"], keys[0] + "a")
+
+
+def test_suggest(flask_app):
+    with flask_app.app_context():
+        assert dict_index.suggest(["dict-1", "dict-2"], "agnI") == ["agni"]
+        assert dict_index.suggest(["dict-1"], "indra") == []
+
+
+def test_get_index__unknown(flask_app):
+    with flask_app.app_context():
+        assert dict_index.get_index("unknown") is None
+        assert "unknown" not in dict_index._indices
+        assert dict_index.suggest(["unknown"], "agni") == []
+        assert dict_index.complete(["unknown", "dict-1"], "ag") == ["agni"]
+
+
+def test_get_index__rebuilds_after_change(flask_app, monkeypatch):
+    monkeypatch.setattr(dict_index, "CHECK_INTERVAL", 0)
+    with flask_app.app_context():
+        session = get_session()
+        dictionary = session.query(db.Dictionary).filter_by(slug="dict-1").one()
+        old_hash = dictionary.content_hash
+        index = dict_index.get_index("dict-1")
+        assert dict_index.get_index("dict-1") is index
+
+        dictionary.content_hash = "changed"
+        session.commit()
+        try:
+            assert dict_index.get_index("dict-1") is not index
+        finally:
+            dictionary.content_hash = old_hash
+            session.commit()
+
+
+def test_get_index__checks_periodically(flask_app):
+    with flask_app.app_context():
+        dict_index.get_index("dict-1")
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = get_engine()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            dict_index.get_index("dict-1")
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert statements == []
+
+
+def test_complete(flask_app):
+    with flask_app.app_context():
+        assert dict_index.complete(["dict-1", "dict-2"], "ag") == ["agni"]
+        assert dict_index.complete(["dict-1"], "ind") == []
@@ -0,0 +1,20 @@
+from ambuda.utils import dict_lookup
+
+
+def test_fetch_entries_batch(flask_app):
+    with flask_app.app_context():
+        results = dict_lookup.fetch_entries_batch(
+            ["dict-1", "dict-2"], ["agni", "अग्नि", "indra"]
+        )
+    assert results["agni"] == {
+        "dict-1": ["<div>fire</div>"],
+        "dict-2": ["<div>ignis</div>"],
+    }
+    assert results["अग्नि"] == results["agni"]
+    assert results["indra"] == {"dict-1": [], "dict-2": []}
+
+
+def test_fetch_entries_batch__slp1(flask_app):
+    with flask_app.app_context():
+        results = dict_lookup.fetch_entries_batch(["dict-1"], ["agni"], is_slp1=True)
+    assert results == {"agni": {"dict-1": ["<div>fire</div>"]}}
@@ -0,0 +1,25 @@
+from ambuda.queries import get_engine
+from ambuda.utils import dict_search
+
+
+def test_definition_text():
+    assert dict_search.definition_text("mw", "<body>fire <i>of</i> god</body>") == (
+        "fire of god"
+    )
+
+
+def test_index_and_search(flask_app):
+    with flask_app.app_context():
+        engine = get_engine()
+        assert dict_search.index_dictionary(engine, "dict-1") == 1
+        assert dict_search.index_dictionary(engine, "dict-2") == 1
+        # Reindexing replaces the old documents.
+        assert dict_search.index_dictionary(engine, "dict-1") == 1
+
+        (result,) = dict_search.search(engine, "fire")
+        assert result.source == "dict-1"
+        assert result.key == "agni"
+        assert "<mark>fire</mark>" in result.snippet
+
+        assert dict_search.search(engine, "ignis", sources=["dict-1"]) == []
+        assert dict_search.search(engine, "water") == []
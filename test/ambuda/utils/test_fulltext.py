@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import create_engine
+
+from ambuda.utils import fulltext
+from ambuda.utils.fulltext import Document
+
+DOCUMENTS = [
+    Document(1, "a", "fire; the god of fire"),
+    Document(2, "a", "water"),
+    Document(3, "b", "a sacrificial fire"),
+    Document(4, "b", "अग्नि आग"),
+]
+
+
+@pytest.fixture(params=[fulltext.MemoryBackend, fulltext.SQLiteBackend])
+def backend_and_conn(request):
+    engine = create_engine("sqlite://")
+    backend = request.param()
+    with engine.begin() as conn:
+        backend.ensure_index(conn, "test")
+        backend.add(conn, "test", DOCUMENTS)
+        yield backend, conn
+
+
+def test_tokenize():
+    assert fulltext.tokenize("The god, of FIRE") == ["the", "god", "of", "fire"]
+    assert fulltext.tokenize("अग्नि: आग") == ["अग्नि", "आग"]
+
+
+def test_get_backend():
+    assert isinstance(
+        fulltext.get_backend(create_engine("sqlite://")), fulltext.SQLiteBackend
+    )
+
+
+def test_has_index(backend_and_conn):
+    backend, conn = backend_and_conn
+    assert backend.has_index(conn, "test")
+    assert not backend.has_index(conn, "missing")
+
+
+def test_search(backend_and_conn):
+    backend, conn = backend_and_conn
+    hits = backend.search(conn, "test", "FIRE")
+    # Document 1 mentions "fire" twice, so it ranks first.
+    assert [h.id for h in hits] == [1, 3]
+    assert "<mark>fire</mark>" in hits[0].snippet
+
+    assert [h.id for h in backend.search(conn, "test", "god fire")] == [1]
+    assert [h.id for h in backend.search(conn, "test", "आग")] == [4]
+    assert backend.search(conn, "test", "earth") == []
+    assert backend.search(conn, "test", "  ") == []
+
+
+def test_search__groups(backend_and_conn):
+    backend, conn = backend_and_conn
+    assert [h.id for h in backend.search(conn, "test", "fire", groups=["b"])] == [3]
+    assert backend.search(conn, "test", "fire", groups=[]) == []
+
+
+def test_search__escapes_snippets(backend_and_conn):
+    backend, conn = backend_and_conn
+    backend.add(conn, "test", [Document(5, "c", "<b>smoke</b> & fire")])
+    (hit,) = backend.search(conn, "test", "smoke")
+    assert "&lt;b&gt;<mark>smoke</mark>&lt;/b&gt; &amp; fire" in hit.snippet
+
+
+def test_delete_group(backend_and_conn):
+    backend, conn = backend_and_conn
+    backend.delete_group(conn, "test", "a")
+    assert [h.id for h in backend.search(conn, "test", "fire")] == [3]
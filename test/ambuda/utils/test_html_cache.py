@@ -0,0 +1,12 @@
+from ambuda.utils import html_cache, xml
+
+
+def test_rules_version():
+    assert html_cache.rules_version(xml.mw_xml) == xml.fingerprint(xml.mw_xml)
+    assert html_cache.rules_version(xml.mw_xml) != html_cache.rules_version(xml.tei_xml)
+
+
+def test_rules_version__render_version(monkeypatch):
+    before = html_cache.rules_version(xml.mw_xml)
+    monkeypatch.setattr(xml, "RENDER_VERSION", xml.RENDER_VERSION + 1)
+    assert html_cache.rules_version(xml.mw_xml) != before
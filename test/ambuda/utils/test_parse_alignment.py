@@ -4,10 +4,11 @@ import pytest
 
 from ambuda.utils.parse_alignment import (
     _iter_text_with_parent,
+    align,
     get_padas_for_text,
     num_vowels,
 )
-from ambuda.utils.word_parses import Token
+from ambuda.utils.word_parses import Token, extract_tokens
 
 
 @pytest.mark.parametrize(
@@ -49,3 +50,26 @@ def test_get_padas_for_text(text, token_strings, num_kept):
     tokens = [Token(t, "", "", "", False) for t in token_strings]
     chunks = get_padas_for_text(text, iter(tokens))
     assert chunks[0].tokens == tokens[:num_kept]
+
+
+def test_align():
+    tokens = extract_tokens("agniH\tagni\tpos=n,g=m,c=1,n=s")
+    html, is_backup, num_unused_tokens = align("<p>अग्निः</p>", tokens)
+    assert not is_backup
+    assert num_unused_tokens == 0
+    assert 'lemma="agni"' in html
+
+
+def test_align__unused_tokens():
+    tokens = extract_tokens("agniH\tagni\tpos=n,g=m,c=1,n=s\nca\tca\tpos=i")
+    html, is_backup, num_unused_tokens = align("<p>अग्निः</p>", tokens)
+    assert not is_backup
+    assert num_unused_tokens == 1
+
+
+def test_align__backup():
+    # There are more words than tokens, so alignment fails.
+    tokens = extract_tokens("agniH\tagni\tpos=n,g=m,c=1,n=s")
+    html, is_backup, _ = align("<p>अग्निः अग्निः</p>", tokens)
+    assert is_backup
+    assert "bg-red-100" in html
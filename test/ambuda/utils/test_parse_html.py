@@ -0,0 +1,106 @@
+import pytest
+
+import ambuda.database as db
+from ambuda.queries import get_engine, get_session
+from ambuda.utils import parse_html
+from ambuda.utils.word_parses import pack_tokens
+
+GOOD = "agniH\tagni\tpos=n,g=m,c=1,n=s"
+# Has too few tokens for its block, so alignment fails.
+BAD = ""
+
+
+@pytest.fixture
+def parsed_text(add_text):
+    """Add a text with one well-aligned block and one misaligned block."""
+    xml = "<lg><l>अग्निः</l></lg>"
+    text_id = add_text("parse-html-test", [(1, xml, GOOD), (2, xml, BAD)])
+    return (
+        get_session()
+        .query(db.TextBlock)
+        .filter_by(text_id=text_id)
+        .order_by(db.TextBlock.n)
+        .all()
+    )
+
+
+def _parse(block):
+    return get_session().query(db.BlockParse).filter_by(block_id=block.id).one()
+
+
+def _cached(block):
+    session = get_session()
+    session.expire_all()
+    return session.query(db.BlockParseHtml).filter_by(block_id=block.id).first()
+
+
+def test_cache_key():
+    key = parse_html.cache_key("<p>a</p>", GOOD, None)
+    assert key == parse_html.cache_key("<p>a</p>", GOOD, None)
+    assert key != parse_html.cache_key("<p>b</p>", GOOD, None)
+    assert key != parse_html.cache_key("<p>a</p>", BAD, None)
+    assert key != parse_html.cache_key("<p>a</p>", GOOD, pack_tokens(GOOD))
+
+
+def test_aligned_html(parsed_text):
+    block, _ = parsed_text
+    session = get_session()
+
+    html = parse_html.aligned_html(session, block, _parse(block))
+    assert 'lemma="agni"' in html
+    session.commit()
+
+    cached = _cached(block)
+    assert cached.html == html
+    assert not cached.is_backup
+
+    # Cache hits return the stored HTML.
+    cached.html = "<p>cached</p>"
+    session.commit()
+    assert parse_html.aligned_html(session, block, _parse(block)) == "<p>cached</p>"
+
+
+def test_aligned_html__stale(parsed_text):
+    block, _ = parsed_text
+    session = get_session()
+    parse_html.aligned_html(session, block, _parse(block))
+    session.commit()
+    old_key = _cached(block).key
+
+    # Packing the parse changes the key, so we align again.
+    parse = _parse(block)
+    parse.tokens = pack_tokens(GOOD)
+    session.commit()
+    html = parse_html.aligned_html(session, block, _parse(block))
+    session.commit()
+
+    cached = _cached(block)
+    assert cached.key != old_key
+    assert cached.html == html
+
+
+def test_prebuild(parsed_text):
+    good, bad = parsed_text
+    engine = get_engine()
+
+    stats = parse_html.prebuild(engine, "parse-html-test")
+    assert stats.num_blocks == 2
+    assert stats.num_aligned == 2
+    assert stats.num_backup == 1
+    assert not _cached(good).is_backup
+    assert _cached(bad).is_backup
+
+    # Fresh blocks are skipped, but still counted.
+    stats = parse_html.prebuild(engine, "parse-html-test")
+    assert stats.num_blocks == 2
+    assert stats.num_aligned == 0
+    assert stats.num_backup == 1
+
+
+def test_prebuild__workers(parsed_text):
+    good, bad = parsed_text
+    stats = parse_html.prebuild(get_engine(), "parse-html-test", num_workers=2)
+    assert stats.num_blocks == 2
+    assert stats.num_aligned == 2
+    assert stats.num_backup == 1
+    assert _cached(bad).is_backup
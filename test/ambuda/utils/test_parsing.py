@@ -1,6 +1,13 @@
 import pytest
 
-from ambuda.utils.word_parses import readable_parse
+from ambuda.models.parse import BlockParse
+from ambuda.utils.word_parses import (
+    block_tokens,
+    extract_tokens,
+    pack_tokens,
+    readable_parse,
+    unpack_tokens,
+)
 
 
 @pytest.mark.parametrize(
@@ -21,3 +28,48 @@ from ambuda.utils.word_parses import readable_parse
 )
 def test_readable_parse(raw, expected):
     assert readable_parse(raw) == expected
+
+
+BLOB = "\n".join(
+    [
+        "agniH\tagni\tpos=n,g=m,c=1,n=s",
+        "Iqe\tId\tpos=v,p=1,n=s,l=lan_unaug",
+        "deva\tdeva\tpos=n,g=m,comp=y",
+        "ca\tca\tpos=i",
+        # Unknown values and field orders are kept as-is.
+        "x\ty\tpos=n,c=1,g=m,n=s",
+        "x\ty\tpos=n,g=m,c=1,n=s,extra=1",
+    ]
+)
+
+
+def test_pack_tokens__round_trip():
+    assert unpack_tokens(pack_tokens(BLOB)) == extract_tokens(BLOB)
+
+
+def test_pack_tokens__empty():
+    assert unpack_tokens(pack_tokens("")) == []
+
+
+def test_pack_tokens__unicode():
+    blob = "अग्निः\tअग्नि\tpos=n,g=m,c=1,n=s"
+    assert unpack_tokens(pack_tokens(blob)) == extract_tokens(blob)
+
+
+def test_pack_tokens__is_compact():
+    assert len(pack_tokens(BLOB)) < len(BLOB.encode("utf-8"))
+
+
+def test_unpack_tokens__unknown_version():
+    packed = pack_tokens(BLOB)
+    with pytest.raises(ValueError):
+        unpack_tokens(b"\xff" + packed[1:])
+
+
+def test_block_tokens():
+    parse = BlockParse(data=BLOB, tokens=pack_tokens(BLOB))
+    assert block_tokens(parse) == extract_tokens(BLOB)
+
+    # Without packed data, fall back to the raw data.
+    parse = BlockParse(data=BLOB)
+    assert block_tokens(parse) == extract_tokens(BLOB)
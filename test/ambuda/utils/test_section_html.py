@@ -0,0 +1,96 @@
+import json
+
+import ambuda.database as db
+from ambuda.queries import get_engine, get_session
+from ambuda.utils import html_cache, section_html
+from ambuda.utils.json_serde import AmbudaJSONEncoder
+from ambuda.views.reader.schema import Block, Section
+
+
+def _section(slug: str) -> db.TextSection:
+    session = get_session()
+    text = session.query(db.Text).filter_by(slug="pariksha").one()
+    return session.query(db.TextSection).filter_by(text_id=text.id, slug=slug).one()
+
+
+def _clear_cache():
+    session = get_session()
+    session.query(db.TextSectionHtml).delete()
+    session.commit()
+
+
+def test_render_blocks(flask_app):
+    with flask_app.app_context():
+        blocks = section_html.render_blocks(_section("1").blocks)
+        assert json.loads(blocks) == [
+            {"slug": "1.1", "mula": "<section>agniH</section>"}
+        ]
+
+
+def test_make_payload():
+    blocks = [Block(slug="1.1", mula='<s-lg>अ"</s-lg>')]
+    expected = json.dumps(
+        Section(
+            text_title="पाठः",
+            section_title="1",
+            blocks=blocks,
+            prev_url=None,
+            next_url="/texts/t/2",
+        ),
+        cls=AmbudaJSONEncoder,
+    )
+    blocks_json = json.dumps([{"slug": "1.1", "mula": '<s-lg>अ"</s-lg>'}])
+    assert (
+        section_html.make_payload("पाठः", "1", blocks_json, None, "/texts/t/2")
+        == expected
+    )
+
+
+def test_section_blocks(flask_app):
+    with flask_app.app_context():
+        _clear_cache()
+        session = get_session()
+        section = _section("1")
+        blocks = section_html.section_blocks(session, section.id, None)
+        html_cache.save_cache(session)
+
+        cached = (
+            session.query(db.TextSectionHtml).filter_by(section_id=section.id).one()
+        )
+        assert cached.version == section_html.version()
+        assert cached.blocks == blocks
+        assert section_html.section_blocks(session, section.id, cached) == blocks
+
+
+def test_section_blocks__stale(flask_app):
+    with flask_app.app_context():
+        _clear_cache()
+        session = get_session()
+        section = _section("1")
+        stale = db.TextSectionHtml(section_id=section.id, version="old", blocks="[]")
+        session.add(stale)
+        session.commit()
+
+        blocks = section_html.section_blocks(session, section.id, stale)
+        html_cache.save_cache(session)
+        assert json.loads(blocks)[0]["slug"] == "1.1"
+
+        cached = (
+            session.query(db.TextSectionHtml).filter_by(section_id=section.id).one()
+        )
+        assert cached.version == section_html.version()
+        assert cached.blocks == blocks
+
+
+def test_prebuild(flask_app):
+    with flask_app.app_context():
+        _clear_cache()
+        assert section_html.prebuild(get_engine(), "pariksha") == 2
+        assert section_html.prebuild(get_engine(), "pariksha") == 0
+
+        session = get_session()
+        section = _section("1")
+        cached = (
+            session.query(db.TextSectionHtml).filter_by(section_id=section.id).one()
+        )
+        assert json.loads(cached.blocks)[0]["slug"] == "1.1"
@@ -0,0 +1,75 @@
+import json
+from xml.etree import ElementTree as ET
+
+import pytest
+
+from ambuda.utils import text_exports
+from ambuda.utils.text_exports import ExportBlock
+
+BLOCKS = [
+    ExportBlock("1", "1.head", "<head>prathamaH</head>"),
+    ExportBlock("1", "1.1", "<lg><l>a <seg>b</seg></l><l>c</l></lg>"),
+    ExportBlock("2", "2.1", "<p>d\n  e</p>"),
+]
+
+
+@pytest.mark.parametrize(
+    "blob,expected",
+    [
+        ("<lg><l>a <seg>b</seg></l><l> c </l></lg>", "a b\nc"),
+        ("<p>d\n  e</p>", "d e"),
+        ("<head>x</head>", "x"),
+    ],
+)
+def test_block_to_plain_text(blob, expected):
+    assert text_exports.block_to_plain_text(blob) == expected
+
+
+def test_to_plain_text():
+    output = "".join(text_exports.to_plain_text(BLOCKS))
+    assert output == "prathamaH\n\na b\nc\n\nd e\n\n"
+
+
+def test_to_tei_xml():
+    header = "<teiHeader><fileDesc><titleStmt><title>T</title></titleStmt>"
+    header += "</fileDesc></teiHeader>"
+    output = "".join(text_exports.to_tei_xml(header, BLOCKS))
+
+    ns = {"tei": "http://www.tei-c.org/ns/1.0"}
+    xml = ET.fromstring(output.encode("utf-8"))
+    assert xml.find("./tei:teiHeader/tei:fileDesc/tei:titleStmt/tei:title", ns).text
+    divs = xml.findall("./tei:text/tei:body/tei:div", ns)
+    assert [d.get("n") for d in divs] == ["1", "2"]
+    assert [len(d) for d in divs] == [2, 1]
+
+
+def test_to_tei_xml__no_blocks():
+    output = "".join(text_exports.to_tei_xml(None, []))
+    xml = ET.fromstring(output.encode("utf-8"))
+    assert len(xml.find("./{http://www.tei-c.org/ns/1.0}text/")) == 0
+
+
+def test_to_json_lines():
+    lines = "".join(text_exports.to_json_lines(BLOCKS)).splitlines()
+    assert [json.loads(x) for x in lines] == [
+        {
+            "section": "1",
+            "block": "1.head",
+            "xml": "<head>prathamaH</head>",
+            "text": "prathamaH",
+        },
+        {
+            "section": "1",
+            "block": "1.1",
+            "xml": "<lg><l>a <seg>b</seg></l><l>c</l></lg>",
+            "text": "a b\nc",
+        },
+        {"section": "2", "block": "2.1", "xml": "<p>d\n  e</p>", "text": "d e"},
+    ]
+
+
+def test_chunked(monkeypatch):
+    monkeypatch.setattr(text_exports, "CHUNK_SIZE", 4)
+    chunks = list(text_exports._chunked(["ab", "cd", "e", "fgh", "i"]))
+    assert chunks == ["abcd", "efgh", "i"]
+    assert list(text_exports._chunked([])) == []
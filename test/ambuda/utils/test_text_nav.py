@@ -0,0 +1,61 @@
+import pytest
+
+import ambuda.database as db
+from ambuda.queries import get_session
+from ambuda.utils import text_nav
+
+
+def test_get(flask_app):
+    with flask_app.app_context():
+        text_nav.invalidate()
+        nav = text_nav.get("pariksha")
+        assert nav.slug == "pariksha"
+        assert nav.title == "parIkSA"
+        assert [s.slug for s in nav.sections] == ["1", "2"]
+        # Indices are cached.
+        assert text_nav.get("pariksha") is nav
+
+
+def test_get__missing(flask_app):
+    with flask_app.app_context():
+        assert text_nav.get("unknown") is None
+
+
+def test_prev_cur_next(flask_app):
+    with flask_app.app_context():
+        nav = text_nav.get("pariksha")
+        first, second = nav.sections
+
+        assert nav.prev_cur_next("1") == (None, first, second)
+        assert nav.prev_cur_next("2") == (first, second, None)
+        with pytest.raises(KeyError):
+            nav.prev_cur_next("3")
+
+
+def test_invalidate(flask_app):
+    with flask_app.app_context():
+        nav = text_nav.get("pariksha")
+        text_nav.invalidate("pariksha")
+        assert text_nav.get("pariksha") is not nav
+
+        nav = text_nav.get("pariksha")
+        text_nav.invalidate()
+        assert text_nav.get("pariksha") is not nav
+
+
+def test_get__content_hash_changed(flask_app):
+    with flask_app.app_context():
+        nav = text_nav.get("pariksha")
+        session = get_session()
+        text = session.query(db.Text).filter_by(slug="pariksha").one()
+        old_hash = text.content_hash
+        text.content_hash = "changed"
+        session.commit()
+
+        try:
+            new_nav = text_nav.get("pariksha")
+            assert new_nav is not nav
+            assert new_nav.content_hash == "changed"
+        finally:
+            text.content_hash = old_hash
+            session.commit()
@@ -0,0 +1,64 @@
+from sqlalchemy import inspect
+
+import ambuda.database as db
+from ambuda.queries import get_engine, get_session
+from ambuda.utils import text_stats
+
+HEADER = """
+<teiHeader>
+  <fileDesc>
+    <titleStmt>
+      <title>Pariksha</title>
+      <author>Anonymous</author>
+    </titleStmt>
+    <publicationStmt>
+      <publisher>Ambuda</publisher>
+      <availability><p>Public domain.</p></availability>
+    </publicationStmt>
+  </fileDesc>
+</teiHeader>
+"""
+
+
+def test_update(flask_app):
+    with flask_app.app_context():
+        stats = text_stats.update(get_engine(), "pariksha")
+        assert stats["num_sections"] == 2
+        assert stats["num_blocks"] == 1
+        assert stats["num_parsed_blocks"] == 1
+        assert stats["num_characters"] == len("agniH")
+        # The test text has no header.
+        assert stats["title"] is None
+
+        session = get_session()
+        text = session.query(db.Text).filter_by(slug="pariksha").one()
+        assert text.stats.num_blocks == 1
+
+
+def test_update__with_header(flask_app):
+    with flask_app.app_context():
+        session = get_session()
+        text = session.query(db.Text).filter_by(slug="pariksha").one()
+        text.header = HEADER
+        session.commit()
+        try:
+            stats = text_stats.update(get_engine(), "pariksha")
+        finally:
+            text.header = None
+            session.commit()
+
+        assert stats["title"] == "Pariksha"
+        assert stats["author"] == "Anonymous"
+        assert stats["publisher"] == "Ambuda"
+        assert "Public domain." in stats["availability"]
+
+        # Updating again replaces the old row.
+        text_stats.update(get_engine(), "pariksha")
+        assert session.query(db.TextStats).filter_by(text_id=text.id).count() == 1
+
+
+def test_text_header_is_deferred(flask_app):
+    with flask_app.app_context():
+        session = get_session()
+        text = session.query(db.Text).filter_by(slug="pariksha").one()
+        assert "header" in inspect(text).unloaded
@@ -0,0 +1,68 @@
+import pytest
+from indic_transliteration import sanscript
+
+from ambuda.utils import transliteration as t
+
+SLP1 = sanscript.SLP1
+DEVANAGARI = sanscript.DEVANAGARI
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    t.cache_clear()
+    yield
+    t.cache_clear()
+
+
+def test_transliterate():
+    assert t.transliterate("rAmaH", SLP1, DEVANAGARI) == "रामः"
+    assert t.transliterate("rAmaH", SLP1, DEVANAGARI) == "रामः"
+    assert t.transliterate("rAma", sanscript.HK, sanscript.IAST) == "rāma"
+
+    info = t.cache_info()
+    assert info[SLP1, DEVANAGARI] == t.CacheInfo(
+        hits=1, misses=1, maxsize=t.CACHE_SIZE, currsize=1
+    )
+    assert info[sanscript.HK, sanscript.IAST].misses == 1
+
+
+def test_transliterate__evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(t, "CACHE_SIZE", 2)
+    t.cache_clear()
+
+    t.transliterate("a", SLP1, DEVANAGARI)
+    t.transliterate("i", SLP1, DEVANAGARI)
+    t.transliterate("a", SLP1, DEVANAGARI)
+    t.transliterate("u", SLP1, DEVANAGARI)
+    # "i" was evicted, but "a" was not.
+    t.transliterate("a", SLP1, DEVANAGARI)
+    t.transliterate("i", SLP1, DEVANAGARI)
+
+    info = t.cache_info()[SLP1, DEVANAGARI]
+    assert (info.hits, info.misses, info.currsize) == (2, 4, 2)
+
+
+@pytest.mark.parametrize(
+    "strings",
+    [
+        [],
+        ["rAmaH"],
+        ["rAmaH", "vAk", "rAmaH", "samit", "1.1", "|"],
+        # Toggles and newlines change how later text is read, so we don't batch
+        # strings that contain them.
+        ["##rAma", "sItA##", "lak\nzmaRa", "<b>rAma</b>"],
+    ],
+)
+def test_transliterate_many(strings):
+    expected = [sanscript.transliterate(s, SLP1, DEVANAGARI) for s in strings]
+    assert t.transliterate_many(strings, SLP1, DEVANAGARI) == expected
+    # Repeat with a warm cache.
+    assert t.transliterate_many(strings, SLP1, DEVANAGARI) == expected
+
+
+def test_transliterate_many__uses_cache():
+    t.transliterate("rAmaH", SLP1, DEVANAGARI)
+    t.transliterate_many(["rAmaH", "sItA", "sItA"], SLP1, DEVANAGARI)
+
+    info = t.cache_info()[SLP1, DEVANAGARI]
+    assert (info.hits, info.misses, info.currsize) == (1, 2, 2)
@@ -0,0 +1,104 @@
+import pytest
+
+from ambuda.queries import get_engine
+from ambuda.utils import verse_search
+
+VERSE = (
+    "<lg><l>धर्मक्षेत्रे कुरुक्षेत्रे समवेता युयुत्सवः ।</l>"
+    "<l>मामकाः पाण्डवाश्चैव किमकुर्वत सञ्जय ॥ १ ॥</l></lg>"
+)
+
+
+@pytest.mark.parametrize(
+    "slp1,expected",
+    [
+        ("rAmaH", "rAMa"),
+        ("rAma", "rAMa"),
+        ("saYjaya", "saMjaya"),
+        ("saMjaya", "saMjaya"),
+        ("uttama", "utaMa"),
+        ("||1||", ""),
+    ],
+)
+def test_normalize_key(slp1, expected):
+    assert verse_search.normalize_key(slp1) == expected
+
+
+def test_encode():
+    assert verse_search._encode("rAma") == "ra1ma"
+    assert verse_search._trigrams("rAma") == ["ra1m", "a1ma"]
+    assert verse_search._trigrams("ca") == []
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("सञ्जय", ["saMjaya"]),
+        ("sañjaya", ["saMjaya"]),
+        ("saMjaya", ["saMjaya"]),
+        ("dharmakSetre kurukSetre", ["DarMakzetre", "kurukzetre"]),
+        ("  ", []),
+    ],
+)
+def test_query_keys(query, expected):
+    assert verse_search.query_keys(query) == expected
+
+
+def test_block_words():
+    words = verse_search._block_words(VERSE)
+    assert words[0] == ("धर्मक्षेत्रे", "DarMakzetre")
+    assert ("।", "") in words
+    assert words[-4] == ("सञ्जय", "saMjaya")
+
+
+@pytest.fixture
+def verse_text(add_text):
+    """Add a text with one verse, then index it."""
+    add_text("gita-test", [(1, VERSE, None)], title="gItA")
+    engine = get_engine()
+    verse_search.index_text(engine, "gita-test")
+    verse_search.index_text(engine, "pariksha")
+    yield engine
+
+    verse_search.index_text(engine, "pariksha")
+
+
+def test_index_text(verse_text):
+    # Reindexing replaces the old documents.
+    assert verse_search.index_text(verse_text, "gita-test") == 1
+    assert len(verse_search.search(verse_text, "saMjaya")) == 1
+
+
+def test_search__whole_word(verse_text):
+    (result,) = verse_search.search(verse_text, "सञ्जय")
+    assert result.text_slug == "gita-test"
+    assert result.section_slug == "1"
+    assert result.block_slug == "1.1"
+    assert "<mark>सञ्जय</mark>" in result.snippet
+    assert "<mark>" not in result.snippet.replace("<mark>सञ्जय</mark>", "")
+
+
+def test_search__all_words(verse_text):
+    assert len(verse_search.search(verse_text, "dharmakSetre kurukSetre")) == 1
+    assert verse_search.search(verse_text, "dharmakSetre agniH") == []
+
+
+def test_search__case_sensitive(verse_text):
+    # "pANDavA" is in the verse, but "paNDava" is not.
+    assert len(verse_search.search(verse_text, "pANDavA")) == 1
+    assert verse_search.search(verse_text, "paNDava") == []
+
+
+def test_search__inside_compound(verse_text):
+    (result,) = verse_search.search(verse_text, "akurvata")
+    assert "<mark>किमकुर्वत</mark>" in result.snippet
+
+    (result,) = verse_search.search(verse_text, "kSetre")
+    assert "<mark>धर्मक्षेत्रे</mark>" in result.snippet
+    assert "<mark>कुरुक्षेत्रे</mark>" in result.snippet
+
+
+def test_search__text_slugs(verse_text):
+    assert verse_search.search(verse_text, "saMjaya", text_slugs=["pariksha"]) == []
+    (result,) = verse_search.search(verse_text, "agniH", text_slugs=["pariksha"])
+    assert result.block_slug == "1.1"
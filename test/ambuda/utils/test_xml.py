@@ -1,6 +1,11 @@
 from xml.etree import ElementTree as ET
 
+import pytest
+
+import ambuda.database as db
 import ambuda.utils.xml as x
+from ambuda.queries import get_session
+from ambuda.utils import dict_html
 
 
 def test_delete():
@@ -122,3 +127,169 @@ def test_parse_tei_header__elements_missing():
 
 def test_parse_tei_header__undefined():
     assert x.parse_tei_header(None) == {}
+
+
+def test_fingerprint():
+    transforms = {"div": x.elem("p"), "span": None}
+    assert x.fingerprint(transforms) == x.fingerprint(
+        {"div": x.elem("p"), "span": None}
+    )
+    # Changes to tags, attributes, and inserted text all change the fingerprint.
+    assert x.fingerprint(transforms) != x.fingerprint(
+        {"div": x.elem("section"), "span": None}
+    )
+    assert x.fingerprint(transforms) != x.fingerprint(
+        {"div": x.elem("p", {"class": "foo"}), "span": None}
+    )
+    assert x.fingerprint(transforms) != x.fingerprint(
+        {"div": x.elem("p", text_before="("), "span": None}
+    )
+    assert x.fingerprint(transforms) != x.fingerprint(
+        {"div": x.elem("p"), "span": x.sanskrit_text}
+    )
+
+
+def test_fingerprint__render_version(monkeypatch):
+    before = x.fingerprint(x.tei_xml)
+    monkeypatch.setattr(x, "RENDER_VERSION", x.RENDER_VERSION + 1)
+    assert x.fingerprint(x.tei_xml) != before
+
+
+def _reference_transform(xml, transforms):
+    """Apply each rule directly, as `transform` did before we compiled rules."""
+    for el in xml.iter("*"):
+        if el.tag in transforms:
+            fn = transforms[el.tag]
+            if fn is None:
+                el.tag = el.text = None
+            else:
+                fn(el)
+    return ET.tostring(xml, encoding="utf-8").decode("utf-8")
+
+
+@pytest.mark.parametrize(
+    "transforms,blob",
+    [
+        (
+            x.mw_xml,
+            "<H1><h><key1>agni</key1><key2>agni/</key2></h><body><s>agni/</s> "
+            "<lex>m.</lex> (<ab>cf.</ab> <s>ag</s>) fire, <p>sacrificial "
+            "<b>fire</b></p> <ls>RV.</ls> <etc/> <eq/> <cf/> <see/> "
+            "<sr/>word<root/></body><tail><L>1</L><pc>5,1</pc></tail></H1>",
+        ),
+        (
+            x.apte_cologne_xml,
+            '<H1><body><b>x</b><lb/> <span class="foo">y</span><i>z</i>'
+            "<lbinfo n='1'/><s>deva</s></body></H1>",
+        ),
+        (
+            x.apte_uoh_xml,
+            "<lexhead><dentry>rAma</dentry><prAwipaxikam>rAma</prAwipaxikam>"
+            "<grammar>pum</grammar><sense>x <citation>y</citation></sense>"
+            "<sense>z</sense></lexhead>",
+        ),
+        (
+            x.amarakosha_xml,
+            "<H1><body><lex>m</lex><quote><lg><l>a</l><l>b</l></lg></quote>"
+            "</body></H1>",
+        ),
+        (
+            x.tei_header_xml,
+            '<availability status="free"><licence><ref target="http://x" n="1">'
+            "link</ref></licence><date>2022</date> tail</availability>",
+        ),
+        (
+            x.tei_xml,
+            '<lg xml:id="Test"><l>a<note>n</note> x</l><l>b <hi>c</hi><lb/></l></lg>',
+        ),
+    ],
+)
+def test_transform__matches_reference(transforms, blob):
+    expected = _reference_transform(ET.fromstring(blob), transforms)
+    assert x.transform(ET.fromstring(blob), transforms) == expected
+
+
+def test_transform__rule_variants():
+    blob = '<a x="1" y="2">text<b>child</b>tail<c/><d>gone</d> end</a>'
+    transforms = {
+        "a": x.elem("div", text_before="[", text_after="]"),
+        "b": x.Rule("span", x._rename({"x": "data-x", "z": "data-z"}), "<", ">"),
+        "c": lambda el: el.set("seen", "yes"),
+        "d": x._delete,
+    }
+    expected = _reference_transform(ET.fromstring(blob), transforms)
+    assert x.transform(ET.fromstring(blob), transforms) == expected
+
+
+def test_compile_rules():
+    rename = x._rename({"target": "href"})
+    ops = x.compile_rules(
+        {
+            "hide": None,
+            "delete": x._delete,
+            "set": x.elem("p", {"class": "c"}, "(", ")"),
+            "rename": x.Rule("a", rename),
+            "call": x.sanskrit_text,
+        }
+    )
+    assert ops == {
+        "hide": (x._HIDE,),
+        "delete": (x._DELETE,),
+        "set": (x._SET, "p", {"class": "c"}, "(", ")"),
+        "rename": (x._RENAME, "a", {"target": "href"}, "", ""),
+        "call": (x._CALL, x.sanskrit_text),
+    }
+
+
+@pytest.mark.parametrize(
+    "transforms,blob",
+    [
+        (
+            {"a": x.elem("p", text_after="!"), "b": x.elem("q", text_after="?")},
+            "<r><a>x<b>y<c>z</c>w</b>v</a>u</r>",
+        ),
+        (
+            {"a": x.elem("p", text_after="!"), "d": x._delete},
+            "<r><a>1<b>y</b><d>gone</d>2</a>3</r>",
+        ),
+        ({"a": None, "b": x.elem("br")}, '<a>x<b/>t<b></b>u<c k="&amp;&quot;"/></a>'),
+        (
+            {"s": x.sanskrit_text, "b": x.elem("i", text_after="]")},
+            "<r><s>a<b>i</b>u</s>tail<x><s>k</s></x></r>",
+        ),
+        ({"a": x.elem("p", text_after="!"), "s": x.sanskrit_text}, "<a>x<s>a</s>t</a>"),
+        ({"b": x.elem("i")}, '<a xmlns="urn:x"><b/></a>'),
+        ({"a": x._delete}, "<a>x</a>"),
+        ({"a": x.Rule("a", x._rename({"x": "y"}), "<", "&")}, '<a x="1&lt;" z="2"/>'),
+        (x.tei_xml, '<lg xml:id="a"><l>a<note>n</note> x</l><l>b <hi>c</hi></l></lg>'),
+    ],
+)
+def test_stream_transform__matches_etree(transforms, blob):
+    assert x.stream_transform(blob, transforms) == x.etree_transform(blob, transforms)
+
+
+def test_stream_transform__seeded_data(flask_app):
+    session = get_session()
+    entries = session.query(db.DictionaryEntry, db.Dictionary.slug).join(
+        db.Dictionary, db.Dictionary.id == db.DictionaryEntry.dictionary_id
+    )
+    for entry, slug in entries:
+        rules = dict_html.get_renderer(slug).rules
+        expected = x.etree_transform(entry.value, rules)
+        assert x.stream_transform(entry.value, rules) == expected
+    for block in session.query(db.TextBlock).all():
+        expected = x.etree_transform(block.xml, x.tei_xml)
+        assert x.stream_transform(block.xml, x.tei_xml) == expected
+
+
+def test_set_backend():
+    try:
+        x.set_backend("stream")
+        assert (
+            x.transform_text_block("<lg><l>a</l></lg>") == "<s-lg><s-l>a</s-l></s-lg>"
+        )
+    finally:
+        x.set_backend("etree")
+
+    with pytest.raises(ValueError):
+        x.set_backend("unknown")
@@ -1,3 +1,7 @@
+from ambuda.queries import get_engine
+from ambuda.utils import alignment_report
+
+
 def test_index(client):
     resp = client.get("/proofing/tagging/")
     assert ">Tagging<" in resp.text
@@ -16,3 +20,14 @@ def test_text_section(client):
 def test_text_block(client):
     resp = client.get("/proofing/tagging/pariksha/blocks/1.1")
     assert resp.status_code == 200
+
+
+def test_text__with_alignment_report(client):
+    alignment_report.run(get_engine(), "pariksha")
+
+    resp = client.get("/proofing/tagging/")
+    assert "0 failed, 0 mismatched" in resp.text
+
+    resp = client.get("/proofing/tagging/pariksha/")
+    assert resp.status_code == 200
+    assert "0 / 1 parsed blocks" in resp.text
@@ -1,5 +1,9 @@
+import pytest
 from indic_transliteration import sanscript
 
+from ambuda.queries import get_engine
+from ambuda.utils import concordance, content_hash, parse_html
+
 
 def d(s) -> str:
     return sanscript.transliterate(s, sanscript.HK, sanscript.DEVANAGARI)
@@ -35,3 +39,75 @@ def test_block_parse_htmx__missing_text(client):
 def test_block_parse_htmx__missing_block(client):
     resp = client.get("/api/parses/pariksha/1.2")
     assert resp.status_code == 404
+
+
+def test_block_gloss(client):
+    resp = client.get("/api/parses/pariksha/1.1/gloss/dict-1,dict-2")
+    assert resp.status_code == 200
+    assert resp.json == {
+        "agni": {"dict-1": ["<div>fire</div>"], "dict-2": ["<div>ignis</div>"]}
+    }
+
+
+def test_block_gloss__bad_source(client):
+    resp = client.get("/api/parses/pariksha/1.1/gloss/unknown")
+    assert resp.status_code == 404
+
+
+def test_block_gloss__missing_block(client):
+    resp = client.get("/api/parses/pariksha/1.2/gloss/dict-1")
+    assert resp.status_code == 404
+
+
+@pytest.mark.parametrize("url", ["/parses/pariksha/1.1", "/api/parses/pariksha/1.1"])
+def test_block__etag(client, url):
+    content_hash.hash_text(get_engine(), "pariksha")
+
+    resp = client.get(url)
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+
+@pytest.mark.parametrize("url", ["/parses/pariksha/1.1", "/api/parses/pariksha/1.1"])
+def test_block__etag_changes_with_version(client, monkeypatch, url):
+    content_hash.hash_text(get_engine(), "pariksha")
+    etag = client.get(url).headers["ETag"]
+
+    monkeypatch.setattr(
+        parse_html, "ALIGNMENT_VERSION", parse_html.ALIGNMENT_VERSION + 1
+    )
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+
+
+def test_lemma(client):
+    concordance.index_text(get_engine(), "pariksha")
+    resp = client.get("/parses/lemmas/agni")
+    assert resp.status_code == 200
+    assert d("agniH") in resp.text
+    assert "/parses/pariksha/1.1" in resp.text
+
+
+def test_lemma__missing(client):
+    resp = client.get("/parses/lemmas/indra")
+    assert resp.status_code == 200
+    assert "No occurrences found" in resp.text
+
+
+def test_lemma_api(client):
+    concordance.index_text(get_engine(), "pariksha")
+    resp = client.get("/api/lemmas/agni")
+    assert resp.status_code == 200
+    data = resp.json
+    assert data["next_after"] is None
+    assert {
+        "text": "pariksha",
+        "block": "1.1",
+        "position": 0,
+        "form": "agniH",
+        "parse": "pos=n,g=m,c=1,n=s",
+    } in data["occurrences"]
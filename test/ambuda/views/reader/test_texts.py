@@ -1,4 +1,12 @@
+import json
+
+import pytest
 from indic_transliteration import sanscript
+from sqlalchemy import event
+
+import ambuda.database as db
+from ambuda.queries import get_engine, get_session
+from ambuda.utils import content_hash, section_html, text_nav, text_stats, verse_search
 
 
 def d(s) -> str:
@@ -43,3 +51,257 @@ def test_block_htmx(client):
     # Test is unchanged because we assume that the source text already in
     # Devanagari, so we don't apply transliteration.
     assert "<section>agniH</section>" in resp.text
+
+
+def test_section__uses_prerendered_html(client):
+    session = get_session()
+    text = session.query(db.Text).filter_by(slug="pariksha").one()
+    section = session.query(db.TextSection).filter_by(text_id=text.id, slug="1").one()
+    session.query(db.TextSectionHtml).delete()
+    blocks = '[{"slug": "1.1", "mula": "<p>prerendered</p>"}]'
+    session.add(
+        db.TextSectionHtml(
+            section_id=section.id, version=section_html.version(), blocks=blocks
+        )
+    )
+    session.commit()
+
+    resp = client.get("/texts/pariksha/1")
+    assert resp.status_code == 200
+    assert "<p>prerendered</p>" in resp.text
+
+    session.query(db.TextSectionHtml).delete()
+    session.commit()
+
+
+def test_section__etag(client, rama_client):
+    content_hash.hash_text(get_engine(), "pariksha")
+
+    resp = client.get("/texts/pariksha/1")
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+    assert "public" in resp.headers["Cache-Control"]
+
+    resp = client.get("/texts/pariksha/1", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.data == b""
+    assert resp.headers["ETag"] == etag
+
+    # Other sections have their own ETags.
+    resp = client.get("/texts/pariksha/2", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+
+    # Logged-in users see a different page, which shared caches must not store.
+    resp = rama_client.get("/texts/pariksha/1", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+    assert "private" in resp.headers["Cache-Control"]
+
+
+def test_section__no_etag_without_hash(client):
+    session = get_session()
+    text = session.query(db.Text).filter_by(slug="pariksha").one()
+    section = session.query(db.TextSection).filter_by(text_id=text.id, slug="1").one()
+    section.content_hash = None
+    session.commit()
+    text_nav.invalidate()
+
+    resp = client.get("/texts/pariksha/1")
+    assert resp.status_code == 200
+    assert "ETag" not in resp.headers
+
+
+def _get_with_statements(client, url):
+    """Fetch `url` and record the SQL statements that the request runs."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = get_engine()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        resp = client.get(url)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return resp, statements
+
+
+def test_section__statements(client):
+    # Warm up the navigation index and the section's HTML cache.
+    assert client.get("/texts/pariksha/1").status_code == 200
+
+    resp, statements = _get_with_statements(client, "/texts/pariksha/1")
+    assert resp.status_code == 200
+    # Check that the navigation index is current, then read the cached HTML.
+    assert len(statements) == 2
+    assert "FROM texts" in statements[0]
+    assert "text_section_html" in statements[1]
+
+
+def test_section__statements_without_cache(client):
+    # Warm up the navigation index, then drop the section's HTML cache.
+    assert client.get("/texts/pariksha/1").status_code == 200
+    session = get_session()
+    session.query(db.TextSectionHtml).delete()
+    session.commit()
+
+    resp, statements = _get_with_statements(client, "/texts/pariksha/1")
+    assert resp.status_code == 200
+    # Check the navigation index, look up the cache, load the section and its
+    # blocks, then save the cache.
+    assert len(statements) == 4
+    assert "text_blocks" in statements[2]
+    assert statements[3].startswith("INSERT INTO text_section_html")
+
+
+def test_reader_json__statements(client):
+    assert client.get("/api/texts/pariksha/1").status_code == 200
+
+    resp, statements = _get_with_statements(client, "/api/texts/pariksha/1")
+    assert resp.status_code == 200
+    assert len(statements) == 2
+    assert "FROM texts" in statements[0]
+    assert "text_blocks" in statements[1]
+
+
+def test_section__stale_nav_index(client):
+    # Simulate a text that was reseeded after we built its index.
+    nav = text_nav.get("pariksha")
+    stale_sections = tuple(
+        text_nav.SectionInfo(s.id + 1000, s.slug, s.title, s.content_hash)
+        for s in nav.sections
+    )
+    text_nav._cache["pariksha"] = text_nav.TextNav(
+        nav.id, nav.slug, nav.title, nav.content_hash, stale_sections
+    )
+
+    resp = client.get("/texts/pariksha/1")
+    assert resp.status_code == 200
+    assert "<section>agniH</section>" in resp.text
+    assert text_nav.get("pariksha").sections == nav.sections
+
+
+def test_section__missing_blocks(client, monkeypatch):
+    # If the section is still missing after we rebuild the index, give up.
+    monkeypatch.setattr(section_html, "section_blocks", lambda *args: None)
+    resp = client.get("/texts/pariksha/1")
+    assert resp.status_code == 404
+
+
+def test_section__etag_after_reseed_elsewhere(client):
+    content_hash.hash_text(get_engine(), "pariksha")
+    etag = client.get("/texts/pariksha/1").headers["ETag"]
+
+    # Another process changes the section and rehashes the text. It can't
+    # invalidate our index, so we must notice the new hash ourselves.
+    session = get_session()
+    text = session.query(db.Text).filter_by(slug="pariksha").one()
+    section = session.query(db.TextSection).filter_by(text_id=text.id, slug="1").one()
+    old_hashes = (text.content_hash, section.content_hash)
+    text.content_hash = "new-text-hash"
+    section.content_hash = "new-section-hash"
+    session.commit()
+
+    try:
+        resp = client.get("/texts/pariksha/1", headers={"If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+    finally:
+        text.content_hash, section.content_hash = old_hashes
+        session.commit()
+
+
+def test_download_as_text(client):
+    resp = client.get("/texts/pariksha/download/text")
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert resp.mimetype == "text/plain"
+    assert 'filename="pariksha.txt"' in resp.headers["Content-Disposition"]
+    assert resp.text == "agniH\n\n"
+
+
+def test_download_as_xml(client):
+    resp = client.get("/texts/pariksha/download/xml")
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert resp.mimetype == "application/xml"
+    assert "<div>agniH</div>" in resp.text
+
+
+def test_download_as_json_lines(client):
+    resp = client.get("/texts/pariksha/download/jsonl")
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert [json.loads(line) for line in resp.text.splitlines()] == [
+        {"section": "1", "block": "1.1", "xml": "<div>agniH</div>", "text": "agniH"}
+    ]
+
+
+@pytest.mark.parametrize("format", ["text", "xml", "jsonl"])
+def test_download__missing_text(client, format):
+    resp = client.get(f"/texts/unknown/download/{format}")
+    assert resp.status_code == 404
+
+
+def test_text_about(client):
+    text_stats.update(get_engine(), "pariksha")
+
+    resp = client.get("/texts/pariksha/about")
+    assert resp.status_code == 200
+    assert "<dt>Sections</dt> <dd>2</dd>" in resp.text
+
+
+def test_text_about__no_stats(client):
+    session = get_session()
+    session.query(db.TextStats).delete()
+    session.commit()
+
+    resp = client.get("/texts/pariksha/about")
+    assert resp.status_code == 200
+    assert "Sorry, we don't have any data" in resp.text
+
+
+def test_text_about__no_stats_with_header(client):
+    session = get_session()
+    session.query(db.TextStats).delete()
+    text = session.query(db.Text).filter_by(slug="pariksha").one()
+    text.header = (
+        "<teiHeader><fileDesc><titleStmt><title>parIkSA</title>"
+        "<author>kaScit</author></titleStmt></fileDesc></teiHeader>"
+    )
+    session.commit()
+
+    try:
+        resp = client.get("/texts/pariksha/about")
+        assert resp.status_code == 200
+        assert "<dt>Author</dt> <dd>kaScit</dd>" in resp.text
+        assert "<dt>Sections</dt>" not in resp.text
+    finally:
+        text.header = None
+        session.commit()
+
+
+def test_text_about__missing_text(client):
+    resp = client.get("/texts/unknown/about")
+    assert resp.status_code == 404
+
+
+def test_search(client):
+    verse_search.index_text(get_engine(), "pariksha")
+
+    resp = client.get("/texts/search?q=agniH")
+    assert resp.status_code == 200
+    assert "<mark>agniH</mark>" in resp.text
+    assert "/texts/pariksha/1" in resp.text
+
+
+def test_search__no_results(client):
+    resp = client.get("/texts/search?q=indra")
+    assert resp.status_code == 200
+    assert "No results found" in resp.text
+
+
+def test_search__no_query(client):
+    resp = client.get("/texts/search")
+    assert resp.status_code == 200
@@ -1,5 +1,9 @@
 import pytest
 
+import ambuda.queries as q
+from ambuda.queries import get_engine
+from ambuda.utils import content_hash, dict_artifact
+
 
 def test_index(client):
     resp = client.get("/tools/dictionaries/")
@@ -30,6 +34,23 @@ def test_entry__multiple_sources(client):
     assert "ignis" in resp.text
 
 
+def test_entry__artifact(flask_app, client, tmp_path, monkeypatch):
+    path = tmp_path / "artifact"
+    with flask_app.app_context():
+        content_hash.hash_dictionary(get_engine(), "dict-1")
+        dict_artifact.build(get_engine(), path)
+    monkeypatch.setitem(flask_app.config, "DICTIONARY_ARTIFACT_DIR", str(path))
+
+    # A fresh artifact serves HTML without reading the entry's XML.
+    def fail(*a, **kw):
+        raise AssertionError("dict_entries should not be called")
+
+    monkeypatch.setattr(q, "dict_entries", fail)
+    resp = client.get("/tools/dictionaries/dict-1/agni")
+    assert resp.status_code == 200
+    assert "fire" in resp.text
+
+
 def test_entry__bad_source(client):
     resp = client.get("/tools/dictionaries/unknown/agni")
     assert resp.status_code == 404
@@ -81,3 +102,78 @@ def test_entry_htmx__bad_key(client):
 def test_handle_form_submission(client, before, after):
     resp = client.get(before)
     assert resp.location == after
+
+
+def test_entry__suggestions(client):
+    resp = client.get("/tools/dictionaries/dict-1/agnI")
+    assert resp.status_code == 200
+    assert "Did you mean" in resp.text
+    assert "/tools/dictionaries/dict-1/agni" in resp.text
+
+
+def test_complete(client):
+    resp = client.get("/api/dictionaries/dict-1,dict-2/complete/ag")
+    assert resp.status_code == 200
+    assert resp.json == [{"key": "agni", "devanagari": "अग्नि"}]
+    assert resp.cache_control.public
+    assert resp.cache_control.max_age > 0
+
+
+def test_complete__no_results(client):
+    resp = client.get("/api/dictionaries/dict-1/complete/zz")
+    assert resp.status_code == 200
+    assert resp.json == []
+
+
+def test_complete__bad_source(client):
+    resp = client.get("/api/dictionaries/unknown/complete/ag")
+    assert resp.status_code == 404
+
+
+def test_reverse_search(client):
+    from ambuda.queries import get_engine
+    from ambuda.utils import dict_search
+
+    with client.application.app_context():
+        dict_search.index_dictionary(get_engine(), "dict-2")
+
+    resp = client.get("/tools/dictionaries/search?q=ignis")
+    assert resp.status_code == 200
+    assert "/tools/dictionaries/dict-2/agni" in resp.text
+
+
+def test_reverse_search__no_query(client):
+    resp = client.get("/tools/dictionaries/search")
+    assert resp.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "url", ["/tools/dictionaries/dict-1/agni", "/api/dictionaries/dict-1/agni"]
+)
+def test_entry__etag(client, url):
+    content_hash.hash_dictionary(get_engine(), "dict-1")
+
+    resp = client.get(url)
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+    # Other queries have their own ETags.
+    resp = client.get(url.replace("agni", "deva"), headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+
+
+def test_entry__hashes_read_once(client, monkeypatch):
+    calls = []
+    dictionary_hashes = q.dictionary_hashes
+
+    def spy(sources):
+        calls.append(sources)
+        return dictionary_hashes(sources)
+
+    monkeypatch.setattr(q, "dictionary_hashes", spy)
+    resp = client.get("/tools/dictionaries/dict-1/agni")
+    assert resp.status_code == 200
+    assert calls == [["dict-1"]]
@@ -170,3 +170,26 @@ test('onClickOutsideOfSourceSelector is a no-op otherwise', () => {
   d.onClickOutsideOfSourceSelector();
   expect(d.showSourceSelector).toBe(false);
 });
+
+test('fetchCompletions fetches completions for the current query', async () => {
+  const d = Dictionary();
+  const completions = [{ key: 'deva', devanagari: 'देव' }];
+  window.fetch.mockImplementationOnce(async () => ({
+    ok: true,
+    json: async () => completions,
+  }));
+
+  d.sources = ['mw'];
+  d.query = 'de';
+  await d.fetchCompletions();
+  expect(window.fetch).toHaveBeenLastCalledWith('/api/dictionaries/mw/complete/de');
+  expect(d.completions).toEqual(completions);
+});
+
+test('fetchCompletions skips short queries', async () => {
+  const d = Dictionary();
+  d.completions = [{ key: 'deva', devanagari: 'देव' }];
+  d.query = 'd';
+  await d.fetchCompletions();
+  expect(d.completions).toEqual([]);
+});
@@ -13,6 +13,11 @@ test('ajaxDictionaryQuery', () => {
   expect(Routes.ajaxDictionaryQuery(sources, 'nara')).toBe('/api/dictionaries/apte,mw/nara');
 });
 
+test('ajaxDictionaryCompletions', () => {
+  const sources = ['apte', 'mw'];
+  expect(Routes.ajaxDictionaryCompletions(sources, 'na')).toBe('/api/dictionaries/apte,mw/complete/na');
+});
+
 test('dictionaryQuery', () => {
   const sources = ['apte', 'mw'];
   expect(Routes.dictionaryQuery(sources, 'nara')).toBe('/tools/dictionaries/apte,mw/nara');
@@ -3,6 +3,15 @@
 Setup: https://www.digitalocean.com/community/tutorials/how-to-serve-flask-applications-with-gunicorn-and-nginx-on-ubuntu-18-04
 """
 
-from ambuda import create_app
+from ambuda import create_app, queries
+from ambuda.utils import dict_index
 
 app = create_app("development")
+
+# Build dictionary key indices once, before gunicorn forks its workers, so that
+# all workers share them. This relies on `preload_app` in `gunicorn.conf.py`;
+# without it, each worker builds its own indices here. Then drop our pooled
+# connections so that no worker inherits a connection from this process.
+with app.app_context():
+    dict_index.preload()
+    queries.get_engine().dispose()